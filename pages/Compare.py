@@ -0,0 +1,167 @@
+import streamlit as st
+import pandas as pd
+from utils.grid import render_result_grid
+from utils.fleet import MOTOR_ID, upload_token
+from utils.compare import analyze, incremental, latest_per_motor, transitions, COMPARED, DEFAULT_HI_DROP
+from utils.env import clean_departments, list_versions, saved_models, score_departments
+from utils.rul import DEFAULT_MOTOR_LIFE, estimated_rul
+from utils.fleet_cache import current_manifest, load_dataset
+from utils.session_memory import remember, recall
+from utils.result_cache import result_key, load_result, store_result
+from utils.schema import read_table, SchemaError
+from utils.metrics import page_run, timed_fragment, ROWS_PROCESSED
+from utils.layout import apply_style, sidebar
+
+
+def campaign_results(analyzer, uploaded, model_version):
+    """Full results of an uploaded campaign, shared with the analyzer pages through the result cache."""
+    token = upload_token(uploaded)
+    if analyzer == "ENV":
+        token = f"{token}:v{model_version}"
+    shared = load_result(result_key(analyzer, token))
+    if shared is not None:
+        return shared[0] if analyzer == "ENV" else shared
+    df, _ = read_table(uploaded, analyzer)
+    ROWS_PROCESSED.inc(len(df), analyzer=analyzer)
+    if analyzer == "ENV":
+        # Stored exactly as the ENV page stores it, so either page can reuse the other's result
+        df = clean_departments(df)
+        labelled, missing = score_departments(df, saved_models(model_version))
+        if labelled is None:
+            return df.iloc[:0]
+        store_result(result_key(analyzer, token), analyzer,
+                     (labelled, sorted(df['Department'].unique()), missing, None))
+        return labelled
+    results = analyze(analyzer, df.reset_index(drop=True))
+    store_result(result_key(analyzer, token), analyzer, results)
+    return results
+
+
+@st.fragment
+@timed_fragment("Compare")
+def comparison_results(analyzer, report, token):
+    """Grid controls rerun only the comparison table."""
+    field = COMPARED[analyzer]
+    st.subheader("🔁 Transition Matrix")
+    if report.empty:
+        st.success("✅ No motor changed between the two campaigns.")
+        return
+    st.dataframe(pd.crosstab(report[f"Previous_{field}"], report[f"Current_{field}"]))
+
+    st.subheader("📋 Changed Motors")
+    filter_cols = [col for col in [f"Current_{field}", "Department"] if col in report.columns]
+    render_result_grid(report, "compare_grid", token, filter_cols=filter_cols)
+    st.download_button("⬇️ Download Changes CSV", data=lambda: report.to_csv(index=False).encode(),
+                       file_name=f"{analyzer.lower()}_campaign_changes.csv", mime="text/csv")
+
+
+# ----------- Streamlit UI -----------
+st.set_page_config("HT Motor Campaign Comparison", layout="wide", page_icon="⚙️")
+
+if not st.session_state.get("logged_in", False):
+    st.error("Please login first.")
+    if st.button("🔁 Go to Login"):
+        st.switch_page("main.py")
+    st.stop()
+rerun = page_run("Compare")
+
+user_name = st.session_state.get("user", "Guest")
+
+apply_style()
+sidebar(user_name)
+
+
+st.markdown("<h1 style='text-align:center; color:#4A90E2;'>🔀 Test Campaign Comparison</h1>", unsafe_allow_html=True)
+st.markdown("Which motors changed Diagnosis, Condition or Predicted Damage since the previous campaign? "
+            "Both campaigns need a `Motor_ID` column. Motors whose test values did not change keep their "
+            "previous results; only new and retested motors are analyzed again.")
+
+cols = st.columns(3)
+analyzer = cols[0].radio("Compare", ["LEAP", "RUL", "ENV"], horizontal=True,
+                         format_func=lambda a: {"LEAP": "🧪 Diagnosis", "RUL": "📆 Condition",
+                                                "ENV": "🏭 Damage"}[a])
+model_version, motor_life, hi_drop = None, DEFAULT_MOTOR_LIFE, DEFAULT_HI_DROP
+if analyzer == "ENV":
+    versions = list_versions()
+    if not versions:
+        st.info("ENV campaigns are compared by scoring both against one saved model set, so the same motor "
+                "always gets the same label. Fit and save models on the Environmental Damage page first.")
+        st.stop()
+    model_version = cols[1].selectbox("📦 Model version", [m['version'] for m in versions],
+                                      format_func=lambda v: f"v{v}")
+elif analyzer == "RUL":
+    motor_life = cols[1].number_input("❤️ Average Motor Life (yrs)", 1.0, 200.0, float(DEFAULT_MOTOR_LIFE))
+    hi_drop = cols[2].number_input("📉 Flag Health Index drops of at least", 0.0, 10.0, DEFAULT_HI_DROP, 0.1)
+
+last = current_manifest(analyzer, user_name)
+sources = ["Upload file"] + ([f"Last stored {analyzer} dataset ({last['meta'].get('name', 'upload')}, "
+                              f"saved {last['saved_at']})"] if last else [])
+up1, up2 = st.columns(2)
+with up1:
+    st.subheader("📁 Previous Campaign")
+    source = st.radio("Source", sources, key="compare_source")
+    previous_file = st.file_uploader("Upload previous CSV", type="csv", key="compare_previous") \
+        if source == "Upload file" else None
+with up2:
+    st.subheader("📁 Current Campaign")
+    current_file = st.file_uploader("Upload current CSV", type="csv", key="compare_current")
+
+use_stored = source != "Upload file"
+if not current_file or not (previous_file or use_stored):
+    st.stop()
+
+previous_token = last['version'] if use_stored else upload_token(previous_file)
+token = (analyzer, previous_token, upload_token(current_file), model_version)
+cached = recall("compare_results", token)
+if cached is None:
+    try:
+        # The previous campaign may need a full analysis of its own
+        with rerun.stage("load"):
+            previous = load_dataset(last, analyzer, user_name) if use_stored \
+                else campaign_results(analyzer, previous_file, model_version)
+            current, _ = read_table(current_file, analyzer)
+    except SchemaError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+    if previous is None:
+        st.error(f"❌ The last stored {analyzer} dataset is no longer available. Upload the previous campaign instead.")
+        st.stop()
+    if MOTOR_ID not in previous.columns or MOTOR_ID not in current.columns:
+        st.error(f"❌ Both campaigns need a `{MOTOR_ID}` column to match motors.")
+        st.stop()
+    models = saved_models(model_version) if analyzer == "ENV" else None
+    if use_stored and analyzer == "ENV":
+        # The stored labels come from whichever fit or model set produced that dataset; rescoring it with the
+        # chosen set keeps model changes out of the transitions and out of the labels reused for unchanged motors
+        with rerun.stage("analyze"):
+            previous = analyze(analyzer, previous, models)
+    previous = latest_per_motor(previous)
+    current = latest_per_motor(current)
+    with rerun.stage("analyze"):
+        results, positions, reused = incremental(analyzer, previous, current, models)
+    ROWS_PROCESSED.inc(int((~reused).sum()), analyzer=analyzer)
+    cached = remember("compare_results", token, (previous, results, positions, reused))
+previous, results, positions, reused = cached
+rerun.rendering()
+
+if analyzer == "RUL":
+    # Both campaigns judged against the same motor life
+    previous = previous.assign(Estimated_RUL=estimated_rul(previous['Health_Index'], previous['Age'], motor_life))
+    results = results.assign(Estimated_RUL=estimated_rul(results['Health_Index'], results['Age'], motor_life))
+report = transitions(analyzer, previous, results, hi_drop)
+
+matched = int((positions >= 0).sum())
+retired = len(previous) - matched
+m = st.columns(6)
+m[0].metric("Motors Matched", matched)
+m[1].metric("Reused (unchanged)", int(reused.sum()))
+m[2].metric("Re-analyzed", int((positions >= 0).sum() - reused.sum()))
+m[3].metric("New Motors", int((positions < 0).sum()))
+m[4].metric("Not Retested", retired)
+m[5].metric("Worsened" if analyzer == "RUL" else "Transitions",
+            int(report['Worsened'].sum()) if analyzer == "RUL" else len(report))
+st.markdown("---")
+
+comparison_results(analyzer, report, (token, motor_life, hi_drop))
+
+rerun.finish()
@@ -3,12 +3,96 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.mixture import GaussianMixture
-from sklearn.metrics.pairwise import cosine_similarity
-import matplotlib.pyplot as plt
-import seaborn as sns
-import re
+from utils.grid import render_result_grid
+from utils.charts import damage_bars, feature_heatmap
+from utils.fleet import upload_token
+from utils.rollups import fleet_rollups
+from utils.scheduler import maintenance_plan
+from utils.drift import fleet_drift, drift_notice
+from utils.fleet_cache import current_manifest, load_dataset, save_dataset
+from utils.session_memory import remember, recall
+from utils.result_cache import result_key, load_result, store_result
+from utils.schema import read_table, SchemaError
+from utils.preview import LivePreview
+from utils.metrics import page_run, timed_fragment, ROWS_PROCESSED
+from utils.layout import apply_style, sidebar
+from utils.env import (features, clean_departments, score_departments, compare_scopes,
+                       list_versions, save_models, saved_models, LABELLING, PLANT_WIDE)
+
+@st.fragment
+@timed_fragment("ENV")
+def env_grid(final_df, grid_token):
+    """Grid filters, sorting and paging rerun only the table."""
+    render_result_grid(final_df, "env_grid", grid_token, filter_cols=["Department", "Predicted_Damage"],
+                       columns=['Department'] + features + ['Predicted_Damage', 'Confidence'])
+
+
+@st.fragment
+@timed_fragment("ENV")
+def env_results(labelled_df, all_departments, token):
+    """Filter and display controls re-slice the labelled frame and redraw; no re-parse or refit."""
+    st.header("📊 Analysis Results")
+    st.subheader("Environmental Damage Summary")
+    # 🚀 Filter Controls — inside expander
+    with st.expander("🔧 Filter Options", expanded=False):
+        colf1, colf2 = st.columns([2, 1])
+        filter_dept = colf1.multiselect("📌 Choose Departments", options=all_departments, default=all_departments)
+        hide_normal = colf2.checkbox("🚫 Hide Normal Motors", value=False)
+
+    # Filtering (labels never depend on which departments are shown, so this is a plain slice)
+    final_df = labelled_df[labelled_df['Department'].isin(filter_dept)].reset_index(drop=True)
+
+    if final_df.empty:
+        st.warning("⚠️ No departments had enough data to cluster.")
+        return
+    if hide_normal:
+        final_df = final_df[final_df['Predicted_Damage'] != 'Normal']
+
+    damage_counts = final_df.groupby(['Department', 'Predicted_Damage'], observed=True).size().unstack().fillna(0)
+    st.pyplot(damage_bars(damage_counts))
+
+    col1, col2 = st.columns([4, 6])
+    with col1:
+        st.subheader("Damage Feature Patterns")
+        mean_features = final_df.groupby('Predicted_Damage', observed=True)[features].mean()
+        st.pyplot(feature_heatmap(mean_features))
+
+        st.download_button("📥 Download Results CSV", lambda: final_df.to_csv(index=False).encode('utf-8'),
+                           "ht_motor_damage_results.csv", "text/csv")
+
+    with col2:
+        st.subheader("Final Motor-Level Classification")
+        env_grid(final_df, (token, tuple(filter_dept), hide_normal))
+
+
+@st.fragment
+@timed_fragment("ENV")
+def scope_comparison(uploaded_file, token):
+    """Both clustering scopes on the same upload, fitted only when asked for."""
+    with st.expander("⚖️ Per-department vs plant-wide clustering", expanded=False):
+        compared = recall("env_scope_comparison", token)
+        if compared is None:
+            if not st.button("Fit both scopes on this upload"):
+                return
+            df, _ = read_table(uploaded_file, "ENV")
+            compared = remember("env_scope_comparison", token, compare_scopes(clean_departments(df)))
+        summary, coverage, agreement = compared
+        cols = st.columns(len(summary))
+        for col, (scope, row) in zip(cols, summary.iterrows()):
+            col.markdown(f"**{scope}**")
+            col.metric("Fit time", f"{row['Fit time (s)']:.2f} s")
+            col.metric("Models fitted", int(row['Models fitted']))
+            col.metric("Motors labelled", f"{int(row['Motors labelled'])} ({row['Coverage (%)']:.0f}%)")
+        st.markdown("**Labelled motors by department**")
+        st.dataframe(coverage, use_container_width=True)
+        st.markdown("**Label agreement on motors both scopes labelled**")
+        st.dataframe(agreement, use_container_width=True)
+
+
+def describe_version(m):
+    scope = "plant-wide" if PLANT_WIDE in m['departments'] else f"{len(m['departments'])} departments"
+    return f"v{m['version']} — saved {m['saved_at']}, {scope}"
+
 
 # ------------------------ Page Config ------------------------
 st.set_page_config(page_title="HT Motor Environmental Damage", layout="wide", page_icon="⚙️")
@@ -18,57 +102,13 @@ if not st.session_state.get("logged_in", False):
     if st.button("🔁 Go to Login"):
         st.switch_page("main.py")
     st.stop()
+rerun = page_run("ENV")
 
 # Simulate logged-in user (replace with session-based logic)
 user_name = st.session_state.get("user", "Guest")
 
-st.markdown("""
-    <style>
-    /* Hide default navigation links */
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-
-    /* Hide hamburger menu */
-    [data-testid="collapsedControl"] {
-        display: none;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# 🧑‍💼 SIDEBAR CONTENT
-with st.sidebar:
-    st.markdown(f"""
-        <div style='text-align: center; padding-top: 0.5px; padding-bottom: 0.5px;'>
-            <img src='https://cdn-icons-png.flaticon.com/512/9131/9131529.png' width='70' style='border-radius:50%; margin-bottom: 0.5px;'/>
-            <h4 style='margin: 0;'>Welcome,</h4>
-            <h3 style='margin: 0; color: #1abc9c;'>{user_name}</h3>
-        </div>
-    """, unsafe_allow_html=True)
-    # Navigation
-    st.markdown("---")
-    st.markdown("## Navigation")
-    st.page_link("pages/Home.py", label="🏠 Diagnostics Dashboard")
-    st.page_link("pages/RUL.py", label="📆 RUL & Health Estimation")
-    st.page_link("pages/LEAP.py", label="🧪 LEAP Test Analyzer")
-    st.page_link("pages/ENV.py", label="🏭 Environmental Damage Mapping")
-
-    st.markdown("<div style='height: 90px;'></div>", unsafe_allow_html=True)
-    st.markdown("---")
-
-    # 🔓 Logout
-    if st.button("🔓 Logout"):
-        st.switch_page("pages/Logout.py")  
-    
-    st.markdown("""
-        <div style='
-            color: #bbbbbb;
-            font-style: italic;
-            font-size: 0.9rem;
-        '>
-        Made by Srishti Ghosh
-        </div>
-    """, unsafe_allow_html=True)
+apply_style()
+sidebar(user_name)
 
 # ------------------------ Title and Styling ------------------------
 
@@ -78,54 +118,6 @@ This interactive dashboard classifies and visualizes environmental damage to HT
 The damage types considered are:
 """)
             
-st.markdown("""
-<style>
-/* Card container styling */
-.dark-card {
-    background-color: #1e1e1e;
-    border-radius: 10px;
-    padding: 18px 16px;
-    text-align: left;
-    box-shadow: 0 2px 6px rgba(0,0,0,0.3);
-    transition: all 0.25s ease;
-    border-left: 4px solid #3a3a3a;
-    height: 150px;
-}
-.dark-card:hover {
-    transform: translateY(-4px);
-    box-shadow: 0 6px 14px rgba(0,0,0,0.4);
-}
-
-/* Icons */
-.dark-icon {
-    font-size: 22px;
-    margin-bottom: 6px;
-    color: #ffffffcc;
-}
-
-/* Title */
-.dark-title {
-    font-size: 16px;
-    font-weight: 600;
-    margin: 0;
-    color: #ffffff;
-}
-
-/* Description */
-.dark-desc {
-    font-size: 13px;
-    color: #bbbbbb;
-    margin-top: 3px;
-}
-
-/* Accent border colors */
-.moisture { border-color: #2d85d0; }
-.dust     { border-color: #9b59b6; }
-.temp     { border-color: #e74c3c; }
-.normal   { border-color: #27ae60; }
-</style>
-""", unsafe_allow_html=True)
-
 # Display 4 dark theme cards
 col1, col2, col3, col4 = st.columns(4)
 
@@ -172,107 +164,120 @@ st.markdown("📌 Required columns: `Department`, `IR`, `PI`, `DD`, `TD_0.2`, `T
 # ------------------------ File Upload ------------------------
 uploaded_file = st.file_uploader("📤 Upload your CSV file", type=["csv"])
 
+versions = list_versions()
+mode = st.radio("🧠 Labelling Mode", ["Fit new models", "Score against saved model"], horizontal=True,
+                help="Saved models label new motors with a single transform + predict per department, "
+                     "so the same motor always gets the same label.")
+model_version, scope = None, None
+if mode == "Score against saved model":
+    if versions:
+        model_version = st.selectbox(
+            "📦 Model version", [m['version'] for m in versions],
+            format_func=lambda v: next(describe_version(m) for m in versions if m['version'] == v))
+    else:
+        st.info("No saved models yet. Fit models on an upload and save them first.")
+else:
+    scope = st.radio("🗺️ Clustering Scope", list(LABELLING), horizontal=True,
+                     help="Per department fits one model per department and skips departments under 3 motors. "
+                          "Plant-wide fits one model for every motor; departments then only group the labels.")
+
+last = current_manifest("ENV", user_name)
+reload_last = not uploaded_file and last is not None and st.toggle(
+    f"📦 Open last dataset ({last['meta'].get('name', 'upload')}, {last['rows']} motors, saved {last['saved_at']})",
+    key="env_reload")
+
+labelled_df = None
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-
-    required_cols = ['Department', 'IR', 'PI', 'DD', 'TD_0.2', 'TD_1.0', 'TD_TipUp', 'Cap_TipUp']
-    if not all(col in df.columns for col in required_cols):
-        st.error("❌ CSV must contain: " + ", ".join(required_cols))
+    upload = token = upload_token(uploaded_file)
+    if model_version is not None:
+        token = f"{token}:v{model_version}"
+    elif scope == "Plant-wide":
+        token = f"{token}:plant"
+    # Parsing and clustering run once per upload / model version, not on every widget click
+    cached = recall("env_labelled", token)
+    if cached is None:
+        # Clustered by another server process on this host
+        shared = load_result(result_key("ENV", token))
+        if shared is not None:
+            labelled_df, all_departments, missing, fitted_models = shared
+            save_dataset("ENV", labelled_df, token, {'name': uploaded_file.name, 'departments': all_departments},
+                         owner=user_name)
+            if fitted_models:
+                remember("env_fitted_models", token, fitted_models)
+            cached = remember("env_labelled", token, (labelled_df, all_departments, missing))
+    if cached:
+        labelled_df, all_departments, missing = cached
+    elif mode == "Score against saved model" and model_version is None:
+        pass
     else:
-        df['Department'] = df['Department'].astype(str).apply(lambda x: re.sub(r'[^a-zA-Z0-9]', '', x))
-        features = ['IR', 'PI', 'DD', 'TD_TipUp', 'Cap_TipUp']
-
-        # Reference patterns
-        reference_patterns = {
-            'Normal':       np.array([0.9, 0.9, 0.1, 0.1, 0.1]),
-            'Moisture':     np.array([0.2, 0.2, 0.9, 0.8, 0.9]),
-            'Dust':         np.array([0.5, 0.5, 0.8, 0.5, 0.8]),
-            'Temperature':  np.array([0.6, 0.5, 0.5, 0.8, 0.6])
-        }
-        damage_types = list(reference_patterns.keys())
-        ref_matrix = np.vstack(list(reference_patterns.values()))
-        ref_scaled = StandardScaler().fit_transform(ref_matrix)
-
-        st.success(f"✅ Processing {len(df)} motors...")
-        st.markdown("---")
-
-        st.header("📊 Analysis Results")
-        st.subheader("Environmental Damage Summary")
-        # 🚀 Filter Controls — inside expander
-        with st.expander("🔧 Filter Options", expanded=False):
-            colf1, colf2 = st.columns([2, 1])
-            filter_dept = colf1.multiselect("📌 Choose Departments", options=sorted(df['Department'].unique()), default=sorted(df['Department'].unique()))
-            hide_normal = colf2.checkbox("🚫 Hide Normal Motors", value=False)
-
-        # Filtering
-        df_filtered = df[df['Department'].isin(filter_dept)]
-
-        all_results = []
-
-        for dept in df_filtered['Department'].unique():
-            sub_df = df_filtered[df_filtered['Department'] == dept].dropna(subset=features)
-            if len(sub_df) < 3:
-                continue
-
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(sub_df[features])
-
-            lowest_bic = np.inf
-            best_n = 2
-            for n in range(2, min(len(sub_df), 5)):
-                gmm_try = GaussianMixture(n_components=n, random_state=42)
-                gmm_try.fit(X_scaled)
-                bic = gmm_try.bic(X_scaled)
-                if bic < lowest_bic:
-                    best_n = n
-                    lowest_bic = bic
-
-            gmm = GaussianMixture(n_components=best_n, random_state=42)
-            clusters = gmm.fit_predict(X_scaled)
-            sub_df = sub_df.copy()
-            sub_df['Cluster'] = clusters
-
-            cluster_means = sub_df.groupby('Cluster')[features].mean()
-            cluster_scaled = StandardScaler().fit_transform(cluster_means)
-
-            sim = cosine_similarity(cluster_scaled, ref_scaled)
-            cluster_to_label = {i: damage_types[np.argmax(sim[i])] for i in range(sim.shape[0])}
-            cluster_confidence = {i: np.max(sim[i]) for i in range(sim.shape[0])}
-
-            sub_df['Predicted_Damage'] = sub_df['Cluster'].map(cluster_to_label)
-            sub_df['Confidence'] = sub_df['Cluster'].map(cluster_confidence)
-            sub_df['Department'] = dept
-
-            all_results.append(sub_df)
-
-        if all_results:
-            final_df = pd.concat(all_results).reset_index(drop=True)
-
-            if hide_normal:
-                final_df = final_df[final_df['Predicted_Damage'] != 'Normal']
-
-            damage_counts = final_df.groupby(['Department', 'Predicted_Damage']).size().unstack().fillna(0)
-            fig1, ax1 = plt.subplots(figsize=(10, 5))
-            damage_counts.plot(kind='bar', stacked=True, ax=ax1, colormap='Set2')
-            ax1.set_ylabel("Number of Motors")
-            ax1.set_title("Total Damage Count by Department")
-            ax1.set_xticklabels(damage_counts.index, rotation=45, ha='right')
-            st.pyplot(fig1)
-
-            col1, col2 = st.columns([4, 6])
-            with col1:
-                st.subheader("Damage Feature Patterns")
-                mean_features = final_df.groupby('Predicted_Damage')[features].mean()
-                fig3, ax3 = plt.subplots(figsize=(8, 4))
-                sns.heatmap(mean_features, annot=True, cmap='coolwarm', ax=ax3)
-                st.pyplot(fig3)
-
-                csv = final_df.to_csv(index=False).encode('utf-8')
-                st.download_button("📥 Download Results CSV", csv, "ht_motor_damage_results.csv", "text/csv")
-
-            with col2:
-                st.subheader("Final Motor-Level Classification")
-                st.dataframe(final_df[['Department'] + features + ['Predicted_Damage', 'Confidence']])
-
+        def sample_damage(sample):
+            # The sample is clustered on its own with the chosen scope, or scored with the chosen saved models
+            sample = clean_departments(sample)
+            sampled, _ = (LABELLING[scope](sample) if model_version is None
+                          else score_departments(sample, saved_models(model_version)))
+            return None if sampled is None else sampled['Predicted_Damage']
+
+        preview = st.empty()
+        try:
+            with rerun.stage("parse"):
+                df, ignored = read_table(uploaded_file, "ENV",
+                                         on_chunk=LivePreview(preview, "Damage", sample_damage, uploaded_file))
+        except SchemaError as e:
+            preview.empty()
+            st.error(f"❌ {e}")
         else:
-            st.warning("⚠️ No departments had enough data to cluster.")
+            if ignored:
+                st.caption(f"Skipped {len(ignored)} column(s) the analyzer does not use: {', '.join(ignored)}")
+            df = clean_departments(df)
+            all_departments = sorted(df['Department'].unique())
+
+            missing, fitted_models = [], None
+            with rerun.stage("analyze"):
+                if model_version is None:
+                    labelled_df, fitted_models = LABELLING[scope](df)
+                else:
+                    labelled_df, missing = score_departments(df, saved_models(model_version))
+            ROWS_PROCESSED.inc(len(df), analyzer="ENV")
+            if fitted_models is not None:
+                remember("env_fitted_models", token, fitted_models)
+
+            if labelled_df is None:
+                st.warning("⚠️ No departments had enough data to cluster.")
+            else:
+                save_dataset("ENV", labelled_df, token, {'name': uploaded_file.name, 'departments': all_departments},
+                         owner=user_name)
+                remember("env_labelled", token, (labelled_df, all_departments, missing))
+                store_result(result_key("ENV", token), "ENV", (labelled_df, all_departments, missing, fitted_models))
+            preview.empty()
+
+    if labelled_df is not None:
+        st.success(f"✅ Processing {len(labelled_df)} motors...")
+        if missing:
+            st.warning(f"⚠️ No saved model in v{model_version} for: {', '.join(missing)}")
+elif reload_last:
+    labelled_df = load_dataset(last, "ENV", user_name)
+    all_departments = last['meta']['departments']
+    token = last['source']
+    upload = token.split(":")[0]  # labelled token = upload hash + ":v<N>" / ":plant"
+
+if labelled_df is not None:
+    rerun.rendering()
+    # Motors are keyed by the upload alone (original row labels when there is no Motor_ID column), so labelling
+    # the same file with another model version or scope updates its motors instead of adding them again
+    maintenance_plan().update(fleet_rollups().ingest("ENV", labelled_df, upload, batch=token))
+    # The test values are the same whatever labelled them: the upload is observed once
+    drift_notice(fleet_drift().observe("ENV", labelled_df, upload))
+
+    fitted = recall("env_fitted_models", token)
+    if uploaded_file and model_version is None and fitted:
+        if st.button("💾 Save fitted models as new version"):
+            manifest = save_models(fitted, token, st.session_state.get("user"))
+            saved = "a plant-wide model" if PLANT_WIDE in fitted else f"{len(manifest['departments'])} department models"
+            st.success(f"✅ Saved {saved} as v{manifest['version']}.")
+    st.markdown("---")
+
+    env_results(labelled_df, all_departments, token)
+    if uploaded_file and mode == "Fit new models":
+        scope_comparison(uploaded_file, upload)
+
+rerun.finish()
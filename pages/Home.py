@@ -4,8 +4,12 @@ import numpy as np
 from sklearn.preprocessing import StandardScaler
 from sklearn.mixture import GaussianMixture
 from sklearn.metrics.pairwise import cosine_similarity
-import matplotlib.pyplot as plt
-import seaborn as sns
+from utils.rollups import fleet_rollups, worst_departments
+from utils.drift import fleet_drift
+from utils.reports import REPORT_DIR, generate_reports, report_archive
+from utils.sharding import cpu_workers
+from utils.metrics import page_run
+from utils.layout import apply_style, sidebar
 
 # ------------------------ Page Config ------------------------
 st.set_page_config(page_title="HT Motor Dashboard", layout="wide", page_icon="🏠")
@@ -15,120 +19,16 @@ if not st.session_state.get("logged_in", False):
     if st.button("🔁 Go to Login"):
         st.switch_page("main.py")
     st.stop()
+rerun = page_run("Home")
 
 # Simulate logged-in user (replace with session-based logic)
 user_name = st.session_state.get("user", "Guest")
 
-st.markdown("""
-    <style>
-    /* Hide default navigation links */
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-
-    /* Hide hamburger menu */
-    [data-testid="collapsedControl"] {
-        display: none;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# 🧑‍💼 SIDEBAR CONTENT
-with st.sidebar:
-    st.markdown(f"""
-        <div style='text-align: center; padding-top: 0.5px; padding-bottom: 0.5px;'>
-            <img src='https://cdn-icons-png.flaticon.com/512/9131/9131529.png' width='70' style='border-radius:50%; margin-bottom: 0.5px;'/>
-            <h4 style='margin: 0;'>Welcome,</h4>
-            <h3 style='margin: 0; color: #1abc9c;'>{user_name}</h3>
-        </div>
-    """, unsafe_allow_html=True)
-    # Navigation
-    st.markdown("---")
-    st.markdown("## Navigation")
-    st.page_link("pages/Home.py", label="🏠 Diagnostics Dashboard")
-    st.page_link("pages/RUL.py", label="📆 RUL & Health Estimation")
-    st.page_link("pages/LEAP.py", label="🧪 LEAP Test Analyzer")
-    st.page_link("pages/ENV.py", label="🏭 Environmental Damage Mapping")
-
-    st.markdown("<div style='height: 90px;'></div>", unsafe_allow_html=True)
-    st.markdown("---")
-
-    # 🔓 Logout
-    if st.button("🔓 Logout"):
-        st.switch_page("pages/Logout.py")  
-    
-    st.markdown("""
-        <div style='
-            color: #bbbbbb;
-            font-style: italic;
-            font-size: 0.9rem;
-        '>
-        Made by Srishti Ghosh
-        </div>
-    """, unsafe_allow_html=True)
+apply_style()
+sidebar(user_name)
 
 # ------------------------ Title ------------------------
 st.title("🏠 HT Motor Diagnostics Dashboard")
-st.markdown("""
-    <style>
-    .overview-section {
-        margin-top: 2rem;
-        color: white;
-    }
-    .overview-header {
-        font-size: 2rem;
-        font-weight: bold;
-        color: #1abc9c;
-        margin-bottom: 0.5rem;
-    }
-    .overview-subtext {
-        font-size: 1rem;
-        color: #cccccc;
-        margin-bottom: 2rem;
-    }
-    .overview-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(270px, 1fr));
-        gap: 1.5rem;
-    }
-    .overview-card {
-        background-color: #142f43;
-        border-radius: 14px;
-        padding: 1.2rem;
-        color: white;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.3);
-        transition: transform 0.2s ease;
-    }
-    .overview-card:hover {
-        transform: translateY(-5px);
-        background-color: #1e4563;
-    }
-    .overview-icon {
-        font-size: 38px;
-        margin-bottom: 0.6rem;
-        color: #1abc9c;
-    }
-    .overview-title {
-        font-size: 1.2rem;
-        font-weight: bold;
-        margin-bottom: 0.3rem;
-    }
-    .overview-description {
-        font-size: 0.94rem;
-        color: #dddddd;
-    }
-    .overview-highlight {
-        background-color: #1abc9c22;
-        padding: 0.4rem 0.8rem;
-        border-radius: 8px;
-        color: #1abc9c;
-        display: inline-block;
-        font-size: 0.9rem;
-        margin-top: 0.8rem;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
 st.markdown('<div class="overview-section">', unsafe_allow_html=True)
 
 # Section Header
@@ -180,3 +80,81 @@ st.markdown("""
 
 st.markdown('</div>', unsafe_allow_html=True)  # close grid
 st.markdown('</div>', unsafe_allow_html=True)  # close section
+
+# ------------------------ Live Fleet KPIs ------------------------
+st.markdown("<div style='height: 30px;'></div>", unsafe_allow_html=True)
+st.markdown('<div class="overview-header">📈 Live Fleet KPIs</div>', unsafe_allow_html=True)
+
+snapshot = fleet_rollups().snapshot()
+if not snapshot['motors']:
+    st.info("No analyses yet. Results from the RUL, LEAP and ENV bulk tabs appear here as they are run.")
+else:
+    plant_names = sorted(snapshot['plants'])
+    plant = st.selectbox("🏭 Plant", plant_names) if len(plant_names) > 1 else plant_names[0]
+    totals = snapshot['plants'][plant]
+    depts = {dept: agg for (p, dept), agg in snapshot['departments'].items() if p == plant}
+
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Motors Tracked", totals['motors'])
+    k2.metric("Critical Motors", totals['Condition'].get("Critical", 0))
+    k3.metric("Flagged Motors", f"{100 * totals['flagged'] / totals['motors']:.1f}%")
+    k4.metric("Mean Health Index", f"{totals['hi_sum'] / totals['hi_count']:.2f}" if totals['hi_count'] else "–")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("#### Motors per Condition")
+        if totals['Condition']:
+            st.bar_chart(pd.Series(totals['Condition'], name="Motors"))
+        else:
+            st.caption("Run a RUL analysis to populate.")
+    with c2:
+        st.markdown("#### Diagnosis Mix")
+        if totals['Diagnosis']:
+            st.bar_chart(pd.Series(totals['Diagnosis'], name="Motors").sort_values(ascending=False), horizontal=True)
+        else:
+            st.caption("Run a LEAP analysis to populate.")
+
+    c3, c4 = st.columns(2)
+    with c3:
+        st.markdown("#### Damage Type by Department")
+        damage = pd.DataFrame({dept: agg['Predicted_Damage'] for dept, agg in depts.items()}).T.fillna(0)
+        if not damage.empty:
+            st.bar_chart(damage, stack=True)
+        else:
+            st.caption("Run an ENV analysis to populate.")
+    with c4:
+        st.markdown("#### Worst Departments")
+        worst = worst_departments({'departments': {k: v for k, v in snapshot['departments'].items() if k[0] == plant}})
+        st.dataframe(worst, hide_index=True, use_container_width=True)
+
+    st.markdown("#### Input Drift vs Reference Data")
+    drift = fleet_drift().report(plant)
+    if drift.empty:
+        st.caption("No inputs observed yet.")
+    else:
+        flagged = drift[drift['Status'] != "Stable"]
+        d1, d2 = st.columns(2)
+        d1.metric("Drifting Features", int((drift['Status'] == "Drift").sum()))
+        d2.metric("Features to Watch", int((drift['Status'] == "Watch").sum()))
+        show_all = st.toggle("Show stable features", value=flagged.empty)
+        st.dataframe(drift if show_all else flagged, hide_index=True, use_container_width=True,
+                     column_config={'p_value': st.column_config.NumberColumn(format="%.1e")})
+
+    st.markdown("#### Batch Reports")
+    st.caption("One printable report per motor (LEAP diagnosis, RUL score breakdown, ENV damage) and per department, "
+               "for the whole fleet. Motors whose results have not changed since the last run are skipped.")
+    if st.button("🖨️ Generate fleet reports"):
+        rollups = fleet_rollups()
+        with rollups.lock:
+            records = {key: dict(record) for key, record in rollups.motors.items()}
+        bar = st.progress(0.0, text="Rendering reports...")
+        rendered, skipped = generate_reports(
+            records, cpu_workers(),
+            progress=lambda done, total: bar.progress(done / total, text=f"Rendering reports... {done}/{total}"))
+        bar.empty()
+        st.success(f"✅ Rendered {rendered} motor reports, skipped {skipped} unchanged.")
+    if (REPORT_DIR / "index.html").exists():
+        st.download_button("📥 Download reports (.zip)", report_archive, file_name="fleet_reports.zip",
+                           mime="application/zip")
+
+rerun.finish()
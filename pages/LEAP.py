@@ -1,105 +1,65 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-import seaborn as sns
 import numpy as np
-
-# ----------- Diagnostic Logic -----------
-def classify_insulation_health(ir, pi, dd, td_20, td_100, cap_tipup):
-    td_tipup = td_100 - td_20
-
-    def lvl(val, low, high): return 'Good' if val < low else 'Moderate' if val < high else 'Poor'
-
-    IR = 'Good' if ir >= 0.1 else 'Moderate' if ir >= 0.05 else 'Poor'
-    PI = 'Good' if pi >= 2 else 'Moderate' if pi >= 1.5 else 'Poor'
-    DD = lvl(dd, 4, 10)
-    TD20 = 'Low' if td_20 < 0.01 else 'High'
-    TD100 = 'Low' if td_100 < 0.02 else 'High'
-    TDt = lvl(abs(td_tipup), 0.8, 2.0)
-    CT = lvl(cap_tipup, 0.005, 0.015)
-
-    # Diagnosis Rules
-    if all(x == 'Good' for x in [IR, PI, DD, TDt, CT]):
-        diagnosis = "Healthy insulation"
-        action = "No action"
-        location = "-"
-    elif IR == 'Poor' and PI == 'Poor' and DD == 'Poor':
-        diagnosis = "Surface moisture and trapped aging"
-        action = "Clean & dry, retest"
-        location = "Stator surface / terminal box"
-    elif TDt == 'Poor' and CT == 'Poor':
-        diagnosis = "Voids + stress zones emerging"
-        action = "Schedule partial reinsulation"
-        location = "Interlayer insulation"
-    elif TDt == 'Poor' and CT == 'Moderate':
-        diagnosis = "Early partial discharge risk"
-        action = "Monitor monthly"
-        location = "End winding, stress zones"
-    elif TD20 == 'High' and TD100 == 'High' and CT == 'Good':
-        diagnosis = "Uniform dielectric loss (contamination)"
-        action = "Clean & dry"
-        location = "Surface insulation"
-    elif TDt == 'Poor' and CT == 'Good':
-        diagnosis = "Voltage-sensitive dielectric aging"
-        action = "Monitor trending"
-        location = "Bulk insulation"
-    elif CT == 'Poor' and TDt == 'Good':
-        diagnosis = "Delamination or geometry deformation"
-        action = "Inspect physical winding structure"
-        location = "Slot insulation"
-    elif DD == 'Poor' and TDt != 'Poor':
-        diagnosis = "Embedded moisture"
-        action = "Dry motor internally and retest"
-        location = "Bulk winding insulation"
-    elif IR == 'Poor' and DD == 'Good':
-        diagnosis = "Surface leakage"
-        action = "Drying & visual inspection"
-        location = "Motor body / cable box"
-    elif IR == 'Moderate' and PI == 'Moderate' and DD == 'Moderate':
-        diagnosis = "Aging trend beginning"
-        action = "Retest in 3 months"
-        location = "General insulation"
-    elif PI == 'Moderate' and TD100 == 'High':
-        diagnosis = "Minor dielectric stress"
-        action = "Trend analysis & monitoring"
-        location = "End winding"
-    elif TDt == 'Moderate' and CT == 'Good':
-        diagnosis = "Early voltage tracking"
-        action = "Flag for monitoring"
-        location = "Corona-prone zones"
-    elif TD20 == 'High' and CT == 'Poor':
-        diagnosis = "Capacitance shift with aging"
-        action = "Plan full inspection"
-        location = "Winding insulation"
-    elif IR == 'Moderate' and TDt == 'Poor' and CT == 'Poor':
-        diagnosis = "Developing delamination under stress"
-        action = "Offline LEAP+ recommended"
-        location = "Slot region / taping"
-    elif PI == 'Poor' and TD100 == 'High':
-        diagnosis = "Insulation wear with increased loss"
-        action = "Drying + trending"
-        location = "Mid-slot insulation"
+from utils.grid import render_result_grid
+from utils.charts import diagnosis_donut, classification_bars
+from utils.figures import status_radar, confidence_color
+from utils.drilldown import motor_figures
+from utils.fleet import upload_token
+from utils.rollups import fleet_rollups
+from utils.scheduler import maintenance_plan
+from utils.drift import fleet_drift, drift_notice
+from utils.leap import classify_insulation_health, diagnose_frame, LEAP_INPUTS
+from utils.rul import RUL_INPUTS, score_fleet
+from utils.sharding import run_sharded, cpu_workers
+from utils.fleet_cache import current_manifest, load_dataset, save_dataset
+from utils.session_memory import remember, recall
+from utils.result_cache import result_key, load_result, store_result
+from utils.schema import read_table, SchemaError
+from utils.megger import summarize_log, combine_values, read_measurements, analyze_complete, missing_inputs, INSUFFICIENT
+from utils.tandelta import fit_sweeps, for_env
+from utils.preview import LivePreview
+from utils.metrics import page_run, timed_fragment, ROWS_PROCESSED
+from utils.layout import apply_style, sidebar
+
+def show_diagnosis(res, radar, key):
+    confidence = res["Confidence (%)"]
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.metric("Confidence Score", f"{confidence}%")
+        st.markdown(
+            f"<div style='font-size:0.9rem; color:gray;'>Confidence Score reflects severity-weighted degradation from test values. ", unsafe_allow_html=True)
+    with col2:
+        st.markdown("#### 🧬 Diagnosis Summary")
+        st.success(f"**Diagnosis:** {res['Diagnosis']}")
+        st.info(f"**Action:** {res['Action']} • **Location:** {res['Location']}")
+
+    st.markdown("#### 🕸️ Radar Chart of Test Conditions")
+    st.plotly_chart(radar, use_container_width=True, key=key)
+
+
+@st.fragment
+@timed_fragment("LEAP")
+def leap_results(output_df, token):
+    """Grid controls and row selection rerun only the table and drill-down."""
+    st.header("🧰 Insulation Diagnosis with Degradation Location / Action Plan")
+    motor = render_result_grid(output_df, "leap_grid", token, filter_cols=["Diagnosis", "Department"],
+                               selectable=True)
+
+    st.subheader("🔎 Motor Drill-Down")
+    if motor is None:
+        st.caption("Select a row in the table above to inspect that motor.")
     else:
-        diagnosis = "Unclassified"
-        action = "Full diagnostics required"
-        location = "To be inspected"
-
-    # Confidence Score
-    weights = {'IR': 1, 'PI': 1, 'DD': 1, 'TDt': 3, 'CT': 2}
-    status_map = {'Good': 2, 'Moderate': 1, 'Poor': 0}
-    statuses = {'IR': IR, 'PI': PI, 'DD': DD, 'TDt': TDt, 'CT': CT}
-    score = sum(weights[t] * status_map[statuses[t]] for t in statuses)
-    max_score = sum(w * 2 for w in weights.values())
-    confidence = int(score / max_score * 100)
-
-    return {
-        "Diagnosis": diagnosis,
-        "Action": action,
-        "Location": location,
-        "Confidence (%)": confidence,
-        "Statuses": statuses
-    }
+        # Rebuild the classifier output from the row instead of re-running it
+        statuses = {'IR': motor['IR_classified'], 'PI': motor['PI_classified'], 'DD': motor['DD_classified'],
+                    'TDt': motor['TDt'], 'CT': motor['CT']}
+        res = {"Diagnosis": motor["Diagnosis"], "Action": motor["Action"], "Location": motor["Location"],
+               "Confidence (%)": motor["Confidence (%)"], "Statuses": statuses}
+        st.markdown(f"**Motor row {motor.name}**")
+        radar = motor_figures(("leap_drilldown", token), motor.name,
+                              lambda: status_radar(statuses, confidence_color(res["Confidence (%)"])))
+        show_diagnosis(res, radar, "drilldown_radar")
 
 # ----------- Streamlit UI -----------
 st.set_page_config("HT Motor LEAP Analyzer", layout="wide", page_icon="⚙️")
@@ -109,60 +69,16 @@ if not st.session_state.get("logged_in", False):
     if st.button("🔁 Go to Login"):
         st.switch_page("main.py")
     st.stop()
+rerun = page_run("LEAP")
 
 # Simulate logged-in user (replace with session-based logic)
 user_name = st.session_state.get("user", "Guest")
 
-st.markdown("""
-    <style>
-    /* Hide default navigation links */
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-
-    /* Hide hamburger menu */
-    [data-testid="collapsedControl"] {
-        display: none;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# 🧑‍💼 SIDEBAR CONTENT
-with st.sidebar:
-    st.markdown(f"""
-        <div style='text-align: center; padding-top: 0.5px; padding-bottom: 0.5px;'>
-            <img src='https://cdn-icons-png.flaticon.com/512/9131/9131529.png' width='70' style='border-radius:50%; margin-bottom: 0.5px;'/>
-            <h4 style='margin: 0;'>Welcome,</h4>
-            <h3 style='margin: 0; color: #1abc9c;'>{user_name}</h3>
-        </div>
-    """, unsafe_allow_html=True)
-    # Navigation
-    st.markdown("---")
-    st.markdown("## Navigation")
-    st.page_link("pages/Home.py", label="🏠 Diagnostics Dashboard")
-    st.page_link("pages/RUL.py", label="📆 RUL & Health Estimation")
-    st.page_link("pages/LEAP.py", label="🧪 LEAP Test Analyzer")
-    st.page_link("pages/ENV.py", label="🏭 Environmental Damage Mapping")
-
-    st.markdown("<div style='height: 90px;'></div>", unsafe_allow_html=True)
-    st.markdown("---")
-
-    # 🔓 Logout
-    if st.button("🔓 Logout"):
-        st.switch_page("pages/Logout.py")  
-    
-    st.markdown("""
-        <div style='
-            color: #bbbbbb;
-            font-style: italic;
-            font-size: 0.9rem;
-        '>
-        Made by Srishti Ghosh
-        </div>
-    """, unsafe_allow_html=True)
+apply_style()
+sidebar(user_name)
 
 st.markdown("<h1 style='text-align:center; color:#4A90E2;'>⚙️ HT Motor Insulation Health Diagnostics</h1>", unsafe_allow_html=True)
-tab1, tab2 = st.tabs(["🔹 Single Motor Entry", "📤 Bulk Upload & Analysis"])
+tab1, tab2, tab3 = st.tabs(["🔹 Single Motor Entry", "📤 Bulk Upload & Analysis", "📈 Raw Tester Logs"])
 
 # ---------- SINGLE ENTRY ----------
 with tab1:
@@ -184,38 +100,7 @@ with tab1:
     if run:
         res = classify_insulation_health(ir, pi, dd, td20, td100, cap_tipup)
         st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
-        status = res["Statuses"]
-        confidence = res["Confidence (%)"]
-        color = 'green' if confidence >= 80 else 'orange' if confidence >= 50 else 'red'
-
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.metric("Confidence Score", f"{confidence}%")
-            st.markdown(
-                f"<div style='font-size:0.9rem; color:gray;'>Confidence Score reflects severity-weighted degradation from test values. ", unsafe_allow_html=True)
-        with col2:
-            st.markdown("#### 🧬 Diagnosis Summary")
-            st.success(f"**Diagnosis:** {res['Diagnosis']}")
-            st.info(f"**Action:** {res['Action']} • **Location:** {res['Location']}")
-
-        st.markdown("#### 🕸️ Radar Chart of Test Conditions")
-        level_map = {"Poor": 0, "Moderate": 1, "Good": 2}
-        radar_keys = ['IR', 'PI', 'DD', 'TDt', 'CT']
-        radar_vals = [level_map[status[k]] for k in radar_keys]
-        radar = go.Figure()
-        radar.add_trace(go.Scatterpolar(
-            r=radar_vals,
-            theta=['IR', 'PI', 'DD', 'TD TipUp', 'Cap TipUp'],
-            fill='toself',
-            name="Health Levels",
-            line=dict(color=color)
-        ))
-        radar.update_layout(
-            polar=dict(radialaxis=dict(visible=True, range=[0, 2], tickvals=[0, 1, 2],
-                                       ticktext=["Poor", "Moderate", "Good"])),
-            showlegend=False
-        )
-        st.plotly_chart(radar, use_container_width=True)
+        show_diagnosis(res, status_radar(res["Statuses"], confidence_color(res["Confidence (%)"])), "single_radar")
 
 # ---------- BULK UPLOAD ----------
 with tab2:
@@ -223,40 +108,40 @@ with tab2:
     st.markdown("📌 Required columns: `IR`, `PI`, `DD`, `TanDelta_20`, `TanDelta_100`, `Cap_TipUp`")
     
     file = st.file_uploader("Upload CSV", type="csv")
+    multicore = st.toggle("⚡ Multi-core processing", value=True, key="leap_multicore",
+                          help="Splits large files into row shards scored in parallel worker processes.")
+    last = current_manifest("LEAP", user_name)
+    reload_last = not file and last is not None and st.toggle(
+        f"📦 Open last dataset ({last['meta'].get('name', 'upload')}, {last['rows']} motors, saved {last['saved_at']})",
+        key="leap_reload")
+
+    output_df = None
     if file:
-        df = pd.read_csv(file)
-
-        # Strip and standardize column names
-        df.columns = [c.strip().replace(" ", "_") for c in df.columns]
-
-        # Handle duplicate columns safely
-        if df.columns.duplicated().any():
-            dup_cols = df.columns[df.columns.duplicated()].tolist()
-            st.warning(f"⚠️ Duplicate columns found and renamed: {dup_cols}")
-            df.columns = pd.io.parsers.ParserBase({'names': df.columns})._maybe_dedup_names(df.columns)
-
-        required = ['IR', 'PI', 'DD', 'TanDelta_20', 'TanDelta_100', 'Cap_TipUp']
-        if not all(col in df.columns for col in required):
-            missing = [col for col in required if col not in df.columns]
-            st.error(f"❌ Missing required columns: {missing}")
+        token = upload_token(file)
+        # Parsing and classification run once per upload, not on every widget click
+        output_df = recall("leap_output", token)
+        if output_df is None:
+            # ... and once per host: another server process may already have analyzed this file
+            output_df = load_result(result_key("LEAP", token))
+            if output_df is not None:
+                save_dataset("LEAP", output_df, token, {'name': file.name}, owner=user_name)
+                remember("leap_output", token, output_df)
+    if file and output_df is None:
+        # Only the LEAP inputs and identity columns are parsed; names are stripped and standardized
+        preview = st.empty()
+        live = LivePreview(preview, "Diagnosis", lambda sample: diagnose_frame(sample[LEAP_INPUTS])["Diagnosis"], file)
+        try:
+            with rerun.stage("parse"):
+                df, ignored = read_table(file, "LEAP", on_chunk=live)
+        except SchemaError as e:
+            preview.empty()
+            st.error(f"❌ {e}")
         else:
-            results = []
-            for _, row in df.iterrows():
-                r = classify_insulation_health(
-                    row['IR'], row['PI'], row['DD'],
-                    row['TanDelta_20'], row['TanDelta_100'],
-                    row['Cap_TipUp']
-                )
-                r_flat = {
-                    "Diagnosis": r["Diagnosis"],
-                    "Action": r["Action"],
-                    "Location": r["Location"],
-                    "Confidence (%)": r["Confidence (%)"],
-                    **r["Statuses"]
-                }
-                results.append(r_flat)
-
-            results_df = pd.DataFrame(results)
+            if ignored:
+                st.caption(f"Skipped {len(ignored)} column(s) the analyzer does not use: {', '.join(ignored)}")
+            with rerun.stage("analyze"):
+                results_df = run_sharded(diagnose_frame, df, LEAP_INPUTS, cpu_workers() if multicore else 1)
+            ROWS_PROCESSED.inc(len(df), analyzer="LEAP")
 
             # Ensure no duplicate columns when concatenating
             cols_to_avoid = set(df.columns)
@@ -265,83 +150,150 @@ with tab2:
             ]
 
             output_df = pd.concat([df.reset_index(drop=True), results_df.reset_index(drop=True)], axis=1)
+            save_dataset("LEAP", output_df, token, {'name': file.name}, owner=user_name)
+            remember("leap_output", token, output_df)
+            store_result(result_key("LEAP", token), "LEAP", output_df)
+            preview.empty()
+    elif reload_last:
+        output_df = load_dataset(last, "LEAP", user_name)
+        token = last['source']
+
+    if output_df is not None:
+        rerun.rendering()
+        maintenance_plan().update(fleet_rollups().ingest("LEAP", output_df, token))
+        drift_notice(fleet_drift().observe("LEAP", output_df, token))
+        st.success(f"✅ Processed {len(output_df)} motors.")
+        st.markdown("---")
+
+        leap_results(output_df, token)
+
+        st.header("📊 Visual Overview")
+        cols = st.columns(2)
+        with cols[0]:
+            st.subheader("Diagnosis Distribution")
 
-            st.success(f"✅ Processed {len(output_df)} motors.")
-            st.markdown("---")
-
-            st.header("🧰 Insulation Diagnosis with Degradation Location / Action Plan")
-            st.dataframe(output_df)
-
-            st.header("📊 Visual Overview")
-            cols = st.columns(2)
-            with cols[0]:
-                st.subheader("Diagnosis Distribution")
-
-                if "Diagnosis" in output_df.columns:
-                    diagnosis_counts = output_df["Diagnosis"].value_counts()
-                    total = diagnosis_counts.sum()
-                    percentages = (diagnosis_counts / total * 100).round(1)
-
-                    colors = sns.color_palette("Set2", len(diagnosis_counts))
-                    fig = plt.figure(figsize=(7, 5), constrained_layout=True)
-                    ax = fig.add_subplot()
-
-                    wedges, texts = ax.pie(
-                        diagnosis_counts,
-                        labels=None,
-                        colors=colors,
-                        startangle=140,
-                        wedgeprops=dict(width=0.4, edgecolor='w'),
-                        autopct=None
-                    )
-
-                    for i, p in enumerate(wedges):
-                        ang = (p.theta2 - p.theta1)/2. + p.theta1
-                        y = np.sin(np.deg2rad(ang))
-                        x = np.cos(np.deg2rad(ang))
-                        ha = {-1: "right", 1: "left"}[int(np.sign(x))]
-                        connectionstyle = f"angle,angleA=0,angleB={ang}"
-                        ax.annotate(f"{percentages[i]}%",
-                                    xy=(x, y),
-                                    xytext=(1.2*np.sign(x), 1.2*y),
-                                    horizontalalignment=ha,
-                                    fontsize=11,
-                                    bbox=dict(boxstyle="round,pad=0.2", fc="white", edgecolor="none"),
-                                    arrowprops=dict(arrowstyle="-", connectionstyle=connectionstyle, color=colors[i]))
-
-                    centre_circle = plt.Circle((0, 0), 0.60, fc='white')
-                    fig.gca().add_artist(centre_circle)
-                    ax.axis("equal")
-
-                    ax.legend(wedges, diagnosis_counts.index, title="Diagnosis", loc="center left", bbox_to_anchor=(1, 0.5))
-                    ax.set_title("Motor Health Diagnosis Summary", fontsize=14, weight='bold')
-                    st.pyplot(fig)
-
-            with cols[1]:
-                st.subheader("Health Classification")
-
-                leap_tests = ['IR_classified', 'PI_classified', 'DD_classified', 'TDt', 'CT']
-                leap_tests = [col for col in leap_tests if col in output_df.columns and output_df[col].dtype == 'object']
-
-                if leap_tests:
-                    summary_all = pd.DataFrame({
-                        'Good': (output_df[leap_tests] == 'Good').sum(),
-                        'Moderate': (output_df[leap_tests] == 'Moderate').sum(),
-                        'Poor': (output_df[leap_tests] == 'Poor').sum()
-                    })
-
-                    fig_all = plt.figure(figsize=(7, 5), constrained_layout=True)
-                    ax_all = fig_all.add_subplot()
-                    summary_all.plot(kind='bar', stacked=True, ax=ax_all, color=['green', 'orange', 'red'])
-
-                    ax_all.set_title("Health Classification by LEAP Test")
-                    ax_all.set_xlabel("LEAP Test")
-                    ax_all.set_ylabel("Count")
-                    ax_all.legend(title="Condition", bbox_to_anchor=(1.05, 1), loc='upper left')
-                    plt.xticks(rotation=45)
-                    st.pyplot(fig_all)
-
-
-            st.download_button("⬇️ Download Results CSV", data=output_df.to_csv(index=False).encode(),
-                               file_name="diagnostic_results.csv", mime="text/csv")
+            if "Diagnosis" in output_df.columns:
+                st.pyplot(diagnosis_donut(output_df["Diagnosis"].value_counts()))
 
+        with cols[1]:
+            st.subheader("Health Classification")
+
+            leap_tests = ['IR_classified', 'PI_classified', 'DD_classified', 'TDt', 'CT']
+            leap_tests = [col for col in leap_tests if col in output_df.columns and not pd.api.types.is_numeric_dtype(output_df[col])]
+
+            if leap_tests:
+                summary_all = pd.DataFrame({
+                    'Good': (output_df[leap_tests] == 'Good').sum(),
+                    'Moderate': (output_df[leap_tests] == 'Moderate').sum(),
+                    'Poor': (output_df[leap_tests] == 'Poor').sum()
+                })
+
+                st.pyplot(classification_bars(summary_all))
+
+
+        st.download_button("⬇️ Download Results CSV", data=lambda: output_df.to_csv(index=False).encode(),
+                           file_name="diagnostic_results.csv", mime="text/csv")
+
+# ---------- RAW TESTER LOGS ----------
+with tab3:
+    st.subheader("〰️ Tan δ Voltage-Step Sweeps")
+    st.markdown("📌 One row per voltage step: `Test_ID` (or `Motor_ID`), `Voltage_pct` (20 … 100 % U₀), "
+                "`TanDelta`, `Capacitance`")
+    sweep_file = st.file_uploader("Upload sweep file (CSV)", type="csv", key="tandelta_sweeps")
+    fits = None
+    if sweep_file:
+        sweep_token = upload_token(sweep_file)
+        fits = recall("tandelta_fits", sweep_token)
+        if fits is None:
+            try:
+                with rerun.stage("fit"):
+                    fits = fit_sweeps(sweep_file)
+            except SchemaError as e:
+                st.error(f"❌ {e}")
+            else:
+                ROWS_PROCESSED.inc(len(fits), analyzer="TANDELTA")
+                remember("tandelta_fits", sweep_token, fits)
+    if fits is not None:
+        st.caption(f"Quadratic tan δ(U) and C(U) fits for {len(fits)} tests; Cap_TipUp is C(U₀) vs C(0.2 U₀) in %.")
+        st.dataframe(fits, hide_index=True)
+        d1, d2 = st.columns(2)
+        d1.download_button("⬇️ Download for LEAP / RUL", data=lambda: fits.to_csv(index=False).encode(),
+                           file_name="tandelta_fits.csv", mime="text/csv")
+        d2.download_button("⬇️ Download for ENV", data=lambda: for_env(fits).to_csv(index=False).encode(),
+                           file_name="tandelta_fits_env.csv", mime="text/csv")
+
+    st.markdown("---")
+    st.subheader("📈 Compute IR, PI and DD from Raw Tester Logs")
+    st.markdown("📌 One row per sample: `Test_ID` (or `Motor_ID`), `Time_s`, `Voltage_V`, `Current_nA`; "
+                "optional `Phase` (`charge` / `discharge`, discharge time counted from its start) and `Capacitance_nF` for DD")
+
+    log_file = st.file_uploader("Upload tester log (CSV)", type="csv", key="megger_log")
+    tests = None
+    if log_file:
+        log_token = upload_token(log_file)
+        tests = recall("megger_tests", log_token)
+        if tests is None:
+            # Multi-gigabyte logs are reduced chunk by chunk; only per-test window sums are kept
+            note = st.empty()
+            try:
+                with rerun.stage("ingest"):
+                    tests = summarize_log(log_file, on_chunk=lambda n: note.caption(f"⏳ Read {n:,} samples..."))
+            except SchemaError as e:
+                st.error(f"❌ {e}")
+            else:
+                ROWS_PROCESSED.inc(int(tests['Samples'].sum()), analyzer="MEGGER")
+                remember("megger_tests", log_token, tests)
+            note.empty()
+
+    if tests is not None:
+        m = st.columns(3)
+        m[0].metric("Tests", len(tests))
+        m[1].metric("Shorter than 10 min (no PI)", int(tests['PI'].isna().sum()))
+        m[2].metric("No DD", int(tests['DD'].isna().sum()))
+        st.dataframe(tests, hide_index=True)
+
+        values_file = st.file_uploader(
+            "Other measurements per test (CSV with the same test key: `TanDelta_20`, `TanDelta_100`, `Cap_TipUp` "
+            "unless fitted from sweeps above; add `Test_Year` and `Manufacturing_Year` for Health Index and RUL)",
+            type="csv", key="megger_values")
+        measurements, sources = ([fits], ["Tan δ sweep fits"]) if fits is not None else ([], [])
+        if values_file:
+            measurements.append(read_measurements(values_file))
+            sources.append(values_file.name)
+        combined = None
+        if measurements:
+            try:
+                combined, matched = combine_values(tests, *measurements)
+            except SchemaError as e:
+                st.error(f"❌ {e}")
+            else:
+                for source, n in zip(sources, matched):
+                    if n < len(tests):
+                        st.warning(f"⚠️ {source} matched {n} of {len(tests)} tests on the test key; "
+                                   "the others get no values from it. Check the IDs are written the same way.")
+        if combined is not None:
+            # Short tests have no PI and most logs no DD: only tests with every input are diagnosed / scored
+            analyzed = []
+            if set(LEAP_INPUTS) <= set(combined.columns):
+                columns = ['Diagnosis', 'Action', 'Location', 'Confidence (%)']
+                combined[columns] = analyze_complete(combined, LEAP_INPUTS, diagnose_frame, columns, 'Diagnosis')
+                analyzed += LEAP_INPUTS
+            if set(RUL_INPUTS) <= set(combined.columns):
+                columns = ['Health_Index', 'Estimated_RUL', 'Condition']
+                combined[columns] = analyze_complete(combined, RUL_INPUTS, score_fleet, columns, 'Condition')
+                analyzed += RUL_INPUTS
+            if analyzed:
+                combined['Missing_Inputs'] = missing_inputs(combined, list(dict.fromkeys(analyzed)))
+                incomplete = int((combined['Missing_Inputs'] != "").sum())
+                if incomplete:
+                    st.warning(f"⚠️ {incomplete} of {len(combined)} tests lack an input; where it is needed, their "
+                               f"Diagnosis / Condition reads '{INSUFFICIENT}'. See Missing_Inputs.")
+            if 'Diagnosis' not in combined.columns:
+                st.info(f"Add {', '.join(c for c in LEAP_INPUTS if c not in combined.columns)} to diagnose these tests.")
+            st.dataframe(combined, hide_index=True)
+
+        out = combined if combined is not None else tests
+        st.download_button("⬇️ Download Computed Values", data=lambda: out.to_csv(index=False).encode(),
+                           file_name="tester_log_values.csv", mime="text/csv")
+
+rerun.finish()
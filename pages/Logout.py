@@ -1,50 +1,19 @@
 import streamlit as st
+import math
 import time
+from utils.session_memory import release_session
+from utils.layout import apply_style
 
 # --- Page Config ---
 st.set_page_config(page_title="Logging Out...", layout="centered")
 
 # --- Hide Sidebar ---
-st.markdown("""
-    <style>
-        [data-testid="stSidebar"] {
-            display: none;
-        }
-        .logout-box {
-            margin-top: 6rem;
-            text-align: center;
-            color: white;
-        }
-        .logout-title {
-            font-size: 2rem;
-            font-weight: bold;
-            color: #1abc9c;
-        }
-        .logout-sub {
-            font-size: 1rem;
-            color: #cccccc;
-            margin-top: 1rem;
-        }
-        .countdown {
-            font-size: 2.5rem;
-            font-weight: bold;
-            margin-top: 2rem;
-            color: #ff6b6b;
-            animation: pulse 1s ease-in-out infinite;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-        }
-        @keyframes pulse {
-            0% { transform: scale(1); opacity: 1; }
-            50% { transform: scale(1.1); opacity: 0.7; }
-            100% { transform: scale(1); opacity: 1; }
-        }
-    </style>
-""", unsafe_allow_html=True)
+apply_style(hide_sidebar=True)
 
-# --- Clear session ---
-st.session_state.clear()
+# --- Clear session (in memory and spilled to disk) ---
+if "logout_redirect_at" not in st.session_state:
+    release_session()
+    st.session_state["logout_redirect_at"] = time.time() + 3
 
 # --- Main Display ---
 st.markdown("""
@@ -54,12 +23,16 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# --- Countdown animation ---
-countdown_placeholder = st.empty()
 
-for i in range(3, 0, -1):
-    countdown_placeholder.markdown(f"<div class='countdown'>{i}</div>", unsafe_allow_html=True)
-    time.sleep(1)
+# --- Countdown: a short fragment rerun each second instead of a script thread sleeping ---
+@st.fragment(run_every=1)
+def countdown():
+    remaining = math.ceil(st.session_state["logout_redirect_at"] - time.time())
+    if remaining <= 0:
+        # --- Redirect to login page (main.py) ---
+        del st.session_state["logout_redirect_at"]
+        st.switch_page("main.py")
+    st.markdown(f"<div class='countdown'>{remaining}</div>", unsafe_allow_html=True)
+
 
-# --- Redirect to login page (main.py) ---
-st.switch_page("main.py")
+countdown()
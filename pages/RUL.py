@@ -1,18 +1,255 @@
 import streamlit as st
+import datetime as dt
+from functools import partial
 import pandas as pd
-import plotly.graph_objects as go
-import seaborn as sns
-import matplotlib.pyplot as plt
 from streamlit_extras.metric_cards import style_metric_cards
 import numpy as np
 import plotly.express as px
+from utils.grid import render_result_grid
+from utils.charts import health_index_bars, condition_donut, rul_scatter, score_heatmap
+from utils.figures import score_radar, health_gauge
+from utils.drilldown import motor_figures
+from utils.rul import score_fleet, score_ir, score_pi, score_dd, score_tdtu, score_captip, score_columns, CONDITIONS, SCORE_COLUMNS, DEFAULT_MOTOR_LIFE, RUL_INPUTS, estimated_rul
+from utils.sharding import run_sharded, cpu_workers
+from utils.fleet_cache import current_manifest, load_dataset, save_dataset
+from utils.uncertainty import monte_carlo_bands, MEASUREMENT_ERROR
+from utils.whatif import weight_grid, sweep
+from utils.fleet import upload_token, motor_keys
+from utils.rollups import fleet_rollups
+from utils.scheduler import maintenance_plan
+from utils.drift import fleet_drift, drift_notice
+from utils.session_memory import remember, recall
+from utils.result_cache import result_key, load_result, store_result
+from utils.schema import read_table, SchemaError
+from utils.preview import LivePreview
+from utils.survival import read_history, fit_weibull, save_model, load_model
+from utils.metrics import page_run, timed_fragment, ROWS_PROCESSED
+from utils.layout import apply_style, sidebar
+
+CONDITION_ICONS = {"Excellent": "🟢", "Good": "🟡", "Moderate": "🟠", "Critical": "🔴"}
+
+
+def show_health(hi, rul, condition, scores, figures, key):
+    radar, gauge = figures
+
+    st.markdown('<div class="metric-style">', unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Health Index", f"{hi:.2f}/10")
+    with col2:
+        st.metric("Est. RUL", f"{rul:.2f} yrs")
+    with col3:
+        st.metric("Condition", condition)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Score breakdown
+    st.subheader("📊 Score Breakdown")
+    st.bar_chart(pd.DataFrame.from_dict(scores, orient='index', columns=["Score"]))
+
+    # Side-by-side layout for radar and gauge charts
+    radar_col, gauge_col = st.columns(2)
+
+    with radar_col:
+        st.markdown("**🕸️ Score Distribution (Radar)**")
+        st.plotly_chart(radar, use_container_width=True, key=f"{key}_radar")
+
+    with gauge_col:
+        st.markdown("**🧠 Health Index Gauge**")
+        st.plotly_chart(gauge, use_container_width=True, key=f"{key}_gauge")
+
+
+@st.fragment
+@timed_fragment("RUL")
+def rul_results(df, token, motor_life):
+    """Grid controls and row selection rerun only the table and drill-down."""
+    st.header("💊 HT Motor Health and Remaining Useful Life")
+    motor = render_result_grid(df, "rul_grid", (token, motor_life), filter_cols=["Condition", "Department"],
+                               columns=['IR', 'PI', 'DD', 'TanDelta_TipUp', 'Cap_TipUp', 'Age', 'Health_Index', 'Estimated_RUL', 'Condition'],
+                               selectable=True)
+
+    st.subheader("🔎 Motor Drill-Down")
+    if motor is None:
+        st.caption("Select a row in the table above to inspect that motor.")
+    else:
+        scores = {
+            "IR": motor['Score_IR'], "PI": motor['Score_PI'], "DD": motor['Score_DD'],
+            "Tan Delta Tip-Up": motor['Score_TD_TU'], "Cap Tip-Up": motor['Score_Cap_TU']
+        }
+        st.markdown(f"**Motor row {motor.name}**")
+        figures = motor_figures(("rul_drilldown", token, motor_life), motor.name,
+                                lambda: (score_radar(scores), health_gauge(motor['Health_Index'])))
+        show_health(motor['Health_Index'], motor['Estimated_RUL'],
+                    f"{CONDITION_ICONS[motor['Condition']]} {motor['Condition']}", scores, figures, "drilldown")
+
+
+@st.fragment
+@timed_fragment("RUL")
+def uncertainty_panel(df, token, motor_life):
+    """Sampling settings and runs rerun only this panel."""
+    st.subheader("🎲 Measurement Uncertainty")
+    with st.expander("Monte Carlo Health Index / RUL bands", expanded=False):
+        st.caption("Perturbs each motor's IR, PI, DD, tan delta tip-up and cap tip-up with the "
+                   "measurement error below and reports percentile bands and Condition probabilities.")
+        ucols = st.columns(6)
+        n_samples = ucols[0].number_input("Samples / motor", 100, 5000, 1000, step=100)
+        errors = {}
+        for ucol, (col, (kind, sigma)) in zip(ucols[1:], MEASUREMENT_ERROR.items()):
+            unit = "σ (rel.)" if kind == 'relative' else "σ (abs.)"
+            errors[col] = (kind, ucol.number_input(f"{col} {unit}", 0.0, 1.0, sigma, step=0.01, format="%.2f"))
+
+        if st.button("Run Uncertainty Analysis"):
+            with st.spinner("Sampling..."):
+                bands = monte_carlo_bands(df, int(n_samples), errors, motor_life)
+            remember("rul_uncertainty", (token, n_samples, errors, motor_life), bands)
+
+        cached = recall("rul_uncertainty", (token, n_samples, errors, motor_life))
+        if cached is not None:
+            bands = pd.concat([df[['Health_Index', 'Estimated_RUL', 'Condition']], cached], axis=1)
+            p_point = bands[[f"P_{c}" for c in CONDITIONS]].to_numpy()[
+                np.arange(len(bands)), bands['Condition'].map(CONDITIONS.index).to_numpy()]
+            bands['Condition_Stability'] = p_point
+            unstable = int((p_point < 0.9).sum())
+            st.metric("Motors that may change Condition (stability < 90%)", unstable)
+            render_result_grid(bands, "rul_uncertainty_grid", (token, n_samples, str(errors), motor_life),
+                               filter_cols=["Condition"])
+            st.download_button("⬇️ Download Uncertainty Bands", data=lambda: bands.to_csv(index=False).encode(),
+                               file_name="motor_health_uncertainty.csv", mime="text/csv")
+
+
+@st.fragment
+@timed_fragment("RUL")
+def whatif_panel(df, token):
+    """Sweep form and heatmap options rerun only this panel."""
+    st.subheader("🧮 What-If Sweep")
+    with st.expander("Sweep motor life and Health Index weights across the fleet", expanded=False):
+        with st.form("whatif_form"):
+            wcols = st.columns(3)
+            life_range = wcols[0].slider("Motor life range (yrs)", 10, 150, (20, 100), step=5)
+            life_step = wcols[0].number_input("Life step (yrs)", 1, 50, 10)
+            base_weights = wcols[1].multiselect("IR / PI / DD weight", [0.5, 1, 1.5, 2, 3], default=[1])
+            td_weights = wcols[1].multiselect("TD Tip-Up weight", [0.5, 1, 1.5, 2, 3, 4], default=[1, 2, 3])
+            cap_weights = wcols[2].multiselect("Cap Tip-Up weight", [0.5, 1, 1.5, 2, 3, 4], default=[1, 2, 3])
+            rul_horizon = wcols[2].number_input("RUL horizon (yrs)", 1, 50, 5)
+            run_sweep = st.form_submit_button("Run Sweep")
+
+        if run_sweep and base_weights and td_weights and cap_weights:
+            lives = np.arange(life_range[0], life_range[1] + 1, life_step)
+            # Reuses the per-motor scores already on df; only HI weighting and the RUL term are recomputed
+            remember("rul_whatif", token, (rul_horizon, sweep(
+                df[SCORE_COLUMNS].to_numpy(), df['Age'].to_numpy(), lives,
+                weight_grid(base_weights, td_weights, cap_weights), rul_horizon)))
+
+        cached = recall("rul_whatif", token)
+        if cached:
+            horizon, surface = cached
+            base = st.selectbox("IR / PI / DD weight shown", sorted(surface['IR_PI_DD_Weight'].unique()))
+            surface = surface[surface['IR_PI_DD_Weight'] == base]
+
+            scol1, scol2 = st.columns(2)
+            with scol1:
+                st.markdown("**Motors in Critical**")
+                crit = surface.drop_duplicates(['TD_TipUp_Weight', 'Cap_TipUp_Weight']).pivot(
+                    index='TD_TipUp_Weight', columns='Cap_TipUp_Weight', values='Critical')
+                st.plotly_chart(px.imshow(crit, text_auto=True, color_continuous_scale="Reds",
+                                          labels=dict(x="Cap Tip-Up weight", y="TD Tip-Up weight", color="Critical")),
+                                use_container_width=True)
+            with scol2:
+                cap = st.selectbox("Cap Tip-Up weight shown", sorted(surface['Cap_TipUp_Weight'].unique()))
+                st.markdown(f"**Motors with RUL < {horizon} yrs**")
+                below = surface[surface['Cap_TipUp_Weight'] == cap].pivot(
+                    index='TD_TipUp_Weight', columns='Motor_Life', values='RUL_Below_Horizon')
+                st.plotly_chart(px.imshow(below, text_auto=True, color_continuous_scale="Oranges",
+                                          labels=dict(x="Motor life (yrs)", y="TD Tip-Up weight", color="Motors")),
+                                use_container_width=True)
+            st.dataframe(cached[1])
+
+
+@st.fragment
+@timed_fragment("RUL")
+def servicing_panel(df, token):
+    """Crew capacity edits replan only the departments that changed."""
+    st.subheader("🗓️ Servicing Plan")
+    with st.expander("Next servicing dates under each department's crew capacity", expanded=False):
+        st.caption("Motors are released on their due date (from Condition, LEAP action and RUL) and each "
+                   "department's crew services the highest-priority due motors first, up to its weekly capacity.")
+        plan = maintenance_plan()
+        crews = plan.crews()
+        edited = st.data_editor(crews, hide_index=True, disabled=['Plant', 'Department', 'Planned jobs'],
+                                column_config={'Motors per week': st.column_config.NumberColumn(min_value=1, step=1)},
+                                key="crew_capacity")
+        for row, old in zip(edited.itertuples(index=False), crews['Motors per week']):
+            if row[2] != old:
+                plan.set_capacity((row.Plant, row.Department), int(row[2]))
+
+        version = plan.current_version()
+        schedule = recall("rul_schedule", (token, version))
+        if schedule is None:
+            schedule = remember("rul_schedule", (token, version), plan.schedule(motor_keys(df, token)))
+        today = dt.date.today()
+        scols = st.columns(4)
+        scols[0].metric("Motors planned", len(schedule))
+        scols[1].metric("Overdue", int((schedule['Due_Date'] < today).sum()))
+        scols[2].metric("Serviced in the next 30 days",
+                        int((schedule['Next_Servicing_Date'] <= today + dt.timedelta(days=30)).sum()))
+        scols[3].metric("Serviced after due date", int((schedule['Next_Servicing_Date'] > schedule['Due_Date']).sum()),
+                        help="Raise the department's crew capacity to pull these forward")
+        render_result_grid(schedule, "rul_schedule_grid", (token, version), filter_cols=["Department", "Condition"])
+
+        st.markdown("**Next jobs across the fleet**")
+        st.dataframe(plan.upcoming(10), hide_index=True)
+
+
+@st.fragment
+@timed_fragment("RUL")
+def survival_panel(df, token):
+    """History uploads and refits rerun only this panel; scoring uses the saved fleet model."""
+    st.subheader("🧬 Fleet Survival Model")
+    model = load_model()
+    with st.expander("Fit lifetimes from fleet history", expanded=False):
+        st.markdown("📌 One row per motor: `Manufacturing_Year`, `End_Year` (failure, or last year in service), "
+                    "`Failed` (1 / 0), `Health_Index` (or the RUL input columns), optional `Department`")
+        history = st.file_uploader("Upload fleet history (CSV)", type="csv", key="survival_history")
+        if history and st.button("📐 Fit Weibull model"):
+            try:
+                model = fit_weibull(*read_history(history))
+            except SchemaError as e:
+                st.error(f"❌ {e}")
+            else:
+                save_model(model, history.name)
+                st.success(f"✅ Fitted on {model.stats['motors']} motors ({model.stats['failures']} failures) "
+                           f"in {model.stats['seconds']} s; new uploads are scored with it.")
+    if model is None:
+        st.info("No fleet survival model yet. Fit one from your failure history to estimate RUL from how "
+                "motors in this fleet actually fail.")
+        return
+
+    stats = model.stats
+    m = st.columns(4)
+    m[0].metric("Weibull shape k", f"{model.shape:.2f}",
+                help="Above 1: the failure rate rises with age (wear-out)")
+    m[1].metric("Characteristic life λ", f"{model.scale:.1f} yrs")
+    m[2].metric("Hazard per +1 HI", f"×{np.exp(model.beta_hi):.2f}")
+    m[3].metric("History", f"{stats.get('failures', 0)} / {stats.get('motors', 0)} failed")
+    st.caption(f"Fitted {stats.get('fitted_at', '')} from {stats.get('source') or 'history upload'}.")
+
+    version = (token, model.shape, model.scale, model.beta_hi, tuple(sorted(model.departments.items())))
+    scored = recall("rul_survival", version)
+    if scored is None:
+        scored = remember("rul_survival", version, model.score(df))
+    c1, c2 = st.columns([3, 7])
+    with c1:
+        st.markdown("**Department hazard ratios**")
+        st.dataframe(model.hazard_ratios(), hide_index=True)
+    with c2:
+        st.markdown("**Highest 1-year failure risk**")
+        id_cols = [col for col in ('Motor_ID', 'Department') if col in df.columns]
+        at_risk = pd.concat([df[id_cols + ['Age', 'Health_Index', 'Estimated_RUL']], scored], axis=1)
+        st.dataframe(at_risk.nlargest(10, 'Failure_Risk_1yr_%'), hide_index=True)
+    st.download_button("⬇️ Download Survival RUL", data=lambda: at_risk.to_csv(index=False).encode(),
+                       file_name="survival_rul.csv", mime="text/csv")
 
-# Scoring functions
-def score_ir(val): return 10 if val >= 1 else 8 if val >= 0.1 else 6 if val >= 0.05 else 2
-def score_pi(val): return 10 if val >= 2 else 8 if val >= 1.5 else 6 if val >= 1 else 2
-def score_dd(val): return 10 if val <= 1 else 8 if val <= 4 else 6 if val <= 10 else 2
-def score_tdtu(val): return 10 if val < abs(0.8) else 8 if val < abs(1.0) else 6 if val < abs(2.0) else 2
-def score_captip(val): return 10 if val < 5 else 8 if val < 10 else 6 if val < 15 else 2
 
 # Page setup
 st.set_page_config("HT Motor Health & RUL", layout="wide", page_icon="⚙️")
@@ -22,75 +259,14 @@ if not st.session_state.get("logged_in", False):
     if st.button("🔁 Go to Login"):
         st.switch_page("main.py")
     st.stop()
+rerun = page_run("RUL")
 
 # Simulate logged-in user (replace with session-based logic)
 user_name = st.session_state.get("user", "Guest")
 
-st.markdown("""
-    <style>
-    /* Hide default navigation links */
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-
-    /* Hide hamburger menu */
-    [data-testid="collapsedControl"] {
-        display: none;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# 🧑‍💼 SIDEBAR CONTENT
-with st.sidebar:
-    st.markdown(f"""
-        <div style='text-align: center; padding-top: 0.5px; padding-bottom: 0.5px;'>
-            <img src='https://cdn-icons-png.flaticon.com/512/9131/9131529.png' width='70' style='border-radius:50%; margin-bottom: 0.5px;'/>
-            <h4 style='margin: 0;'>Welcome,</h4>
-            <h3 style='margin: 0; color: #1abc9c;'>{user_name}</h3>
-        </div>
-    """, unsafe_allow_html=True)
-    # Navigation
-    st.markdown("---")
-    st.markdown("## Navigation")
-    st.page_link("pages/Home.py", label="🏠 Diagnostics Dashboard")
-    st.page_link("pages/RUL.py", label="📆 RUL & Health Estimation")
-    st.page_link("pages/LEAP.py", label="🧪 LEAP Test Analyzer")
-    st.page_link("pages/ENV.py", label="🏭 Environmental Damage Mapping")
-
-    st.markdown("<div style='height: 90px;'></div>", unsafe_allow_html=True)
-    st.markdown("---")
-
-    # 🔓 Logout
-    if st.button("🔓 Logout"):
-        st.switch_page("pages/Logout.py")   
-    
-    st.markdown("""
-        <div style='
-            color: #bbbbbb;
-            font-style: italic;
-            font-size: 0.9rem;
-        '>
-        Made by Srishti Ghosh
-        </div>
-    """, unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-.metric-style div {
-    background-color: #1e1e1e;
-    padding: 1.2rem;
-    border-radius: 15px;
-    text-align: center;
-    box-shadow: 0 4px 10px rgba(0, 0, 0, 0.05);
-    border: 1px solid #dce0e6;
-    color: #1e1e1e !important;
-}
-.metric-style span {
-    font-size: 1.4rem;
-    font-weight: bold;
-}
-</style>
-""", unsafe_allow_html=True)
+apply_style()
+sidebar(user_name)
+
 st.markdown("<h1 style='text-align:center; color:#4A90E2;'>⚙️ HT Motor Health & RUL Estimator</h1>", unsafe_allow_html=True)
 
 # Tabs for switching
@@ -137,183 +313,114 @@ with tab1:
             else:
                 condition = "🔴 Critical"
 
-            st.markdown('<div class="metric-style">', unsafe_allow_html=True)
-            col1, col2, col3 = st.columns(3)
-
-            with col1:
-                st.metric("Health Index", f"{hi:.2f}/10")
-            with col2:
-                st.metric("Est. RUL", f"{rul:.2f} yrs")
-            with col3:
-                st.metric("Condition", condition)
-
-            st.markdown('</div>', unsafe_allow_html=True)
-
-            # Score breakdown
             scores = {
                 "IR": s_ir, "PI": s_pi, "DD": s_dd,
                 "Tan Delta Tip-Up": s_td, "Cap Tip-Up": s_cap
             }
+            show_health(hi, rul, condition, scores, (score_radar(scores), health_gauge(hi)), "single")
 
-            st.subheader("📊 Score Breakdown")
-            st.bar_chart(pd.DataFrame.from_dict(scores, orient='index', columns=["Score"]))
-
-            # Side-by-side layout for radar and gauge charts
-            radar_col, gauge_col = st.columns(2)
-
-            with radar_col:
-                st.markdown("**🕸️ Score Distribution (Radar)**")
-                radar = go.Figure()
-                radar.add_trace(go.Scatterpolar(
-                    r=list(scores.values()),
-                    theta=list(scores.keys()),
-                    fill='toself',
-                    line=dict(color='royalblue')
-                ))
-                radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 10])), showlegend=False)
-                st.plotly_chart(radar, use_container_width=True)
-
-            with gauge_col:
-                st.markdown("**🧠 Health Index Gauge**")
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=hi,
-                    title={'text': "Health Index"},
-                    gauge={
-                        'axis': {'range': [0, 10]},
-                        'bar': {'color': "darkblue"},
-                        'steps': [
-                            {'range': [0, 4], 'color': "red"},
-                            {'range': [4, 6], 'color': "orange"},
-                            {'range': [6, 8], 'color': "yellow"},
-                            {'range': [8, 10], 'color': "green"},
-                        ]
-                    }
-                ))
-                st.plotly_chart(fig, use_container_width=True)
-                
 
 # -------------------- BULK UPLOAD TAB -------------------- #
 with tab2:
     st.subheader("📥 Upload CSV with LEAP+ Test Data")
     st.markdown("📌 Required columns: `IR`, `PI`, `DD`, `TanDelta_20`, `TanDelta_100`, `Cap_TipUp`, `Test_Year`, `Manufacturing_Year`")
     uploaded = st.file_uploader("Upload CSV file", type=["csv"])
-
+    motor_life = st.number_input("❤️ Average Motor Life (yrs)", 1.0, 200.0, float(DEFAULT_MOTOR_LIFE))
+    multicore = st.toggle("⚡ Multi-core processing", value=True, key="rul_multicore",
+                          help="Splits large files into row shards scored in parallel worker processes.")
+    last = current_manifest("RUL", user_name)
+    reload_last = not uploaded and last is not None and st.toggle(
+        f"📦 Open last dataset ({last['meta'].get('name', 'upload')}, {last['rows']} motors, saved {last['saved_at']})",
+        key="rul_reload")
+
+    df = None
     if uploaded:
-        df = pd.read_csv(uploaded)
-        df.columns = [c.strip().replace(" ", "_") for c in df.columns]
-
-        required = ['IR', 'PI', 'DD', 'TanDelta_20', 'TanDelta_100', 'Cap_TipUp', 'Test_Year', 'Manufacturing_Year']
-        if not all(col in df.columns for col in required):
-            st.error("❌ Missing required columns: " + ", ".join(required))
+        token = upload_token(uploaded)
+        # Parsing and scoring run once per upload; a new motor life only recomputes the RUL term
+        df = recall("rul_scored", token)
+        if df is None:
+            # Scored by another server process on this host
+            df = load_result(result_key("RUL", token))
+            if df is not None:
+                save_dataset("RUL", df, token, {'name': uploaded.name}, owner=user_name)
+                remember("rul_scored", token, df)
+        if df is not None:
+            df['Estimated_RUL'] = estimated_rul(df['Health_Index'], df['Age'], motor_life)
+    if uploaded and df is None:
+        preview = st.empty()
+        live = LivePreview(preview, "Condition", lambda sample: score_fleet(sample, motor_life)['Condition'], uploaded)
+        try:
+            with rerun.stage("parse"):
+                df, ignored = read_table(uploaded, "RUL", on_chunk=live)
+        except SchemaError as e:
+            preview.empty()
+            st.error(f"❌ {e}")
+            df = None
         else:
-            df["TanDelta_TipUp"] = df["TanDelta_100"] - df["TanDelta_20"]
-            df["Age"] = df["Test_Year"] - df["Manufacturing_Year"]
-            df['Score_IR'] = df['IR'].apply(score_ir)
-            df['Score_PI'] = df['PI'].apply(score_pi)
-            df['Score_DD'] = df['DD'].apply(score_dd)
-            df['Score_TD_TU'] = df['TanDelta_TipUp'].apply(score_tdtu)
-            df['Score_Cap_TU'] = df['Cap_TipUp'].apply(score_captip)
-
-            df['Health_Index'] = (
-                df['Score_IR'] + df['Score_PI'] + df['Score_DD'] +
-                df['Score_TD_TU'] * 2 + df['Score_Cap_TU'] * 2
-            ) / 7
-
-            df['Estimated_RUL'] = (df['Health_Index'] / 10) * (100 - df['Age'])
-
-            def label(hi):
-                if hi >= 8: return "Excellent"
-                elif hi >= 6: return "Good"
-                elif hi >= 4: return "Moderate"
-                else: return "Critical"
-            df['Condition'] = df['Health_Index'].apply(label)
-
-            st.success(f"✅ Processed {len(df)} motors.")
-            st.markdown("---")
-            st.header("💊 HT Motor Health and Remaining Useful Life")
-            st.dataframe(df[['IR', 'PI', 'DD', 'TanDelta_TipUp', 'Cap_TipUp', 'Age', 'Health_Index', 'Estimated_RUL', 'Condition']])
-
-            # Charts
-            st.subheader("📊 Visual Overview")
-
-            # Prepare histogram-like data
-            hi_counts = df['Health_Index'].round(1).value_counts().sort_index()
-            hi_df = pd.DataFrame({'Health_Index': hi_counts.index, 'Count': hi_counts.values})
-
-            # 📊 Health Index Distribution
-            st.markdown("#### Health Index")
-
-            fig, ax = plt.subplots(figsize=(10, 5))
-            sns.barplot(data=hi_df, x='Health_Index', y='Count', palette='viridis', ax=ax)
-            ax.set_xlabel('Health Index (rounded)')
-            ax.set_ylabel('Motor Count')
-            sns.despine()
-            st.pyplot(fig)
-
-            # 📊 Pie and Scatter in Columns
-            col1, col2 = st.columns([4.6,5.4])
-
-            with col1:
-                st.markdown("#### Condition Breakdown")
-                condition_counts = df['Condition'].value_counts()
-                labels = condition_counts.index
-                sizes = condition_counts.values
-                colors = ["#2ecc71", "#f1c40f", "#e67e22", "#e74c3c"]  # Match original color scheme
-
-                fig, ax = plt.subplots(figsize=(5, 5))
-                wedges, texts, autotexts = ax.pie(
-                    sizes,
-                    labels=labels,
-                    colors=colors,
-                    autopct='%1.1f%%',
-                    startangle=140,
-                    pctdistance=0.85,
-                    wedgeprops=dict(width=0.4)
-                )
-
-                # Add center circle for donut style
-                centre_circle = plt.Circle((0, 0), 0.60, fc='white')
-                ax.add_artist(centre_circle)
-                ax.legend(title='Condition', bbox_to_anchor=(1.05, 1), loc='upper left')
-                ax.axis('equal')
-                st.pyplot(fig)
-
-            with col2:
-                st.markdown("#### RUL vs Age")
-                fig, ax = plt.subplots(figsize=(8, 5))
-                sns.scatterplot(
-                    data=df,
-                    x='Age',
-                    y='Estimated_RUL',
-                    hue='Condition',
-                    palette={
-                        "Excellent": "#2ecc71",
-                        "Good": "#f1c40f",
-                        "Moderate": "#e67e22",
-                        "Critical": "#e74c3c"
-                    },
-                    s=60,
-                    edgecolor='black',
-                    ax=ax
-                )
-                ax.set_xlabel('Motor Age (yrs)')
-                ax.set_ylabel('RUL (yrs)')
-                ax.legend(title='Condition', bbox_to_anchor=(1.05, 1), loc='upper left')
-                sns.despine()
-                plt.tight_layout()
-                st.pyplot(fig)
-
-            # Heatmap
-            st.subheader("🌡️ Health Score Heatmap")
-            try:
-                fig, ax = plt.subplots(figsize=(10, min(0.4 * len(df), 12)))
-                heat_data = df[['Score_IR', 'Score_PI', 'Score_DD', 'Score_TD_TU', 'Score_Cap_TU']]
-                sns.heatmap(heat_data, cmap="RdYlGn", annot=True, cbar=True, ax=ax)
-                st.pyplot(fig)
-            except:
-                st.warning("⚠️ Heatmap could not be rendered.")
-
-            # Download button
-            st.download_button("⬇️ Download Processed Data", data=df.to_csv(index=False).encode(),
-                               file_name="motor_health_results.csv", mime="text/csv")
+            if ignored:
+                st.caption(f"Skipped {len(ignored)} column(s) the analyzer does not use: {', '.join(ignored)}")
+            with rerun.stage("analyze"):
+                scored = run_sharded(partial(score_columns, motor_life=motor_life), df, RUL_INPUTS,
+                                     cpu_workers() if multicore else 1)
+            ROWS_PROCESSED.inc(len(df), analyzer="RUL")
+            df[scored.columns] = scored
+            save_dataset("RUL", df, token, {'name': uploaded.name}, owner=user_name)
+            remember("rul_scored", token, df)
+            store_result(result_key("RUL", token), "RUL", df)
+            preview.empty()
+    elif reload_last:
+        df = load_dataset(last, "RUL", user_name)
+        if df is not None:
+            # Only the linear RUL term depends on the motor life input
+            df['Estimated_RUL'] = estimated_rul(df['Health_Index'], df['Age'], motor_life)
+        token = last['source']
+
+    if df is not None:
+        rerun.rendering()
+        # Estimated_RUL depends on the motor life, so each motor life is its own batch
+        maintenance_plan().update(fleet_rollups().ingest("RUL", df, token, batch=f"{token}:life{motor_life}"))
+        drift_notice(fleet_drift().observe("RUL", df, token))
+        st.success(f"✅ Processed {len(df)} motors.")
+        st.markdown("---")
+        rul_results(df, token, motor_life)
+
+        uncertainty_panel(df, token, motor_life)
+        whatif_panel(df, token)
+        servicing_panel(df, token)
+        survival_panel(df, token)
+
+        # Charts
+        st.subheader("📊 Visual Overview")
+
+        # Prepare histogram-like data
+        hi_counts = df['Health_Index'].round(1).value_counts().sort_index()
+        hi_df = pd.DataFrame({'Health_Index': hi_counts.index, 'Count': hi_counts.values})
+
+        # 📊 Health Index Distribution
+        st.markdown("#### Health Index")
+
+        st.pyplot(health_index_bars(hi_df))
+
+        # 📊 Pie and Scatter in Columns
+        col1, col2 = st.columns([4.6,5.4])
+
+        with col1:
+            st.markdown("#### Condition Breakdown")
+            st.pyplot(condition_donut(df['Condition'].value_counts()))
+
+        with col2:
+            st.markdown("#### RUL vs Age")
+            st.pyplot(rul_scatter(df))
+
+        # Heatmap
+        st.subheader("🌡️ Health Score Heatmap")
+        try:
+            st.pyplot(score_heatmap(df[SCORE_COLUMNS]))
+        except:
+            st.warning("⚠️ Heatmap could not be rendered.")
+
+        # Download button
+        st.download_button("⬇️ Download Processed Data", data=lambda: df.to_csv(index=False).encode(),
+                           file_name="motor_health_results.csv", mime="text/csv")
+
+rerun.finish()
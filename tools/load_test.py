@@ -0,0 +1,267 @@
+"""Concurrent-session load test for the Streamlit app.
+
+Drives the real pages headlessly with Streamlit's AppTest: every simulated user
+logs in through main.py, opens the LEAP, RUL and ENV pages, uploads a synthetic
+file built from the bundled datasets and pages through the result grid. Each
+concurrency level reports p50/p95 rerun latency per page and stage, plus the
+server process memory. A second pass renders the bulk pages' charts from as
+many threads at once and reports figures per second, checking every image
+against a single-threaded render.
+
+    python tools/load_test.py --users 1 2 4 8 --rows 5000
+"""
+
+import argparse
+import hashlib
+import io
+import logging
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import utils.charts as charts  # noqa: E402
+import utils.drift  # noqa: E402
+import utils.env  # noqa: E402
+import utils.fleet_cache  # noqa: E402
+import utils.rollups  # noqa: E402
+import utils.scheduler  # noqa: E402
+import utils.session_memory  # noqa: E402
+import utils.survival  # noqa: E402
+from utils.env import clean_departments, label_departments, features  # noqa: E402
+from utils.leap import LEAP_INPUTS, diagnose_frame  # noqa: E402
+from utils.rul import SCORE_COLUMNS, score_fleet  # noqa: E402
+
+USERNAME, PASSWORD = "admin", "1234"
+
+# Page -> (script, bundled dataset used as the synthetic template, result grid key)
+PAGES = {
+    "LEAP": ("pages/LEAP.py", "LEAP CSV DataSet.csv", "leap_grid"),
+    "RUL": ("pages/RUL.py", "RUL CSV DataSet.csv", "rul_grid"),
+    "ENV": ("pages/ENV.py", "ENV CSV DataSet.csv", "env_grid"),
+}
+
+
+def synthetic_csv(template, rows, seed):
+    """Resample the bundled dataset to `rows` motors with ±5% noise on numeric readings."""
+    base = pd.read_csv(ROOT / template)
+    rng = np.random.default_rng(seed)
+    df = base.sample(rows, replace=True, random_state=seed).reset_index(drop=True)
+    for col in df.select_dtypes("float").columns:
+        df[col] = df[col] * rng.normal(1, 0.05, rows)
+    return df.to_csv(index=False).encode()
+
+
+def rss_mb():
+    """Current resident memory of this (server) process."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return float("nan")
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval, self.peak, self.running = interval, rss_mb(), True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, rss_mb())
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        return self.peak
+
+
+def timed(latencies, errors, key, action):
+    """Run one rerun, record its latency and whether the script (or the driver) raised."""
+    start = time.perf_counter()
+    try:
+        at = action()
+    except Exception as ex:
+        latencies[key].append(time.perf_counter() - start)
+        errors[key].append(f"{type(ex).__name__}: {ex}")
+        return None
+    latencies[key].append(time.perf_counter() - start)
+    if at.exception:
+        exc = at.exception[0]
+        errors[key].append(f"{exc.proto.type}: {exc.message}")
+    return at
+
+
+def simulate_user(files, timeout):
+    """One user session: login, then upload + page through every analyzer."""
+    latencies, errors = defaultdict(list), defaultdict(list)
+    at = AppTest.from_file(str(ROOT / "main.py"), default_timeout=timeout)
+    timed(latencies, errors, ("Login", "render"), at.run)
+    at.text_input[0].input(USERNAME)
+    at.text_input[1].input(PASSWORD)
+    timed(latencies, errors, ("Login", "submit"), at.button[0].click().run)
+
+    for page, (script, template, grid) in PAGES.items():
+        # A stage the driver cannot reach skips the rest of that page, not the whole session
+        if not timed(latencies, errors, (page, "open"), at.switch_page(script).run):
+            continue
+        if not timed(latencies, errors, (page, "upload"),
+                     lambda: at.file_uploader[0].upload(f"{page}.csv", files[page], "text/csv").run()):
+            continue
+        timed(latencies, errors, (page, "next page"),
+              lambda: at.number_input(key=f"{grid}_page").set_value(2).run())
+    return latencies, errors
+
+
+def run_level(n_users, files, timeout):
+    sampler = MemorySampler()
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_users) as pool:
+        results = list(pool.map(lambda _: simulate_user(files, timeout), range(n_users)))
+    elapsed = time.perf_counter() - start
+    peak = sampler.stop()
+
+    merged, failed = defaultdict(list), defaultdict(list)
+    for latencies, errors in results:
+        for key, values in latencies.items():
+            merged[key].extend(values)
+        for key, messages in errors.items():
+            failed[key].extend(messages)
+    return merged, failed, elapsed, peak
+
+
+def page_charts(files):
+    """The charts each bulk page draws for its synthetic upload, as (name, builder) pairs."""
+    leap = pd.read_csv(io.BytesIO(files["LEAP"]))
+    results = diagnose_frame(leap[LEAP_INPUTS])
+    results.columns = [f"{col}_classified" if col in leap.columns else col for col in results.columns]
+    leap = pd.concat([leap, results], axis=1)
+    statuses = ['IR_classified', 'PI_classified', 'DD_classified', 'TDt', 'CT']
+    summary = pd.DataFrame({level: (leap[statuses] == level).sum() for level in ['Good', 'Moderate', 'Poor']})
+
+    rul = score_fleet(pd.read_csv(io.BytesIO(files["RUL"])))
+    hi_counts = rul['Health_Index'].round(1).value_counts().sort_index()
+    hi_df = pd.DataFrame({'Health_Index': hi_counts.index, 'Count': hi_counts.values})
+
+    env, _ = label_departments(clean_departments(pd.read_csv(io.BytesIO(files["ENV"]))))
+    damage = env.groupby(['Department', 'Predicted_Damage'], observed=True).size().unstack().fillna(0)
+
+    return [
+        ("LEAP diagnosis", lambda: charts.diagnosis_donut(leap["Diagnosis"].value_counts())),
+        ("LEAP classification", lambda: charts.classification_bars(summary)),
+        ("RUL health index", lambda: charts.health_index_bars(hi_df)),
+        ("RUL condition", lambda: charts.condition_donut(rul['Condition'].value_counts())),
+        ("RUL scatter", lambda: charts.rul_scatter(rul)),
+        ("RUL heatmap", lambda: charts.score_heatmap(rul[SCORE_COLUMNS])),
+        ("ENV damage", lambda: charts.damage_bars(damage)),
+        ("ENV features", lambda: charts.feature_heatmap(
+            env.groupby('Predicted_Damage', observed=True)[features].mean())),
+    ]
+
+
+def render(build):
+    """Draw a chart the way st.pyplot does and return a digest of the image."""
+    buf = io.BytesIO()
+    build().savefig(buf, format="png", bbox_inches="tight", dpi=200)
+    return hashlib.sha1(buf.getvalue()).hexdigest()
+
+
+def render_level(n_threads, chart_list, reference, rounds):
+    """Every thread renders every chart `rounds` times; returns (figures/s, images differing from reference)."""
+    def worker(_):
+        return [(name, render(build)) for _ in range(rounds) for name, build in chart_list]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_threads) as pool:
+        results = [item for batch in pool.map(worker, range(n_threads)) for item in batch]
+    elapsed = time.perf_counter() - start
+    return len(results) / elapsed, sum(digest != reference[name] for name, digest in results)
+
+
+def percentile(values, p):
+    return float(np.percentile(values, p)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrency levels")
+    parser.add_argument("--rows", type=int, default=5000, help="motors per synthetic upload")
+    parser.add_argument("--timeout", type=float, default=300, help="per-rerun timeout (s)")
+    parser.add_argument("--render-rounds", type=int, default=2,
+                        help="times each thread renders every chart in the rendering pass (0 to skip)")
+    parser.add_argument("--csv", help="also write the per-stage results to this CSV file")
+    args = parser.parse_args()
+
+    # Script errors are counted per stage below; keep page tracebacks and warnings out of the report
+    for name in ("error_util", "deprecation_util", "runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(f"streamlit.{name}").disabled = True
+    warnings.filterwarnings("ignore")
+
+    # Keep caches, rollups, saved models and session spills of the test run out of the real app state
+    state = Path(tempfile.mkdtemp(prefix="ht_motor_loadtest_"))
+    utils.rollups.STATE_DIR = utils.scheduler.STATE_DIR = utils.drift.STATE_DIR = state / "fleet_state"
+    utils.survival.STATE_DIR = state / "fleet_state"
+    utils.fleet_cache.CACHE_DIR = state / "fleet_cache"
+    utils.env.MODEL_DIR = state / "env_models"
+    utils.session_memory.SPILL_DIR = state / "session_spill"
+
+    files = {page: synthetic_csv(template, args.rows, seed=i)
+             for i, (page, (_, template, _)) in enumerate(PAGES.items())}
+    print(f"Synthetic uploads: {args.rows} motors each; state in {state}")
+
+    rows = []
+    for n_users in args.users:
+        baseline = rss_mb()
+        merged, failed, elapsed, peak = run_level(n_users, files, args.timeout)
+        reruns = sum(len(v) for v in merged.values())
+        print(f"\n== {n_users} concurrent user(s): {reruns} reruns in {elapsed:.1f}s "
+              f"({reruns / elapsed:.1f} reruns/s), RSS {baseline:.0f} -> peak {peak:.0f} MB")
+        print(f"{'page':<6}{'stage':<11}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'errors':>8}")
+        for (page, stage), values in merged.items():
+            p50, p95 = percentile(values, 50), percentile(values, 95)
+            n_errors = len(failed.get((page, stage), []))
+            print(f"{page:<6}{stage:<11}{len(values):>5}{p50:>10.0f}{p95:>10.0f}"
+                  f"{max(values) * 1000:>10.0f}{n_errors:>8}")
+            rows.append({'users': n_users, 'page': page, 'stage': stage, 'reruns': len(values),
+                         'p50_ms': p50, 'p95_ms': p95, 'mean_ms': statistics.mean(values) * 1000,
+                         'errors': n_errors, 'peak_rss_mb': peak, 'elapsed_s': elapsed})
+        for (page, stage), messages in failed.items():
+            print(f"  ! {page} {stage}: {messages[0]} ({len(messages)}x)")
+
+    if args.render_rounds:
+        chart_list = page_charts(files)
+        reference = {name: render(build) for name, build in chart_list}
+        print(f"\n== Chart rendering: {len(chart_list)} charts per round, {args.render_rounds} round(s) per thread")
+        print(f"{'threads':<9}{'figures/s':>10}{'corrupted':>11}")
+        for n_threads in args.users:
+            throughput, corrupted = render_level(n_threads, chart_list, reference, args.render_rounds)
+            print(f"{n_threads:<9}{throughput:>10.1f}{corrupted:>11}")
+            rows.append({'users': n_threads, 'page': "ALL", 'stage': "chart render",
+                         'figures_per_s': throughput, 'errors': corrupted})
+
+    if args.csv:
+        pd.DataFrame(rows).to_csv(args.csv, index=False)
+        print(f"\nWrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
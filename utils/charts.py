@@ -0,0 +1,133 @@
+# Matplotlib charts of the bulk LEAP / RUL / ENV results
+#
+# Streamlit runs every session's script in its own thread, and pyplot keeps one
+# global "current figure" per process. Every chart here is a standalone Figure
+# attached to its own Agg canvas and drawn only through its Axes, so concurrent
+# sessions never touch shared plotting state. Seaborn calls always get ax=.
+
+import numpy as np
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+
+CONDITION_PALETTE = {"Excellent": "#2ecc71", "Good": "#f1c40f", "Moderate": "#e67e22", "Critical": "#e74c3c"}
+
+
+def figure(figsize, **kwargs):
+    """A Figure with one Axes on a non-interactive canvas, never registered with pyplot."""
+    fig = Figure(figsize=figsize, **kwargs)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def _donut_hole(ax):
+    ax.add_artist(Circle((0, 0), 0.60, fc='white'))
+
+
+# ---------- LEAP ----------
+def diagnosis_donut(diagnosis_counts):
+    percentages = (diagnosis_counts / diagnosis_counts.sum() * 100).round(1)
+    colors = sns.color_palette("Set2", len(diagnosis_counts))
+    fig, ax = figure((7, 5), constrained_layout=True)
+
+    wedges, texts = ax.pie(
+        diagnosis_counts,
+        labels=None,
+        colors=colors,
+        startangle=140,
+        wedgeprops=dict(width=0.4, edgecolor='w'),
+        autopct=None
+    )
+
+    for i, p in enumerate(wedges):
+        ang = (p.theta2 - p.theta1)/2. + p.theta1
+        y = np.sin(np.deg2rad(ang))
+        x = np.cos(np.deg2rad(ang))
+        ha = {-1: "right", 1: "left"}[int(np.sign(x)) or 1]
+        connectionstyle = f"angle,angleA=0,angleB={ang}"
+        ax.annotate(f"{percentages.iloc[i]}%",
+                    xy=(x, y),
+                    xytext=(1.2*np.sign(x), 1.2*y),
+                    horizontalalignment=ha,
+                    fontsize=11,
+                    bbox=dict(boxstyle="round,pad=0.2", fc="white", edgecolor="none"),
+                    arrowprops=dict(arrowstyle="-", connectionstyle=connectionstyle, color=colors[i]))
+
+    _donut_hole(ax)
+    ax.axis("equal")
+    ax.legend(wedges, diagnosis_counts.index, title="Diagnosis", loc="center left", bbox_to_anchor=(1, 0.5))
+    ax.set_title("Motor Health Diagnosis Summary", fontsize=14, weight='bold')
+    return fig
+
+
+def classification_bars(summary):
+    fig, ax = figure((7, 5), constrained_layout=True)
+    summary.plot(kind='bar', stacked=True, ax=ax, color=['green', 'orange', 'red'])
+    ax.set_title("Health Classification by LEAP Test")
+    ax.set_xlabel("LEAP Test")
+    ax.set_ylabel("Count")
+    ax.legend(title="Condition", bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
+
+
+# ---------- RUL ----------
+def health_index_bars(hi_df):
+    fig, ax = figure((10, 5))
+    sns.barplot(data=hi_df, x='Health_Index', y='Count', hue='Health_Index', palette='viridis', legend=False, ax=ax)
+    ax.set_xlabel('Health Index (rounded)')
+    ax.set_ylabel('Motor Count')
+    sns.despine(ax=ax)
+    return fig
+
+
+def condition_donut(condition_counts):
+    fig, ax = figure((5, 5))
+    ax.pie(
+        condition_counts.values,
+        labels=condition_counts.index,
+        colors=["#2ecc71", "#f1c40f", "#e67e22", "#e74c3c"],  # Match original color scheme
+        autopct='%1.1f%%',
+        startangle=140,
+        pctdistance=0.85,
+        wedgeprops=dict(width=0.4)
+    )
+    _donut_hole(ax)
+    ax.legend(title='Condition', bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.axis('equal')
+    return fig
+
+
+def rul_scatter(df):
+    fig, ax = figure((8, 5))
+    sns.scatterplot(data=df, x='Age', y='Estimated_RUL', hue='Condition', palette=CONDITION_PALETTE,
+                    s=60, edgecolor='black', ax=ax)
+    ax.set_xlabel('Motor Age (yrs)')
+    ax.set_ylabel('RUL (yrs)')
+    ax.legend(title='Condition', bbox_to_anchor=(1.05, 1), loc='upper left')
+    sns.despine(ax=ax)
+    fig.tight_layout()
+    return fig
+
+
+def score_heatmap(heat_data):
+    fig, ax = figure((10, min(0.4 * len(heat_data), 12)))
+    sns.heatmap(heat_data, cmap="RdYlGn", annot=True, cbar=True, ax=ax)
+    return fig
+
+
+# ---------- ENV ----------
+def damage_bars(damage_counts):
+    fig, ax = figure((10, 5))
+    damage_counts.plot(kind='bar', stacked=True, ax=ax, colormap='Set2')
+    ax.set_ylabel("Number of Motors")
+    ax.set_title("Total Damage Count by Department")
+    ax.set_xticklabels(damage_counts.index, rotation=45, ha='right')
+    return fig
+
+
+def feature_heatmap(mean_features):
+    fig, ax = figure((8, 4))
+    sns.heatmap(mean_features, annot=True, cmap='coolwarm', ax=ax)
+    return fig
@@ -0,0 +1,103 @@
+# Campaign-to-campaign comparison of bulk results, joined on Motor_ID
+#
+# The previous campaign's results are indexed by Motor_ID once (a hash table,
+# via pd.Index.get_indexer) and every current motor probes it. Motors whose
+# inputs are identical to last time keep their previous results; only new and
+# changed motors go through the analyzer again, which is valid because the
+# LEAP rules, RUL scoring and ENV scoring against saved models are all per-row.
+
+import numpy as np
+import pandas as pd
+from utils.env import ENV_INPUTS, clean_departments, score_departments
+from utils.fleet import MOTOR_ID
+from utils.leap import LEAP_INPUTS, diagnose_frame
+from utils.rul import RUL_INPUTS, score_fleet
+
+INPUTS = {"LEAP": LEAP_INPUTS, "RUL": RUL_INPUTS, "ENV": ENV_INPUTS}
+# Result whose transitions are reported for each analyzer
+COMPARED = {"LEAP": 'Diagnosis', "RUL": 'Condition', "ENV": 'Predicted_Damage'}
+DEFAULT_HI_DROP = 0.5
+
+
+def analyze(analyzer, df, models=None):
+    """Inputs + results for a parsed campaign frame, keeping df's row labels (ENV: models by department)."""
+    if analyzer == "LEAP":
+        results = diagnose_frame(df[LEAP_INPUTS])
+        results.index = df.index
+        results.columns = [col if col not in df.columns else f"{col}_classified" for col in results.columns]
+        return pd.concat([df, results], axis=1)
+    if analyzer == "RUL":
+        return score_fleet(df.copy())
+    labelled, _ = score_departments(clean_departments(df.copy()), models)
+    return labelled if labelled is not None else df.iloc[:0]
+
+
+def latest_per_motor(df):
+    """One row per Motor_ID (the last one, as a retest later in the file supersedes earlier rows)."""
+    return df[~df[MOTOR_ID].astype(str).duplicated(keep='last')]
+
+
+def hash_join(previous, current):
+    """Position of each current motor in `previous`, or -1 for motors new this campaign."""
+    return pd.Index(previous[MOTOR_ID].astype(str)).get_indexer(current[MOTOR_ID].astype(str))
+
+
+def same_inputs(analyzer, previous, current, positions):
+    """Matched motors whose analyzer inputs are exactly what they were last campaign."""
+    matched = positions >= 0
+    unchanged = np.ones(matched.sum(), dtype=bool)
+    for col in INPUTS[analyzer]:
+        before = pd.Series(previous[col].to_numpy()[positions[matched]])
+        after = pd.Series(current[col].to_numpy()[matched])
+        if col == 'Department':
+            before, after = before.astype(str), after.astype(str)
+        unchanged &= (before.eq(after) | (before.isna() & after.isna())).to_numpy()
+    same = matched.copy()
+    same[matched] = unchanged
+    return same
+
+
+def incremental(analyzer, previous, current, models=None):
+    """Results for `current`, reusing `previous` results for every motor whose inputs did not change.
+
+    `previous` is last campaign's analyzed frame, `current` this campaign's
+    parsed inputs (one row per Motor_ID). Returns (results, positions in
+    previous, reused mask), results in current's row order.
+    """
+    if analyzer == "ENV":
+        current = clean_departments(current.copy())
+    positions = hash_join(previous, current)
+    reuse = same_inputs(analyzer, previous, current, positions)
+    result_cols = [col for col in previous.columns if col not in current.columns]
+
+    reused = current[reuse].copy()
+    for col in result_cols:
+        reused[col] = previous[col].to_numpy()[positions[reuse]]
+    fresh = analyze(analyzer, current[~reuse], models)
+    combined = pd.concat([reused, fresh])
+    # ENV leaves out motors it cannot score; everything else comes back in upload order
+    combined = combined.loc[current.index.intersection(combined.index, sort=False)]
+    return combined, positions, reuse
+
+
+def transitions(analyzer, previous, current, hi_drop=DEFAULT_HI_DROP):
+    """Motors whose result changed between campaigns, plus (RUL) those whose Health Index fell by hi_drop or more."""
+    field = COMPARED[analyzer]
+    positions = hash_join(previous, current)
+    matched = positions >= 0
+    before = np.asarray(previous[field], dtype=object)[positions[matched]]
+    after = np.asarray(current[field], dtype=object)[matched]
+
+    report = pd.DataFrame({MOTOR_ID: current[MOTOR_ID].to_numpy()[matched]})
+    for col in ('Plant', 'Department'):
+        if col in current.columns:
+            report[col] = current[col].to_numpy()[matched]
+    report[f"Previous_{field}"], report[f"Current_{field}"] = before, after
+    changed = before != after
+    if analyzer == "RUL":
+        report['Previous_Health_Index'] = previous['Health_Index'].to_numpy()[positions[matched]]
+        report['Current_Health_Index'] = current['Health_Index'].to_numpy()[matched]
+        report['Health_Index_Delta'] = (report['Current_Health_Index'] - report['Previous_Health_Index']).round(3)
+        report['Worsened'] = report['Health_Index_Delta'] <= -hi_drop
+        changed |= report['Worsened'].to_numpy()
+    return report[changed].reset_index(drop=True)
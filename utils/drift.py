@@ -0,0 +1,268 @@
+# Streaming input statistics per feature and department, and drift against the bundled reference datasets
+#
+# The LEAP/RUL thresholds and ENV reference patterns were tuned on the bundled
+# "... CSV DataSet.csv" files. Every analyzed upload is folded into one-pass
+# statistics (count/mean/variance, a bounded quantile sketch and counts over the
+# reference's quintile bins) without keeping any rows, and each feature's
+# distribution is compared with the reference's: population stability index
+# (PSI) for the size of the shift and a two-sample chi-square test so small
+# batches are not flagged on noise alone.
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import chi2
+from utils.env import ENV_INPUTS
+from utils.fleet import plants, departments
+from utils.leap import LEAP_INPUTS
+from utils.rollups import STATE_DIR
+from utils.rul import RUL_INPUTS
+from utils.schema import read_table
+
+ROOT = Path(__file__).resolve().parent.parent
+REFERENCE_FILES = {a: ROOT / f"{a} CSV DataSet.csv" for a in ("LEAP", "RUL", "ENV")}
+
+# Test_Year always moves forward, so it is not compared
+FEATURES = {
+    "LEAP": LEAP_INPUTS,
+    "RUL": [col for col in RUL_INPUTS if col != 'Test_Year'],
+    "ENV": [col for col in ENV_INPUTS if col != 'Department'],
+}
+
+QUANTILES = [0.2, 0.4, 0.6, 0.8]  # reference bin edges
+SKETCH_SIZE = 128
+# PSI rule of thumb: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift
+PSI_WATCH, PSI_DRIFT = 0.1, 0.25
+P_WATCH, P_DRIFT = 0.05, 0.01
+MAX_BATCH_REPORTS = 256
+
+
+class QuantileSketch:
+    """Bounded-memory quantile summary (a simplified KLL sketch).
+
+    Each level holds at most SKETCH_SIZE values of weight 2**level; a full level
+    is sorted and every other value promoted, so n values take O(k log(n/k)) space
+    and rank error stays around 1/k.
+    """
+
+    def __init__(self, k=SKETCH_SIZE):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.flip = 0
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self.k:
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(self.levels[h])
+                keep, level = level[len(level) - len(level) % 2:], level[:len(level) - len(level) % 2]
+                # Alternate which half is promoted so the sketch is not biased either way
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], level[self.flip::2]])
+                self.levels[h] = keep
+                self.flip ^= 1
+            h += 1
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(len(qs), np.nan)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        cum = np.cumsum(weights[order])
+        ranks = np.searchsorted(cum, np.asarray(qs) * cum[-1], side='left')
+        return items[order][np.minimum(ranks, len(items) - 1)]
+
+
+class FeatureStats:
+    """One-pass count / mean / variance (Chan's parallel update), range, quantiles and reference-bin counts."""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        self.lo, self.hi = np.inf, -np.inf
+        self.bins = np.zeros(len(self.edges) + 1)
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        n = len(values)
+        if not n:
+            return self
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.lo, self.hi = min(self.lo, values.min()), max(self.hi, values.max())
+        self.bins += np.bincount(np.searchsorted(self.edges, values, side='right'), minlength=len(self.bins))
+        self.sketch.update(values)
+        return self
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+    def state(self):
+        return {'edges': self.edges.tolist(), 'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'lo': self.lo, 'hi': self.hi, 'bins': self.bins.tolist(),
+                'levels': [level.tolist() for level in self.sketch.levels], 'flip': self.sketch.flip}
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(state['edges'])
+        stats.count, stats.mean, stats.m2 = state['count'], state['mean'], state['m2']
+        stats.lo, stats.hi = state['lo'], state['hi']
+        stats.bins = np.asarray(state['bins'])
+        stats.sketch.levels = [np.asarray(level, dtype=float) for level in state['levels']]
+        stats.sketch.flip = state['flip']
+        return stats
+
+
+def compare(stats, reference):
+    """PSI, chi-square p-value, mean shift (in reference standard deviations) and a status."""
+    observed, expected = stats.bins + 0.5, reference.bins + 0.5
+    p, q = observed / observed.sum(), expected / expected.sum()
+    psi = float(((p - q) * np.log(p / q)).sum())
+    # Two-sample chi-square homogeneity test over the reference bins
+    table = np.vstack([stats.bins, reference.bins])
+    fitted = table.sum(axis=1, keepdims=True) * table.sum(axis=0) / table.sum()
+    used = fitted.sum(axis=0) > 0
+    statistic = (((table - fitted)[:, used]) ** 2 / fitted[:, used]).sum()
+    p_value = float(chi2.sf(statistic, max(used.sum() - 1, 1)))
+    shift = (stats.mean - reference.mean) / reference.std if reference.std else 0.0
+    if psi >= PSI_DRIFT and p_value < P_DRIFT:
+        status = "Drift"
+    elif psi >= PSI_WATCH and p_value < P_WATCH:
+        status = "Watch"
+    else:
+        status = "Stable"
+    return {'PSI': round(psi, 3), 'p_value': p_value, 'Mean_Shift_SD': round(float(shift), 2), 'Status': status}
+
+
+@st.cache_resource
+def reference_profiles():
+    """Statistics of every feature in the bundled datasets: {analyzer: {feature: FeatureStats}}."""
+    profiles = {}
+    for analyzer, path in REFERENCE_FILES.items():
+        with open(path, "rb") as f:
+            df, _ = read_table(f, analyzer)
+        profiles[analyzer] = {}
+        for col in FEATURES[analyzer]:
+            values = df[col].to_numpy(dtype=float)
+            values = values[np.isfinite(values)]
+            profiles[analyzer][col] = FeatureStats(np.unique(np.quantile(values, QUANTILES))).update(values)
+    return profiles
+
+
+def _rows(streams, references):
+    rows = []
+    for (analyzer, plant, dept, col), stats in streams:
+        reference = references[analyzer][col]
+        p5, p50, p95 = stats.sketch.quantiles([0.05, 0.5, 0.95])
+        rows.append({
+            'Analyzer': analyzer, 'Plant': plant, 'Department': dept, 'Feature': col, 'Samples': stats.count,
+            'Mean': round(stats.mean, 4), 'Std': round(stats.std, 4), 'P5': p5, 'Median': p50, 'P95': p95,
+            'Reference_Median': reference.sketch.quantiles([0.5])[0], **compare(stats, reference),
+        })
+    return pd.DataFrame(rows)
+
+
+class FleetDrift:
+    """Streaming statistics per (analyzer, plant, department, feature), shared by every session."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.streams = {}
+        self.ingested = set()
+        self.batches = OrderedDict()
+
+    def observe(self, analyzer, df, token, batch=None):
+        """Fold an upload's inputs into the department streams (once per batch).
+
+        Returns this upload's own comparison with the reference, one row per feature.
+        """
+        batch = str(token if batch is None else batch)
+        references = reference_profiles()
+        cols = [col for col in FEATURES[analyzer] if col in df.columns]
+        with self.lock:
+            if (analyzer, batch) not in self.ingested:
+                plant_col, dept_col = plants(df), departments(df)
+                groups = pd.Series(np.arange(len(df))).groupby([plant_col, dept_col]).indices
+                for (plant, dept), rows in groups.items():
+                    for col in cols:
+                        key = (analyzer, plant, dept, col)
+                        if key not in self.streams:
+                            self.streams[key] = FeatureStats(references[analyzer][col].edges)
+                        self.streams[key].update(df[col].to_numpy(dtype=float)[rows])
+                self.ingested.add((analyzer, batch))
+                self._save()
+            if (analyzer, batch) not in self.batches:
+                whole = [((analyzer, "", "", col), FeatureStats(references[analyzer][col].edges).update(
+                    df[col].to_numpy(dtype=float))) for col in cols]
+                self.batches[(analyzer, batch)] = _rows(whole, references).drop(columns=['Plant', 'Department'])
+                while len(self.batches) > MAX_BATCH_REPORTS:
+                    self.batches.popitem(last=False)
+            self.batches.move_to_end((analyzer, batch))
+            return self.batches[(analyzer, batch)]
+
+    def report(self, plant=None):
+        """Every department stream compared with its reference, most shifted first."""
+        with self.lock:
+            streams = [(key, stats) for key, stats in self.streams.items() if plant is None or key[1] == plant]
+            frame = _rows(streams, reference_profiles())
+        if frame.empty:
+            return frame
+        return frame.sort_values('PSI', ascending=False).reset_index(drop=True)
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({'streams': [[*key, stats.state()] for key, stats in self.streams.items()],
+                       'ingested': sorted(map(list, self.ingested))}, f)
+        os.replace(tmp, self.path)
+
+    @classmethod
+    def load(cls, path):
+        drift = cls(path)
+        if path.exists():
+            with open(path) as f:
+                state = json.load(f)
+            for *key, stats in state['streams']:
+                drift.streams[tuple(key)] = FeatureStats.from_state(stats)
+            drift.ingested = {tuple(item) for item in state['ingested']}
+        return drift
+
+
+@st.cache_resource
+def fleet_drift():
+    """Process-wide drift monitor."""
+    return FleetDrift.load(STATE_DIR / "drift.json")
+
+
+def drift_notice(batch_report):
+    """Warn when an upload's inputs differ from the data the analyzer was calibrated on."""
+    if batch_report.empty:
+        return
+    drifted = batch_report[batch_report['Status'] == "Drift"]
+    if drifted.empty:
+        return
+    features = ", ".join(f"{row.Feature} (PSI {row.PSI:.2f})" for row in drifted.itertuples())
+    st.warning(f"⚠️ Input drift vs the reference dataset in: {features}. "
+               "Thresholds and reference patterns may not apply to this batch as calibrated.")
+    with st.expander("Drift details"):
+        st.dataframe(batch_report, hide_index=True)
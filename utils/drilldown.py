@@ -0,0 +1,27 @@
+# Lazily built, per-motor figure cache for the bulk drill-down
+
+from collections import OrderedDict
+from utils.session_memory import remember, recall
+
+MAX_CACHED_MOTORS = 64
+
+
+def motor_figures(cache_name, motor_key, build):
+    """Return build()'s figures for one motor, building them only on first view.
+
+    Figures are kept per session in a small LRU keyed by `motor_key`, so moving
+    back and forth between motors never rebuilds a chart or touches the fleet.
+    `cache_name` is (name, *what the figures depend on*); a new upload replaces
+    the previous upload's cache instead of adding another one.
+    """
+    name = cache_name[0]
+    cache = recall(name, cache_name)
+    if cache is None:
+        cache = remember(name, cache_name, OrderedDict(), spill=False)
+    if motor_key in cache:
+        cache.move_to_end(motor_key)
+    else:
+        cache[motor_key] = build()
+        while len(cache) > MAX_CACHED_MOTORS:
+            cache.popitem(last=False)
+    return cache[motor_key]
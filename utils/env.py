@@ -0,0 +1,211 @@
+# Environmental damage clustering: per-department fitting, saved models and inference
+
+import json
+import re
+import time
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+import streamlit as st
+from sklearn.preprocessing import StandardScaler
+from sklearn.mixture import GaussianMixture
+from sklearn.metrics.pairwise import cosine_similarity
+from utils.metrics import GMM_FITS
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / ".env_models"
+# Key of the single model in a plant-wide model set
+PLANT_WIDE = "*"
+MIN_MOTORS = 3
+
+ENV_INPUTS = ['Department', 'IR', 'PI', 'DD', 'TD_0.2', 'TD_1.0', 'TD_TipUp', 'Cap_TipUp']
+features = ['IR', 'PI', 'DD', 'TD_TipUp', 'Cap_TipUp']
+
+# Reference patterns
+reference_patterns = {
+    'Normal':       np.array([0.9, 0.9, 0.1, 0.1, 0.1]),
+    'Moisture':     np.array([0.2, 0.2, 0.9, 0.8, 0.9]),
+    'Dust':         np.array([0.5, 0.5, 0.8, 0.5, 0.8]),
+    'Temperature':  np.array([0.6, 0.5, 0.5, 0.8, 0.6])
+}
+damage_types = list(reference_patterns.keys())
+ref_matrix = np.vstack(list(reference_patterns.values()))
+ref_scaled = StandardScaler().fit_transform(ref_matrix)
+
+
+def clean_departments(df):
+    df['Department'] = df['Department'].astype(str).apply(lambda x: re.sub(r'[^a-zA-Z0-9]', '', x))
+    return df
+
+
+def fit_department(sub_df):
+    """Fit scaler + GMM for one department and map each cluster to its closest reference pattern."""
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(sub_df[features])
+
+    lowest_bic = np.inf
+    best_n = 2
+    for n in range(2, min(len(sub_df), 5)):
+        gmm_try = GaussianMixture(n_components=n, random_state=42)
+        gmm_try.fit(X_scaled)
+        GMM_FITS.inc()
+        bic = gmm_try.bic(X_scaled)
+        if bic < lowest_bic:
+            best_n = n
+            lowest_bic = bic
+
+    gmm = GaussianMixture(n_components=best_n, random_state=42)
+    clusters = gmm.fit_predict(X_scaled)
+    GMM_FITS.inc()
+
+    cluster_means = sub_df.assign(Cluster=clusters).groupby('Cluster')[features].mean()
+    cluster_scaled = StandardScaler().fit_transform(cluster_means)
+
+    sim = cosine_similarity(cluster_scaled, ref_scaled)
+    model = {
+        'scaler': scaler,
+        'gmm': gmm,
+        'cluster_to_label': {c: damage_types[np.argmax(sim[i])] for i, c in enumerate(cluster_means.index)},
+        'cluster_confidence': {c: np.max(sim[i]) for i, c in enumerate(cluster_means.index)},
+    }
+    return model, clusters
+
+
+def apply_labels(sub_df, model, clusters, dept=None):
+    sub_df = sub_df.copy()
+    sub_df['Cluster'] = clusters
+    sub_df['Predicted_Damage'] = sub_df['Cluster'].map(model['cluster_to_label'])
+    sub_df['Confidence'] = sub_df['Cluster'].map(model['cluster_confidence'])
+    if dept is not None:
+        sub_df['Department'] = dept
+    return sub_df
+
+
+def label_departments(df):
+    """Cluster every department on its own. Returns (labelled frame or None, fitted models by department)."""
+    all_results, models = [], {}
+
+    for dept in df['Department'].unique():
+        sub_df = df[df['Department'] == dept].dropna(subset=features)
+        if len(sub_df) < MIN_MOTORS:
+            continue
+        models[dept], clusters = fit_department(sub_df)
+        all_results.append(apply_labels(sub_df, models[dept], clusters, dept))
+
+    return (pd.concat(all_results) if all_results else None), models
+
+
+def label_plant(df):
+    """Cluster the whole plant with one model; departments only group the labels afterwards.
+
+    Covers departments too small to cluster on their own. Returns (labelled frame or None, {PLANT_WIDE: model}).
+    """
+    sub_df = df.dropna(subset=features)
+    if len(sub_df) < MIN_MOTORS:
+        return None, {}
+    model, clusters = fit_department(sub_df)
+    return apply_labels(sub_df, model, clusters), {PLANT_WIDE: model}
+
+
+LABELLING = {"Per department": label_departments, "Plant-wide": label_plant}
+
+
+def compare_scopes(df):
+    """Fit both clustering scopes on the same motors.
+
+    Returns (per-scope fit time / models / coverage, labelled motors per
+    department under each scope, crosstab of labels on motors both scopes labelled).
+    """
+    labels, rows = {}, []
+    for scope, fit in LABELLING.items():
+        start = time.perf_counter()
+        labelled, models = fit(df)
+        elapsed = time.perf_counter() - start
+        labels[scope] = labelled['Predicted_Damage'] if labelled is not None else pd.Series(dtype=object)
+        rows.append({'Scope': scope, 'Fit time (s)': round(elapsed, 3), 'Models fitted': len(models),
+                     'Motors labelled': len(labels[scope]), 'Coverage (%)': round(100 * len(labels[scope]) / max(len(df), 1), 1)})
+    summary = pd.DataFrame(rows).set_index('Scope')
+
+    coverage = pd.DataFrame({'Motors': df['Department'].value_counts()})
+    for scope, labelled in labels.items():
+        coverage[scope] = df.loc[labelled.index, 'Department'].value_counts()
+    coverage = coverage.fillna(0).astype(int).sort_index()
+
+    both = labels["Per department"].index.intersection(labels["Plant-wide"].index)
+    agreement = pd.crosstab(labels["Per department"].loc[both].rename("Per department"),
+                            labels["Plant-wide"].loc[both].rename("Plant-wide"))
+    return summary, coverage, agreement
+
+
+def score_departments(df, models):
+    """Label motors with already fitted models: one transform + predict per department, no refit.
+
+    Returns (labelled frame or None, departments that have no saved model).
+    """
+    if PLANT_WIDE in models:
+        sub_df = df.dropna(subset=features)
+        if sub_df.empty:
+            return None, []
+        model = models[PLANT_WIDE]
+        return apply_labels(sub_df, model, model['gmm'].predict(model['scaler'].transform(sub_df[features]))), []
+
+    all_results, missing = [], []
+
+    for dept in df['Department'].unique():
+        sub_df = df[df['Department'] == dept].dropna(subset=features)
+        if dept not in models:
+            missing.append(dept)
+            continue
+        if sub_df.empty:
+            continue
+        model = models[dept]
+        clusters = model['gmm'].predict(model['scaler'].transform(sub_df[features]))
+        all_results.append(apply_labels(sub_df, model, clusters, dept))
+
+    return (pd.concat(all_results) if all_results else None), missing
+
+
+# ------------------------ Saved Models ------------------------
+def list_versions():
+    """Saved model sets, newest first."""
+    if not MODEL_DIR.exists():
+        return []
+    manifests = []
+    for folder in MODEL_DIR.iterdir():
+        try:
+            with open(folder / "manifest.json") as f:
+                manifests.append(json.load(f))
+        except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+            continue
+    return sorted(manifests, key=lambda m: m['version'], reverse=True)
+
+
+def save_models(models, source, user=None):
+    """Persist one fitted model per department as a new numbered version."""
+    versions = list_versions()
+    version = versions[0]['version'] + 1 if versions else 1
+    folder = MODEL_DIR / f"v{version:04d}"
+    tmp = MODEL_DIR / f".v{version:04d}.tmp"
+    tmp.mkdir(parents=True)
+    files = {}
+    for i, (dept, model) in enumerate(sorted(models.items())):
+        files[dept] = f"{i}.joblib"
+        joblib.dump(model, tmp / files[dept])
+    manifest = {'version': version, 'source': source, 'user': user, 'departments': files,
+                'saved_at': time.strftime("%Y-%m-%d %H:%M"), 'sklearn': sklearn.__version__}
+    with open(tmp / "manifest.json", "w") as f:
+        json.dump(manifest, f)
+    tmp.rename(folder)
+    return manifest
+
+
+def load_models(manifest):
+    folder = MODEL_DIR / f"v{manifest['version']:04d}"
+    return {dept: joblib.load(folder / name) for dept, name in manifest['departments'].items()}
+
+
+@st.cache_resource
+def saved_models(version):
+    """Saved model sets are immutable, so each version is loaded once per server process."""
+    return load_models(next(m for m in list_versions() if m['version'] == version))
@@ -0,0 +1,73 @@
+# Plotly figures shared by the single-motor forms and the bulk drill-down
+
+import plotly.graph_objects as go
+
+LEVEL_MAP = {"Poor": 0, "Moderate": 1, "Good": 2}
+
+
+def confidence_color(confidence):
+    return 'green' if confidence >= 80 else 'orange' if confidence >= 50 else 'red'
+
+
+def status_radar(statuses, color):
+    """Radar of the LEAP test levels (Poor / Moderate / Good)."""
+    radar_keys = ['IR', 'PI', 'DD', 'TDt', 'CT']
+    radar = go.Figure()
+    radar.add_trace(go.Scatterpolar(
+        r=[LEVEL_MAP[statuses[k]] for k in radar_keys],
+        theta=['IR', 'PI', 'DD', 'TD TipUp', 'Cap TipUp'],
+        fill='toself',
+        name="Health Levels",
+        line=dict(color=color)
+    ))
+    radar.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 2], tickvals=[0, 1, 2],
+                                   ticktext=["Poor", "Moderate", "Good"])),
+        showlegend=False
+    )
+    return radar
+
+
+def score_radar(scores):
+    """Radar of the RUL parameter scores (0-10)."""
+    radar = go.Figure()
+    radar.add_trace(go.Scatterpolar(
+        r=list(scores.values()),
+        theta=list(scores.keys()),
+        fill='toself',
+        line=dict(color='royalblue')
+    ))
+    radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 10])), showlegend=False)
+    return radar
+
+
+def health_gauge(hi):
+    return go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=hi,
+        title={'text': "Health Index"},
+        gauge={
+            'axis': {'range': [0, 10]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 4], 'color': "red"},
+                {'range': [4, 6], 'color': "orange"},
+                {'range': [6, 8], 'color': "yellow"},
+                {'range': [8, 10], 'color': "green"},
+            ]
+        }
+    ))
+
+
+def share_bars(estimates, title):
+    """Bar chart of estimated class shares with their confidence intervals as error bars."""
+    fig = go.Figure(go.Bar(
+        x=estimates['Label'],
+        y=estimates['Share (%)'],
+        error_y=dict(type='data', symmetric=False,
+                     array=estimates['High (%)'] - estimates['Share (%)'],
+                     arrayminus=estimates['Share (%)'] - estimates['Low (%)']),
+        marker_color='#4A90E2',
+    ))
+    fig.update_layout(title=title, yaxis_title="Motors (%)", xaxis_title=None)
+    return fig
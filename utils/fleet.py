@@ -0,0 +1,48 @@
+# Motor identity conventions shared by the fleet-level tools
+#
+# Uploads may carry optional `Motor_ID`, `Plant` and `Department` columns. Without
+# a Motor_ID, motors are identified by their row within the upload they came from.
+
+import hashlib
+import re
+import numpy as np
+import streamlit as st
+from utils.metrics import UPLOADS, UPLOAD_BYTES
+
+MOTOR_ID = 'Motor_ID'
+DEFAULT_PLANT = "Plant"
+UNASSIGNED = "Unassigned"
+
+
+def clean_department(name):
+    return re.sub(r'[^a-zA-Z0-9]', '', str(name))
+
+
+def upload_token(uploaded):
+    """Content hash of an uploaded file, computed once per upload and session."""
+    tokens = st.session_state.setdefault("upload_tokens", {})
+    if uploaded.file_id not in tokens:
+        content = uploaded.getvalue()
+        tokens[uploaded.file_id] = hashlib.sha256(content).hexdigest()[:16]
+        UPLOADS.inc()
+        UPLOAD_BYTES.inc(len(content))
+    return tokens[uploaded.file_id]
+
+
+def motor_keys(df, token):
+    """Motor_ID when present, otherwise upload token + row label (df.index)."""
+    if MOTOR_ID in df.columns:
+        return df[MOTOR_ID].astype(str).to_numpy()
+    return np.array([f"{token}:{i}" for i in df.index], dtype=object)
+
+
+def plants(df):
+    if 'Plant' in df.columns:
+        return df['Plant'].fillna(DEFAULT_PLANT).astype(str).to_numpy()
+    return np.full(len(df), DEFAULT_PLANT, dtype=object)
+
+
+def departments(df):
+    if 'Department' in df.columns:
+        return df['Department'].map(clean_department).replace("", UNASSIGNED).to_numpy()
+    return np.full(len(df), UNASSIGNED, dtype=object)
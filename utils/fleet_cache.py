@@ -0,0 +1,119 @@
+# Memory-mapped, columnar on-disk cache of the last dataset per analyzer
+#
+# Layout: .fleet_cache/<analyzer>/<version>/{manifest.json, <n>.npy, ...} plus
+# one CURRENT@<user> file per user naming that user's last dataset (CURRENT when
+# no user is given). Numeric columns are stored as raw .npy arrays and text
+# columns as integer codes + a category list, so a reload is a handful of
+# np.load(mmap_mode='r') calls: no parsing, and every server process that opens
+# the same version shares the OS page cache instead of its own copy.
+
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".fleet_cache"
+# A superseded version is kept this long, so readers that already hold its manifest can still open it
+RETAIN_SECONDS = 10 * 60
+
+
+def _pointer(root, owner):
+    return root / ("CURRENT" if owner is None else f"CURRENT@{re.sub(r'[^A-Za-z0-9_-]', '_', str(owner))}")
+
+
+def _live_versions(root):
+    live = set()
+    for pointer in root.glob("CURRENT*"):
+        try:
+            live.add(pointer.read_text().strip())
+        except OSError:
+            pass
+    return live
+
+
+def _write_column(path, series):
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        np.save(path, series.to_numpy())
+        return {'kind': 'numeric'}
+    codes, categories = pd.factorize(series, sort=True)
+    np.save(path, codes.astype(np.int32))
+    return {'kind': 'categorical', 'categories': [str(c) for c in categories]}
+
+
+def save_dataset(analyzer, df, source, meta=None, owner=None):
+    """Store df as `owner`'s current dataset for the analyzer; `source` identifies what produced it."""
+    root = CACHE_DIR / analyzer
+    current = current_manifest(analyzer, owner)
+    if current and current['source'] == source:
+        return current
+
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    target = root / version
+    target.mkdir(parents=True)
+    columns = []
+    for i, (name, series) in enumerate(df.items()):
+        entry = _write_column(target / f"{i}.npy", series)
+        columns.append({'name': str(name), 'file': f"{i}.npy", **entry})
+    manifest = {'version': version, 'source': source, 'rows': len(df), 'columns': columns,
+                'saved_at': time.strftime("%Y-%m-%d %H:%M"), 'meta': meta or {}}
+    with open(target / "manifest.json", "w") as f:
+        json.dump(manifest, f)
+
+    # Switch the owner's pointer atomically; the version it left starts its retention period now
+    tmp = root / f".pointer.{uuid.uuid4().hex[:8]}.tmp"
+    tmp.write_text(version)
+    os.replace(tmp, _pointer(root, owner))
+    if current:
+        try:
+            os.utime(root / current['version'])
+        except OSError:
+            pass
+    # Drop versions no user points at once readers have had time to finish with them
+    live, cutoff = _live_versions(root), time.time() - RETAIN_SECONDS
+    for old in root.iterdir():
+        try:
+            if old.is_dir() and old.name not in live and old.stat().st_mtime < cutoff:
+                shutil.rmtree(old, ignore_errors=True)
+        except OSError:
+            pass
+    return manifest
+
+
+def current_manifest(analyzer, owner=None):
+    root = CACHE_DIR / analyzer
+    try:
+        version = _pointer(root, owner).read_text().strip()
+        with open(root / version / "manifest.json") as f:
+            return json.load(f)
+    except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+        return None
+
+
+def load_dataset(manifest, analyzer, owner=None):
+    """Open a cached dataset; numeric columns stay memory-mapped and read-only.
+
+    If the version was removed in the meantime, `owner`'s current dataset is
+    opened instead and `manifest` is updated in place to describe it; None if
+    there is none.
+    """
+    folder = CACHE_DIR / analyzer / manifest['version']
+    data = {}
+    try:
+        for col in manifest['columns']:
+            values = np.load(folder / col['file'], mmap_mode='r')
+            if col['kind'] == 'categorical':
+                values = pd.Categorical.from_codes(values, categories=col['categories'])
+            data[col['name']] = values
+    except FileNotFoundError:
+        fresh = current_manifest(analyzer, owner)
+        if fresh is None or fresh['version'] == manifest['version']:
+            return None
+        manifest.clear()
+        manifest.update(fresh)
+        return load_dataset(manifest, analyzer, owner)
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,147 @@
+# Server-side paginated result grid for the bulk analysis tabs
+
+import math
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.session_memory import remember, recall, refresh
+
+PAGE_SIZES = [25, 50, 100, 250]
+ORIGINAL_ORDER = "(original order)"
+
+
+class ResultGrid:
+    """Keeps a result frame on the server and hands out one page of rows at a time.
+
+    Row positions for every value of a filter column are indexed once, and a sort
+    order is computed once per column, so filtering, sorting and paging only work
+    on position arrays. Only the requested page is ever sliced out of the frame.
+    """
+
+    def __init__(self, df, filter_cols=()):
+        self.df = df.reset_index(drop=True)
+        self.filter_cols = [c for c in filter_cols if c in self.df.columns]
+        self._indexes = {col: self._build_index(self.df[col]) for col in self.filter_cols}
+        self._sort_orders = {}
+        self._last_key = None
+        self._last_positions = None
+
+    @staticmethod
+    def _build_index(series):
+        codes, uniques = pd.factorize(series, sort=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def nbytes(self):
+        """Memory held by the indexes; the frame itself is shared with the caller."""
+        arrays = [a for index in self._indexes.values() for a in index.values()]
+        arrays += [a for orders in self._sort_orders.values() for a in orders]
+        return sum(a.nbytes for a in arrays)
+
+    def options(self, col):
+        return list(self._indexes[col])
+
+    def _sort_order(self, col, ascending=True):
+        # Stable both ways, so tied rows keep their original order whichever way the column is sorted
+        if (col, ascending) not in self._sort_orders:
+            values = self.df[col]
+            valid = values.notna().to_numpy()
+            ordered = values[valid].sort_values(ascending=ascending, kind="stable").index.to_numpy()
+            self._sort_orders[(col, ascending)] = (ordered, np.flatnonzero(~valid))
+        return self._sort_orders[(col, ascending)]
+
+    def select(self, filters=None, sort_by=None, ascending=True):
+        """Return the row positions matching `filters` ({col: [values]}), in sort order."""
+        filters = {col: tuple(vals) for col, vals in (filters or {}).items() if vals}
+        key = (tuple(sorted(filters.items())), sort_by, ascending)
+        if key == self._last_key:
+            return self._last_positions
+
+        mask = None
+        for col, vals in filters.items():
+            index = self._indexes[col]
+            hits = [index[v] for v in vals if v in index]
+            col_mask = np.zeros(len(self.df), dtype=bool)
+            if hits:
+                col_mask[np.concatenate(hits)] = True
+            mask = col_mask if mask is None else mask & col_mask
+
+        if sort_by:
+            ordered, missing = self._sort_order(sort_by, ascending)
+            positions = np.concatenate([ordered, missing])
+            if mask is not None:
+                positions = positions[mask[positions]]
+        else:
+            positions = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+
+        self._last_key, self._last_positions = key, positions
+        return positions
+
+    def page(self, positions, page, page_size, columns=None):
+        rows = positions[(page - 1) * page_size:page * page_size]
+        frame = self.df.iloc[rows]
+        return frame if columns is None else frame[columns]
+
+
+def render_result_grid(df, key, token, filter_cols=(), columns=None, selectable=False):
+    """Render `df` one page at a time.
+
+    The grid (and its indexes) is kept in session memory under `key` and rebuilt
+    only when `token` changes, e.g. when a different file is uploaded, or after
+    it was dropped to stay within the session's memory budget. With
+    `selectable`, a row can be picked on the page and the selected motor's full
+    row is returned (None until one is picked).
+    """
+    grid = recall(key, token)
+    if grid is None:
+        # Indexes are cheap to rebuild, so under memory pressure the grid is dropped rather than spilled
+        grid = remember(key, token, ResultGrid(df, filter_cols), spill=False)
+        if st.session_state.get(f"{key}_selection", (None,))[0] != token:
+            st.session_state.pop(f"{key}_motor", None)
+    columns = columns or list(grid.df.columns)
+
+    filter_widgets = st.columns(len(grid.filter_cols) + 2) if grid.filter_cols else st.columns(2)
+    filters = {}
+    for col, widget in zip(grid.filter_cols, filter_widgets):
+        filters[col] = widget.multiselect(f"Filter {col}", grid.options(col), key=f"{key}_filter_{col}")
+    sort_by = filter_widgets[-2].selectbox("Sort by", [ORIGINAL_ORDER] + columns, key=f"{key}_sort")
+    ascending = filter_widgets[-1].radio("Order", ["Ascending", "Descending"], horizontal=True,
+                                         key=f"{key}_order") == "Ascending"
+    sort_by = None if sort_by == ORIGINAL_ORDER else sort_by
+
+    positions = grid.select(filters, sort_by, ascending)
+    refresh(key)  # a first sort on a column adds its order to the indexes
+
+    # Jump back to the first page whenever the selection changes
+    selection = (token, str(filters), sort_by, ascending)
+    if st.session_state.get(f"{key}_selection") != selection:
+        st.session_state[f"{key}_selection"] = selection
+        st.session_state[f"{key}_page"] = 1
+
+    page_cols = st.columns([1, 1, 4])
+    page_size = page_cols[1].selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    n_pages = max(1, math.ceil(len(positions) / page_size))
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = n_pages
+    page = page_cols[0].number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+
+    start = (page - 1) * page_size
+    page_df = grid.page(positions, page, page_size, columns)
+    if not selectable:
+        st.dataframe(page_df)
+    else:
+        # Keyed by page so a fresh page never inherits another page's row selection
+        event = st.dataframe(page_df, on_select="rerun", selection_mode="single-row",
+                             key=f"{key}_table_{hash(selection)}_{page}_{page_size}")
+        if event.selection.rows:
+            st.session_state[f"{key}_motor"] = int(positions[start + event.selection.rows[0]])
+    st.caption(f"Rows {min(start + 1, len(positions))}–{min(start + page_size, len(positions))} "
+               f"of {len(positions)} (page {page} of {n_pages}, {len(grid)} motors in total)")
+
+    motor = st.session_state.get(f"{key}_motor")
+    return None if motor is None else grid.df.iloc[motor]
@@ -0,0 +1,78 @@
+# Shared page chrome (stylesheet, logo, sidebar) served from ./static instead of the internet
+#
+# Streamlit serves ./static at app/static/ (server.enableStaticServing in
+# .streamlit/config.toml). Every asset URL carries a hash of the file's
+# content, computed once per server process, so browsers and proxies can cache
+# the files indefinitely: an edited file gets a new URL. The stylesheet is
+# pulled in with an @import, so each rerun sends one short line instead of
+# the full CSS, and the browser fetches the file once.
+
+import hashlib
+from pathlib import Path
+import streamlit as st
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+STATIC_URL = "app/static"
+STYLESHEET = "app.css"
+# The company logo (the Tata logo the login page used to load from Wikimedia) goes in static/logo.png;
+# logo.svg is a neutral stand-in shown until it is supplied
+LOGOS = ("logo.png", "logo.svg")
+AVATAR = "avatar.svg"
+
+PAGES = [
+    ("pages/Home.py", "🏠 Diagnostics Dashboard"),
+    ("pages/RUL.py", "📆 RUL & Health Estimation"),
+    ("pages/LEAP.py", "🧪 LEAP Test Analyzer"),
+    ("pages/ENV.py", "🏭 Environmental Damage Mapping"),
+    ("pages/Compare.py", "🔀 Campaign Comparison"),
+]
+
+
+@st.cache_resource
+def _versions():
+    """Short content hash of every file in ./static, read once per process."""
+    return {path.relative_to(STATIC_DIR).as_posix(): hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+            for path in STATIC_DIR.rglob("*") if path.is_file()}
+
+
+def asset_url(name):
+    version = _versions().get(name)
+    return f"{STATIC_URL}/{name}?v={version}" if version else f"{STATIC_URL}/{name}"
+
+
+def logo_url():
+    versions = _versions()
+    return asset_url(next((name for name in LOGOS if name in versions), LOGOS[-1]))
+
+
+def apply_style(hide_sidebar=False):
+    """Load the shared stylesheet; the login and logout pages also hide the sidebar."""
+    rules = f'@import url("{asset_url(STYLESHEET)}");'
+    if hide_sidebar:
+        rules += ' [data-testid="stSidebar"] { display: none; }'
+    st.html(f"<style>{rules}</style>")
+
+
+def sidebar(user_name):
+    with st.sidebar:
+        st.markdown(f"""
+            <div class='sidebar-profile'>
+                <img src='{asset_url(AVATAR)}' width='70'/>
+                <h4>Welcome,</h4>
+                <h3>{user_name}</h3>
+            </div>
+        """, unsafe_allow_html=True)
+        # Navigation
+        st.markdown("---")
+        st.markdown("## Navigation")
+        for page, label in PAGES:
+            st.page_link(page, label=label)
+
+        st.markdown("<div class='sidebar-spacer'></div>", unsafe_allow_html=True)
+        st.markdown("---")
+
+        # 🔓 Logout
+        if st.button("🔓 Logout"):
+            st.switch_page("pages/Logout.py")
+
+        st.markdown("<div class='sidebar-footer'>Made by Srishti Ghosh</div>", unsafe_allow_html=True)
@@ -0,0 +1,123 @@
+# LEAP+ insulation diagnosis rules shared by the LEAP page and the fleet tools
+
+import numpy as np
+import pandas as pd
+
+LEAP_INPUTS = ['IR', 'PI', 'DD', 'TanDelta_20', 'TanDelta_100', 'Cap_TipUp']
+
+# Diagnosis Rules, checked in order. Predicates only use ==, != and &, so the same
+# rule works on one motor's statuses (str) and on a whole fleet's (object arrays).
+RULES = [
+    (lambda s: (s['IR'] == 'Good') & (s['PI'] == 'Good') & (s['DD'] == 'Good') & (s['TDt'] == 'Good') & (s['CT'] == 'Good'),
+     "Healthy insulation", "No action", "-"),
+    (lambda s: (s['IR'] == 'Poor') & (s['PI'] == 'Poor') & (s['DD'] == 'Poor'),
+     "Surface moisture and trapped aging", "Clean & dry, retest", "Stator surface / terminal box"),
+    (lambda s: (s['TDt'] == 'Poor') & (s['CT'] == 'Poor'),
+     "Voids + stress zones emerging", "Schedule partial reinsulation", "Interlayer insulation"),
+    (lambda s: (s['TDt'] == 'Poor') & (s['CT'] == 'Moderate'),
+     "Early partial discharge risk", "Monitor monthly", "End winding, stress zones"),
+    (lambda s: (s['TD20'] == 'High') & (s['TD100'] == 'High') & (s['CT'] == 'Good'),
+     "Uniform dielectric loss (contamination)", "Clean & dry", "Surface insulation"),
+    (lambda s: (s['TDt'] == 'Poor') & (s['CT'] == 'Good'),
+     "Voltage-sensitive dielectric aging", "Monitor trending", "Bulk insulation"),
+    (lambda s: (s['CT'] == 'Poor') & (s['TDt'] == 'Good'),
+     "Delamination or geometry deformation", "Inspect physical winding structure", "Slot insulation"),
+    (lambda s: (s['DD'] == 'Poor') & (s['TDt'] != 'Poor'),
+     "Embedded moisture", "Dry motor internally and retest", "Bulk winding insulation"),
+    (lambda s: (s['IR'] == 'Poor') & (s['DD'] == 'Good'),
+     "Surface leakage", "Drying & visual inspection", "Motor body / cable box"),
+    (lambda s: (s['IR'] == 'Moderate') & (s['PI'] == 'Moderate') & (s['DD'] == 'Moderate'),
+     "Aging trend beginning", "Retest in 3 months", "General insulation"),
+    (lambda s: (s['PI'] == 'Moderate') & (s['TD100'] == 'High'),
+     "Minor dielectric stress", "Trend analysis & monitoring", "End winding"),
+    (lambda s: (s['TDt'] == 'Moderate') & (s['CT'] == 'Good'),
+     "Early voltage tracking", "Flag for monitoring", "Corona-prone zones"),
+    (lambda s: (s['TD20'] == 'High') & (s['CT'] == 'Poor'),
+     "Capacitance shift with aging", "Plan full inspection", "Winding insulation"),
+    (lambda s: (s['IR'] == 'Moderate') & (s['TDt'] == 'Poor') & (s['CT'] == 'Poor'),
+     "Developing delamination under stress", "Offline LEAP+ recommended", "Slot region / taping"),
+    (lambda s: (s['PI'] == 'Poor') & (s['TD100'] == 'High'),
+     "Insulation wear with increased loss", "Drying + trending", "Mid-slot insulation"),
+]
+UNCLASSIFIED = ("Unclassified", "Full diagnostics required", "To be inspected")
+
+# How soon each action needs a crew: 0 = immediately, 1 = within weeks, 2 = routine follow-up
+ACTION_URGENCY = {
+    "Clean & dry, retest": 0, "Schedule partial reinsulation": 0, "Dry motor internally and retest": 0,
+    "Offline LEAP+ recommended": 0, "Full diagnostics required": 0,
+    "Monitor monthly": 1, "Clean & dry": 1, "Inspect physical winding structure": 1,
+    "Drying & visual inspection": 1, "Plan full inspection": 1, "Drying + trending": 1,
+    "Monitor trending": 2, "Retest in 3 months": 2, "Trend analysis & monitoring": 2, "Flag for monitoring": 2,
+}
+
+# Confidence Score
+WEIGHTS = {'IR': 1, 'PI': 1, 'DD': 1, 'TDt': 3, 'CT': 2}
+STATUS_MAP = {'Good': 2, 'Moderate': 1, 'Poor': 0}
+MAX_SCORE = sum(w * 2 for w in WEIGHTS.values())
+
+
+# ----------- Diagnostic Logic -----------
+def classify_insulation_health(ir, pi, dd, td_20, td_100, cap_tipup):
+    td_tipup = td_100 - td_20
+
+    def lvl(val, low, high): return 'Good' if val < low else 'Moderate' if val < high else 'Poor'
+
+    s = {
+        'IR': 'Good' if ir >= 0.1 else 'Moderate' if ir >= 0.05 else 'Poor',
+        'PI': 'Good' if pi >= 2 else 'Moderate' if pi >= 1.5 else 'Poor',
+        'DD': lvl(dd, 4, 10),
+        'TD20': 'Low' if td_20 < 0.01 else 'High',
+        'TD100': 'Low' if td_100 < 0.02 else 'High',
+        'TDt': lvl(abs(td_tipup), 0.8, 2.0),
+        'CT': lvl(cap_tipup, 0.005, 0.015),
+    }
+
+    diagnosis, action, location = next(
+        (outcome for rule, *outcome in RULES if rule(s)), UNCLASSIFIED)
+
+    statuses = {t: s[t] for t in WEIGHTS}
+    score = sum(WEIGHTS[t] * STATUS_MAP[statuses[t]] for t in statuses)
+    confidence = int(score / MAX_SCORE * 100)
+
+    return {
+        "Diagnosis": diagnosis,
+        "Action": action,
+        "Location": location,
+        "Confidence (%)": confidence,
+        "Statuses": statuses
+    }
+
+
+def diagnose_frame(df):
+    """Vectorized classify_insulation_health over a frame with the LEAP_INPUTS columns.
+
+    Returns the flattened per-motor results (Diagnosis, Action, Location,
+    Confidence (%), then the IR/PI/DD/TDt/CT statuses), identical to calling
+    the scalar function row by row.
+    """
+    ir, pi, dd, td_20, td_100, cap_tipup = (df[c].to_numpy(dtype=float) for c in LEAP_INPUTS)
+    td_tipup = td_100 - td_20
+
+    def lvl(val, low, high): return np.select([val < low, val < high], ['Good', 'Moderate'], 'Poor').astype(object)
+
+    s = {
+        'IR': np.select([ir >= 0.1, ir >= 0.05], ['Good', 'Moderate'], 'Poor').astype(object),
+        'PI': np.select([pi >= 2, pi >= 1.5], ['Good', 'Moderate'], 'Poor').astype(object),
+        'DD': lvl(dd, 4, 10),
+        'TD20': np.where(td_20 < 0.01, 'Low', 'High').astype(object),
+        'TD100': np.where(td_100 < 0.02, 'Low', 'High').astype(object),
+        'TDt': lvl(np.abs(td_tipup), 0.8, 2.0),
+        'CT': lvl(cap_tipup, 0.005, 0.015),
+    }
+
+    rule_index = np.select([np.asarray(rule(s), dtype=bool) for rule, *_ in RULES],
+                           np.arange(len(RULES)), len(RULES))
+    outcomes = np.array([outcome for _, *outcome in RULES] + [list(UNCLASSIFIED)], dtype=object)[rule_index]
+
+    score = sum(WEIGHTS[t] * np.select([s[t] == 'Good', s[t] == 'Moderate'], [2, 1], 0) for t in WEIGHTS)
+    confidence = (score / MAX_SCORE * 100).astype(np.int64)
+
+    result = {"Diagnosis": outcomes[:, 0], "Action": outcomes[:, 1], "Location": outcomes[:, 2],
+              "Confidence (%)": confidence}
+    result.update({t: s[t] for t in WEIGHTS})
+    return pd.DataFrame(result, index=df.index)
@@ -0,0 +1,175 @@
+# IR / PI / DD per test from raw insulation-tester logs, streamed in bounded memory
+#
+# A log has one row per sample: a test key (Test_ID, else Motor_ID), Time_s,
+# Voltage_V and Current_nA. Charging samples give the insulation resistance
+# (V / nA is GΩ directly); samples flagged Phase == "discharge" carry the
+# discharge current, with Time_s counted from the start of the discharge. The
+# file is read LOG_CHUNK_ROWS rows at a time and each chunk only adds its
+# samples inside the 1-min, 10-min and discharge windows to per-test sums, so
+# memory grows with the number of tests, never with the length of the log.
+
+import numpy as np
+import pandas as pd
+from utils.fleet import MOTOR_ID
+from utils.schema import SchemaError, normalize, read_header
+
+TEST_ID = 'Test_ID'
+LOG_COLUMNS = ['Time_s', 'Voltage_V', 'Current_nA']
+OPTIONAL_COLUMNS = ['Phase', 'Capacitance_nF', MOTOR_ID, 'Plant', 'Department']
+LOG_CHUNK_ROWS = 500_000
+# Readings are averaged over the last WINDOW_S seconds before each reading time
+WINDOW_S = 5.0
+WINDOWS = {'1min': 60.0, '10min': 600.0, 'discharge': 60.0}
+# Status of tests lacking an input, instead of a diagnosis the analyzers would base on NaN (read as the worst value)
+INSUFFICIENT = "Insufficient data"
+
+
+def _windows(time, discharge):
+    """Window number (index into WINDOWS) of each sample, or -1."""
+    names = list(WINDOWS)
+    conditions = []
+    for name, end in WINDOWS.items():
+        in_window = (time > end - WINDOW_S) & (time <= end)
+        conditions.append(in_window & (discharge if name == 'discharge' else ~discharge))
+    return np.select(conditions, np.arange(len(names)), -1)
+
+
+def _key_column(header):
+    if TEST_ID in header:
+        return TEST_ID
+    if MOTOR_ID in header:
+        return MOTOR_ID
+    raise SchemaError(f"Missing test identity: the log needs a {TEST_ID} or {MOTOR_ID} column")
+
+
+def summarize_log(file, on_chunk=None):
+    """One row per test: IR (1-min, GΩ), PI (10-min / 1-min), DD and the test voltage.
+
+    `on_chunk(rows read so far)` is called after every chunk, e.g. for a
+    progress note. PI is NaN for tests stopped before 10 minutes, DD for tests
+    without discharge samples or capacitance.
+    """
+    raw_names = {}
+    for raw in read_header(file):
+        raw_names.setdefault(normalize(raw), raw)
+    key = _key_column(raw_names)
+    missing = [col for col in LOG_COLUMNS if col not in raw_names]
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+    keep = [key] + LOG_COLUMNS + [col for col in OPTIONAL_COLUMNS if col in raw_names and col != key]
+    dtypes = {raw_names[col]: "float64" for col in LOG_COLUMNS + ['Capacitance_nF'] if col in raw_names}
+    dtypes.update({raw_names[col]: str for col in keep if raw_names[col] not in dtypes})
+
+    sums, attributes, counts, rows = None, None, None, 0
+    file.seek(0)
+    try:
+        for chunk in pd.read_csv(file, usecols=[raw_names[col] for col in keep], dtype=dtypes,
+                                 chunksize=LOG_CHUNK_ROWS):
+            chunk.columns = [normalize(c) for c in chunk.columns]
+            rows += len(chunk)
+            discharge = (chunk['Phase'].str.strip().str.lower() == "discharge").to_numpy() \
+                if 'Phase' in chunk.columns else np.zeros(len(chunk), dtype=bool)
+            window = _windows(chunk['Time_s'].to_numpy(), discharge)
+            inside = chunk.loc[window >= 0, [key, 'Voltage_V', 'Current_nA']].assign(Window=window[window >= 0])
+            inside['Current_nA'] = inside['Current_nA'].abs()
+            part = inside.groupby([key, 'Window']).agg(V=('Voltage_V', 'sum'), I=('Current_nA', 'sum'),
+                                                       n=('Voltage_V', 'size'))
+            sums = part if sums is None else sums.add(part, fill_value=0)
+            sizes = chunk.groupby(key).size()
+            counts = sizes if counts is None else counts.add(sizes, fill_value=0)
+
+            extra = [col for col in ('Capacitance_nF', MOTOR_ID, 'Plant', 'Department') if col in chunk.columns and col != key]
+            if extra:
+                first = chunk.groupby(key)[extra].first()
+                attributes = first if attributes is None else attributes.combine_first(first)
+            if on_chunk:
+                on_chunk(rows)
+    except ValueError as e:
+        raise SchemaError(f"Malformed log: {e}") from None
+    finally:
+        file.seek(0)
+
+    if sums is None or sums.empty:
+        raise SchemaError("No samples fall in the 1-minute reading window; check Time_s is in seconds from test start")
+    means = sums[['V', 'I']].div(sums['n'], axis=0).unstack('Window')
+    names = list(WINDOWS)
+    volts = {name: means.get(('V', i)) for i, name in enumerate(names)}
+    amps = {name: means.get(('I', i)) for i, name in enumerate(names)}
+    nan = pd.Series(np.nan, index=means.index)
+
+    tests = pd.DataFrame(index=means.index)
+    tests['Test_Voltage_V'] = volts['1min'] if volts['1min'] is not None else nan
+    ir_1 = tests['Test_Voltage_V'] / (amps['1min'] if amps['1min'] is not None else nan)
+    ir_10 = (volts['10min'] / amps['10min']) if volts['10min'] is not None else nan
+    tests['IR'] = ir_1.replace([np.inf, -np.inf], np.nan)
+    tests['PI'] = (ir_10 / ir_1).replace([np.inf, -np.inf], np.nan)
+    if attributes is not None:
+        tests = tests.join(attributes)
+    if 'Capacitance_nF' in tests.columns and amps['discharge'] is not None:
+        # DD = discharge current 1 min after discharge (mA) / (test voltage (V) x capacitance (F))
+        tests['DD'] = amps['discharge'] * 1e3 / (tests['Test_Voltage_V'] * tests['Capacitance_nF'])
+    else:
+        tests['DD'] = np.nan
+    # Every sample the log holds for the test, not only those inside the reading windows
+    tests['Samples'] = counts.reindex(tests.index).fillna(0).astype(int)
+    first = ['IR', 'PI', 'DD', 'Test_Voltage_V']
+    tests = tests[first + [c for c in tests.columns if c not in first]]
+    return tests.reset_index().round({'IR': 3, 'PI': 3, 'DD': 3, 'Test_Voltage_V': 1})
+
+
+def read_measurements(file):
+    """A per-test CSV with normalized names; identity columns are read as text, as in the log ("007" stays "007")."""
+    raw_names = {}
+    for raw in read_header(file):
+        raw_names.setdefault(normalize(raw), raw)
+    text = {raw_names[col]: str for col in (TEST_ID, MOTOR_ID, 'Plant', 'Department') if col in raw_names}
+    file.seek(0)
+    df = pd.read_csv(file, dtype=text)
+    file.seek(0)
+    df.columns = [normalize(c) for c in df.columns]
+    return df
+
+
+def combine_values(tests, *measurements):
+    """Join the computed IR / PI / DD onto frames of the tests' other measurements (tan delta, years).
+
+    Every frame is matched on the log's test key column. Where frames share a
+    column, the earlier one wins: values computed from raw data come first.
+    Returns (combined frame, number of tests each frame matched).
+    """
+    key = TEST_ID if TEST_ID in tests.columns else MOTOR_ID
+    identity = [c for c in (MOTOR_ID, 'Plant', 'Department') if c in tests.columns and c != key]
+    combined = tests[[key, 'IR', 'PI', 'DD'] + identity].assign(**{key: tests[key].astype(str)})
+    matched = []
+    for values in measurements:
+        if key not in values.columns:
+            raise SchemaError(f"Measurements need the log's {key} column to match tests")
+        values = values.drop(columns=[c for c in values.columns if c in combined.columns and c != key])
+        values = values.assign(**{key: values[key].astype(str)})
+        matched.append(int(combined[key].isin(values[key]).sum()))
+        combined = combined.merge(values, on=key, how='left')
+    return combined, matched
+
+
+def missing_inputs(frame, inputs):
+    """Comma-separated names of the inputs each row lacks ('' when it has them all)."""
+    gaps = frame[inputs].isna()
+    return gaps.dot(pd.Index(inputs) + ", ").str.rstrip(", ")
+
+
+def analyze_complete(frame, inputs, analyze, columns, status):
+    """`columns` of analyze(rows with every input present), in frame's row order.
+
+    Rows missing any input are not analyzed: their `status` column reads
+    INSUFFICIENT and the other columns stay NaN.
+    """
+    complete = frame[inputs].notna().all(axis=1).to_numpy()
+    if complete.any():
+        results = analyze(frame.loc[complete, inputs].copy())[columns]
+        results.index = frame.index[complete]
+        results = results.reindex(frame.index)
+    else:
+        results = pd.DataFrame(np.nan, index=frame.index, columns=columns)
+    results[status] = results[status].astype(object)
+    results.loc[~complete, status] = INSUFFICIENT
+    return results
@@ -0,0 +1,302 @@
+# Operational metrics in the Prometheus text format
+#
+# Counters, gauges and histograms live in one process-wide registry. Each
+# server process serves them on http://HT_METRICS_HOST:HT_METRICS_PORT/metrics
+# (127.0.0.1:9464 by default; set HT_METRICS_PORT=0 to turn the endpoint off)
+# and, with HT_METRICS_FILE set, also rewrites that file every
+# FILE_INTERVAL seconds for node_exporter's textfile collector. Replicas on one
+# host need distinct ports or files.
+
+import functools
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+METRICS_HOST = os.environ.get("HT_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("HT_METRICS_PORT", 9464))
+METRICS_FILE = os.environ.get("HT_METRICS_FILE")
+FILE_INTERVAL = 15
+# A session not seen for this long (closed tab, no logout) stops counting as active
+SESSION_IDLE = 30 * 60
+log = logging.getLogger(__name__)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; bulk analyses of large files run well past the usual 10 s top bucket
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_labels(self.labelnames, key, extra)} {_number(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0  # exported as 0 from startup, so rate() has a baseline
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down; with `read`, it is computed when scraped."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), read=None):
+        super().__init__(name, help, labelnames)
+        self.read = read
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.read is not None:
+            return [(self.name, (), (), self.read())]
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    out.append((f"{self.name}_bucket", key, (("le", _number(bound)),), cumulative))
+                out.append((f"{self.name}_sum", key, (), total))
+                out.append((f"{self.name}_count", key, (), cumulative))
+        return out
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class Sessions:
+    """Sessions seen within SESSION_IDLE seconds and not logged out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def touch(self, session_id):
+        with self._lock:
+            self._seen[session_id] = time.monotonic()
+
+    def end(self, session_id):
+        with self._lock:
+            self._seen.pop(session_id, None)
+
+    def active(self):
+        cutoff = time.monotonic() - SESSION_IDLE
+        with self._lock:
+            for session_id in [s for s, seen in self._seen.items() if seen < cutoff]:
+                del self._seen[session_id]
+            return len(self._seen)
+
+
+SESSIONS = Sessions()
+
+ROWS_PROCESSED = Counter("ht_rows_processed_total", "Motor rows run through an analyzer.", ["analyzer"])
+STAGE_SECONDS = Histogram("ht_stage_duration_seconds", "Time spent in one stage of a page rerun.", ["page", "stage"])
+RERUN_SECONDS = Histogram("ht_rerun_duration_seconds", "Full page rerun time, login check to last element.", ["page"])
+FRAGMENT_SECONDS = Histogram("ht_fragment_duration_seconds",
+                             "Fragment body run time, on full and fragment-only reruns.", ["page", "fragment"])
+GMM_FITS = Counter("ht_gmm_fits_total", "Gaussian mixture fits performed for ENV clustering.")
+CACHE_REQUESTS = Counter("ht_cache_requests_total", "Result lookups by cache and outcome.", ["cache", "result"])
+UPLOADS = Counter("ht_uploads_total", "Distinct files uploaded.")
+UPLOAD_BYTES = Counter("ht_upload_bytes_total", "Bytes of distinct files uploaded.")
+ACTIVE_SESSIONS = Gauge("ht_active_sessions", "Logged-in sessions active in this process.", read=SESSIONS.active)
+
+REGISTRY = [ROWS_PROCESSED, STAGE_SECONDS, RERUN_SECONDS, FRAGMENT_SECONDS, GMM_FITS, CACHE_REQUESTS, UPLOADS, UPLOAD_BYTES,
+            ACTIVE_SESSIONS]
+
+
+def exposition():
+    """Every metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+def write_textfile(path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(exposition())
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_forever(path):
+    while True:
+        try:
+            write_textfile(path)
+        except OSError:
+            pass
+        time.sleep(FILE_INTERVAL)
+
+
+@st.cache_resource
+def start_exporter():
+    """Start this process's metrics endpoint and textfile writer (once); returns the endpoint URL or None."""
+    url = None
+    if METRICS_PORT:
+        try:
+            server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _Handler)
+        except OSError as e:
+            # Most likely another replica on the same port; the app itself is unaffected
+            log.warning("Metrics endpoint not started on %s:%s: %s", METRICS_HOST, METRICS_PORT, e)
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+            url = f"http://{METRICS_HOST}:{server.server_address[1]}/metrics"
+    if METRICS_FILE:
+        threading.Thread(target=_write_forever, args=(METRICS_FILE,), daemon=True, name="metrics-file").start()
+    return url
+
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+class PageRun:
+    """Times one full-script rerun of a page and its stages.
+
+    Short stages are timed with `with run.stage(...)`; the results section is
+    timed from `run.rendering()` to `run.finish()` at the end of the script.
+    Fragment-only reruns never reach the end of the script; see timed_fragment.
+    """
+
+    def __init__(self, page):
+        self.page, self.start, self.render_start = page, time.perf_counter(), None
+
+    def stage(self, stage):
+        return STAGE_SECONDS.time(page=self.page, stage=stage)
+
+    def rendering(self):
+        self.render_start = time.perf_counter()
+
+    def finish(self):
+        now = time.perf_counter()
+        if self.render_start is not None:
+            STAGE_SECONDS.observe(now - self.render_start, page=self.page, stage="render")
+        RERUN_SECONDS.observe(now - self.start, page=self.page)
+
+
+def page_run(page):
+    """Call once a page has passed its login check: counts the session as active and starts the rerun timer."""
+    start_exporter()
+    session_id = _session_id()
+    if session_id is not None:
+        SESSIONS.touch(session_id)
+    return PageRun(page)
+
+
+def timed_fragment(page):
+    """Decorator applied under @st.fragment: times every run of the fragment body.
+
+    Most reruns (grid paging, filters) rerun only a fragment, so they are
+    counted here rather than in RERUN_SECONDS.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            session_id = _session_id()
+            if session_id is not None:
+                SESSIONS.touch(session_id)
+            with FRAGMENT_SECONDS.time(page=page, fragment=func.__name__):
+                return func(*args, **kwargs)
+        return run
+    return decorate
+
+
+def end_session():
+    session_id = _session_id()
+    if session_id is not None:
+        SESSIONS.end(session_id)
@@ -0,0 +1,121 @@
+# Approximate fleet mix for large uploads, from a reservoir sample drawn while the file is parsed
+#
+# read_table() hands every parsed chunk to a LivePreview, whose Reservoir keeps
+# a uniform random sample of PREVIEW_ROWS rows (Algorithm R, one vectorized
+# step per chunk). Once PREVIEW_MIN_ROWS rows are in, the analyzer runs on the
+# sample alone and each class share is drawn with a 95% Wilson interval (with
+# finite-population correction), redrawn as later chunks arrive, while the
+# rest of the file is still being parsed and long before the exact pass ends.
+
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.figures import share_bars
+
+PREVIEW_ROWS = 2_000
+# Smaller files are analyzed exactly about as fast as the preview would be drawn
+PREVIEW_MIN_ROWS = 20_000
+# Seconds between redraws while parsing continues
+PREVIEW_REFRESH = 2.0
+Z_95 = 1.96
+
+
+class Reservoir:
+    """Uniform sample of k rows from a stream of DataFrame chunks.
+
+    Only (chunk, row) pointers are kept; the chunks themselves are the ones
+    read_table concatenates anyway, so sampling costs no extra copy.
+    """
+
+    def __init__(self, k=PREVIEW_ROWS, seed=0):
+        self.k, self.seen = k, 0
+        self.rng = np.random.default_rng(seed)
+        self.chunks = []
+        self.slots = np.empty((0, 2), dtype=np.int64)  # (chunk number, row in chunk)
+
+    def update(self, chunk):
+        n, part = len(chunk), len(self.chunks)
+        self.chunks.append(chunk)
+        fill = min(self.k - len(self.slots), n)
+        if fill > 0:
+            self.slots = np.vstack([self.slots, np.column_stack([np.full(fill, part), np.arange(fill)])])
+        rows = np.arange(fill, n)
+        if len(rows):
+            # Row number i (0-based, over the whole stream) replaces a random slot with probability k / (i + 1)
+            targets = self.rng.integers(0, self.seen + rows + 1)
+            hit = targets < self.k
+            rows, targets = rows[hit], targets[hit]
+            # Within one chunk a later row overrides an earlier one, as in the sequential algorithm
+            _, last = np.unique(targets[::-1], return_index=True)
+            rows, targets = rows[::-1][last], targets[::-1][last]
+            self.slots[targets] = np.column_stack([np.full(len(rows), part), rows])
+        self.seen += n
+
+    def sample(self):
+        parts = [self.chunks[part].iloc[self.slots[self.slots[:, 0] == part, 1]]
+                 for part in np.unique(self.slots[:, 0])]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def share_estimates(labels, population):
+    """Share of each label in the sample, with a 95% Wilson interval scaled to a population of `population` rows."""
+    labels = pd.Series(labels).dropna()
+    n = len(labels)
+    counts = labels.value_counts()
+    p = counts.to_numpy() / n
+    denom = 1 + Z_95 ** 2 / n
+    center = (p + Z_95 ** 2 / (2 * n)) / denom
+    half = Z_95 * np.sqrt(p * (1 - p) / n + Z_95 ** 2 / (4 * n ** 2)) / denom
+    if population > 1:
+        half *= np.sqrt(max(population - n, 0) / (population - 1))
+    return pd.DataFrame({
+        'Label': counts.index.astype(str), 'Sampled': counts.to_numpy(),
+        'Share (%)': 100 * p, 'Low (%)': 100 * np.clip(center - half, 0, 1), 'High (%)': 100 * np.clip(center + half, 0, 1),
+    })
+
+
+def preview_panel(placeholder, title, labels, population, read_so_far=False):
+    """Draw the approximate mix into `placeholder`; the page empties it once the exact results are in."""
+    estimates = share_estimates(labels, population)
+    of = f"about {population:,} motors (file still being read)" if read_so_far else f"{population:,} motors"
+    with placeholder.container():
+        st.info(f"⏳ Preview from a random sample of {len(labels):,} of {of}. "
+                "Exact results replace it when the full analysis finishes.")
+        st.plotly_chart(share_bars(estimates, f"Approximate {title} Mix (95% interval)"), use_container_width=True)
+
+
+class LivePreview:
+    """read_table's on_chunk: samples every chunk and draws the preview while the file is still being parsed.
+
+    `label(sample)` returns the sampled motors' labels (or None to skip a
+    draw). The file's row count is extrapolated from how far into the upload
+    the parser has read.
+    """
+
+    def __init__(self, placeholder, title, label, file):
+        self.placeholder, self.title, self.label, self.file = placeholder, title, label, file
+        self.reservoir = Reservoir()
+        self.drawn_at = None
+
+    def __call__(self, chunk):
+        self.reservoir.update(chunk)
+        seen = self.reservoir.seen
+        if seen < PREVIEW_MIN_ROWS:
+            return
+        if self.drawn_at is not None and time.monotonic() - self.drawn_at < PREVIEW_REFRESH:
+            return
+        labels = self.label(self.reservoir.sample())
+        if labels is not None:
+            preview_panel(self.placeholder, self.title, labels, self._population(seen), read_so_far=True)
+        self.drawn_at = time.monotonic()
+
+    def _population(self, seen):
+        size = getattr(self.file, "size", None)
+        try:
+            position = self.file.tell()
+        except (AttributeError, OSError, ValueError):
+            position = None
+        if not size or not position:
+            return seen
+        return max(seen, int(seen * size / position))
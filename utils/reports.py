@@ -0,0 +1,280 @@
+# Printable HTML reports per motor and per department, rendered in parallel from the fleet records
+#
+# Each motor's latest record (LEAP diagnosis / action / location, RUL score
+# breakdown / Health Index / RUL, ENV damage label) is filled into a template
+# with its chart embedded as a static PNG, so every report is one self-contained
+# file that prints as-is (or to PDF from the browser). A manifest of record
+# fingerprints from the last run means only motors whose results changed are
+# rendered again; those are split into batches across the worker pool.
+
+import base64
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import shutil
+import string
+import threading
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+from utils.charts import figure
+from utils.rul import SCORES, CONDITIONS
+from utils.sharding import worker_pool
+
+REPORT_DIR = Path(__file__).resolve().parent.parent / ".fleet_reports"
+BATCH_SIZE = 200
+# Below this many motors the pool hand-off costs more than it saves
+MIN_PARALLEL = 400
+_lock = threading.Lock()
+
+CONDITION_COLORS = {"Excellent": "#2e7d32", "Good": "#f9a825", "Moderate": "#ef6c00", "Critical": "#c62828"}
+
+STYLE = """
+body { font-family: Arial, sans-serif; color: #222; margin: 32px; }
+h1 { font-size: 22px; margin-bottom: 4px; } h2 { font-size: 16px; margin-top: 24px; }
+.meta { color: #666; font-size: 12px; }
+table { border-collapse: collapse; margin-top: 8px; } td, th { border: 1px solid #ccc; padding: 4px 10px; font-size: 13px; text-align: left; }
+.missing { color: #999; font-style: italic; }
+@media print { body { margin: 0; } a { color: inherit; text-decoration: none; } .pagebreak { page-break-before: always; } }
+"""
+
+MOTOR_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Motor $motor</title><style>$style</style></head>
+<body>
+<h1>HT Motor Report: $motor</h1>
+<div class="meta">$plant / $department · last result $updated · <a href="index.html">department report</a></div>
+<h2>LEAP+ Insulation Diagnosis</h2>
+<table>
+<tr><th>Diagnosis</th><td>$diagnosis</td></tr>
+<tr><th>Recommended action</th><td>$action</td></tr>
+<tr><th>Problem location</th><td>$location</td></tr>
+</table>
+<h2>Health and Remaining Useful Life</h2>
+<table>
+<tr><th>Condition</th><td>$condition</td></tr>
+<tr><th>Health Index</th><td>$health_index</td></tr>
+<tr><th>Estimated RUL</th><td>$rul</td></tr>
+</table>
+$scores
+<h2>Environmental Damage</h2>
+<table><tr><th>Predicted damage</th><td>$damage</td></tr></table>
+</body></html>
+""")
+
+DEPARTMENT_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$plant / $department</title><style>$style</style></head>
+<body>
+<h1>Department Report: $plant / $department</h1>
+<div class="meta">$motors motors · <a href="../../index.html">all departments</a></div>
+$chart
+<h2>Motors</h2>
+<table>
+<tr><th>Motor</th><th>Condition</th><th>Health Index</th><th>RUL (yrs)</th><th>Diagnosis</th><th>Action</th><th>Damage</th></tr>
+$rows
+</table>
+</body></html>
+""")
+
+INDEX_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Fleet Reports</title><style>$style</style></head>
+<body>
+<h1>Fleet Reports</h1>
+<table>
+<tr><th>Plant</th><th>Department</th><th>Motors</th><th>Critical</th></tr>
+$rows
+</table>
+</body></html>
+""")
+
+
+def _text(value, missing):
+    if value is None:
+        return f'<span class="missing">{missing}</span>'
+    return html.escape(str(value))
+
+
+def _number(value, fmt, missing):
+    return _text(None if value is None else format(value, fmt), missing)
+
+
+def _png(fig):
+    buf = io.BytesIO()
+    fig.canvas.print_png(buf)
+    return f'<img src="data:image/png;base64,{base64.b64encode(buf.getvalue()).decode()}">'
+
+
+def score_chart(record):
+    """Static bar chart of the RUL parameter scores, or '' before any RUL result."""
+    scores = {param: record.get(col) for param, (col, _, _) in SCORES.items()}
+    if all(v is None for v in scores.values()):
+        return ""
+    fig, ax = figure((5, 2.2), dpi=100)
+    values = [v or 0 for v in scores.values()]
+    ax.barh(list(scores), values, color=['#c62828' if v < 6 else '#f9a825' if v < 8 else '#2e7d32' for v in values])
+    ax.set_xlim(0, 10)
+    ax.invert_yaxis()
+    ax.set_xlabel("Score (0-10)")
+    fig.tight_layout()
+    return "<h2>Score Breakdown</h2>" + _png(fig)
+
+
+def condition_chart(counts):
+    fig, ax = figure((5, 2), dpi=100)
+    ax.bar(CONDITIONS, [counts.get(c, 0) for c in CONDITIONS], color=[CONDITION_COLORS[c] for c in CONDITIONS])
+    ax.set_ylabel("Motors")
+    fig.tight_layout()
+    return "<h2>Condition Mix</h2>" + _png(fig)
+
+
+def fingerprint(record):
+    """Changes whenever any result in the record changes (the test date alone does not count)."""
+    body = {k: v for k, v in record.items() if k != 'updated'}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def slug(text):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(text))[:60] or "_"
+
+
+def motor_file(key):
+    # Keys can differ only in characters the slug drops, so a short hash keeps names unique
+    return f"{slug(key)}-{hashlib.sha1(str(key).encode()).hexdigest()[:8]}.html"
+
+
+def department_dir(root, plant, dept):
+    return root / slug(plant) / slug(dept)
+
+
+def render_motor(key, record):
+    return MOTOR_TEMPLATE.substitute(
+        style=STYLE, motor=html.escape(str(key)),
+        plant=html.escape(str(record['plant'])), department=html.escape(str(record['department'])),
+        updated=html.escape(str(record.get('updated', '–'))),
+        diagnosis=_text(record.get('Diagnosis'), "no LEAP result"),
+        action=_text(record.get('Action'), "no LEAP result"),
+        location=_text(record.get('Location'), "no LEAP result"),
+        condition=_text(record.get('Condition'), "no RUL result"),
+        health_index=_number(record.get('Health_Index'), ".2f", "no RUL result"),
+        rul=_number(record.get('Estimated_RUL'), ".1f", "no RUL result"),
+        scores=score_chart(record),
+        damage=_text(record.get('Predicted_Damage'), "no ENV result"),
+    )
+
+
+def _render_batch(items, root):
+    """Worker side: write one report per (key, record) and return how many were written."""
+    root = Path(root)
+    for key, record in items:
+        folder = department_dir(root, record['plant'], record['department'])
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / motor_file(key)).write_text(render_motor(key, record), encoding="utf-8")
+    return len(items)
+
+
+def _department_row(key, record):
+    cells = [f'<a href="{motor_file(key)}">{html.escape(str(key))}</a>',
+             _text(record.get('Condition'), "–"), _number(record.get('Health_Index'), ".2f", "–"),
+             _number(record.get('Estimated_RUL'), ".1f", "–"), _text(record.get('Diagnosis'), "–"),
+             _text(record.get('Action'), "–"), _text(record.get('Predicted_Damage'), "–")]
+    return "<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>"
+
+
+def render_department(plant, dept, members):
+    """members: [(key, record)], worst Condition and lowest Health Index first."""
+    severity = {c: i for i, c in enumerate(reversed(CONDITIONS))}
+    members = sorted(members, key=lambda m: (severity.get(m[1].get('Condition'), len(CONDITIONS)),
+                                             m[1].get('Health_Index') or 0))
+    counts = defaultdict(int)
+    for _, record in members:
+        counts[record.get('Condition')] += 1
+    return DEPARTMENT_TEMPLATE.substitute(
+        style=STYLE, plant=html.escape(str(plant)), department=html.escape(str(dept)), motors=len(members),
+        chart=condition_chart(counts), rows="\n".join(_department_row(k, r) for k, r in members))
+
+
+def generate_reports(records, n_workers=1, root=None, progress=None):
+    """Render reports for {motor key: record} into `root`, skipping motors unchanged since the last run.
+
+    Returns (motors rendered, motors skipped). `progress(done, total)` is called as batches finish.
+    """
+    with _lock:
+        return _generate(records, n_workers, Path(root or REPORT_DIR), progress)
+
+
+def _generate(records, n_workers, root, progress):
+    manifest_path = root / "manifest.json"
+    try:
+        previous = json.loads(manifest_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        previous = {}
+
+    prints = {key: fingerprint(record) for key, record in records.items()}
+    todo = [(key, records[key]) for key, fp in prints.items()
+            if previous.get(key, {}).get('fingerprint') != fp
+            or not (department_dir(root, records[key]['plant'], records[key]['department']) / motor_file(key)).exists()]
+
+    # Motors that moved department or left the fleet lose their old file
+    for key, entry in previous.items():
+        if key not in records or entry['file'] != str(department_dir(root, records[key]['plant'],
+                                                                   records[key]['department']) / motor_file(key)):
+            Path(entry['file']).unlink(missing_ok=True)
+
+    batches = [todo[i:i + BATCH_SIZE] for i in range(0, len(todo), BATCH_SIZE)]
+    done = 0
+    if n_workers > 1 and len(todo) >= MIN_PARALLEL:
+        pool = worker_pool(n_workers)
+        for future in [pool.submit(_render_batch, batch, str(root)) for batch in batches]:
+            done += future.result()
+            if progress:
+                progress(done, len(todo))
+    else:
+        for batch in batches:
+            done += _render_batch(batch, root)
+            if progress:
+                progress(done, len(todo))
+
+    # Department pages are cheap; only those with a changed (or removed) member are redrawn
+    by_dept = defaultdict(list)
+    for key, record in records.items():
+        by_dept[(record['plant'], record['department'])].append((key, record))
+    changed = {(r['plant'], r['department']) for _, r in todo}
+    changed |= {dept for dept in by_dept if not (department_dir(root, *dept) / "index.html").exists()}
+    changed |= {tuple(entry['dept']) for key, entry in previous.items()
+                if key not in records or entry['dept'] != [records[key]['plant'], records[key]['department']]}
+    for plant, dept in changed:
+        folder = department_dir(root, plant, dept)
+        if (plant, dept) in by_dept:
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / "index.html").write_text(render_department(plant, dept, by_dept[(plant, dept)]), encoding="utf-8")
+        else:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    rows = []
+    for (plant, dept), members in sorted(by_dept.items()):
+        link = department_dir(Path("."), plant, dept) / "index.html"
+        critical = sum(r.get('Condition') == "Critical" for _, r in members)
+        rows.append(f'<tr><td>{html.escape(str(plant))}</td><td><a href="{link.as_posix()}">{html.escape(str(dept))}</a>'
+                    f'</td><td>{len(members)}</td><td>{critical}</td></tr>')
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "index.html").write_text(INDEX_TEMPLATE.substitute(style=STYLE, rows="\n".join(rows)), encoding="utf-8")
+
+    manifest = {key: {'fingerprint': fp, 'dept': [records[key]['plant'], records[key]['department']],
+                      'file': str(department_dir(root, records[key]['plant'], records[key]['department']) / motor_file(key))}
+                for key, fp in prints.items()}
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, manifest_path)
+    return len(todo), len(records) - len(todo)
+
+
+def report_archive(root=None):
+    """Zip of the whole report folder, for download."""
+    root = Path(root or REPORT_DIR)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(root.rglob("*.html")):
+            zf.write(path, path.relative_to(root).as_posix())
+    return buf.getvalue()
@@ -0,0 +1,129 @@
+# Analysis results shared by every server process on the host (SQLite in .fleet_cache/results.sqlite)
+#
+# Several Streamlit replicas behind a load balancer each keep their own session
+# and process caches, so the same plant file would be analyzed once per replica.
+# Finished results are stored here keyed by upload content hash + analysis
+# version + parameters: whichever replica sees a file first does the work, the
+# others load the pickled result. SQLite's WAL journal gives atomic commits and
+# lets readers run alongside a writer; the least recently used entries are
+# evicted past SIZE_LIMIT_MB.
+
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from pathlib import Path
+import utils.fleet_cache
+from utils.metrics import CACHE_REQUESTS
+
+SIZE_LIMIT_MB = float(os.environ.get("HT_RESULT_CACHE_MB", 1024))
+# Reads refresh an entry's last use at most this often, to keep writes off the hot path
+TOUCH_INTERVAL = 60
+TIMEOUT = 30
+
+# Modules whose code determines each analyzer's output; editing any of them changes the version
+ANALYSIS_MODULES = {
+    "LEAP": ["utils.leap", "utils.schema"],
+    "RUL": ["utils.rul", "utils.schema"],
+    "ENV": ["utils.env", "utils.schema"],
+}
+_versions = {}
+
+
+def _path():
+    return utils.fleet_cache.CACHE_DIR / "results.sqlite"
+
+
+def _connect():
+    path = _path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY, analyzer TEXT, size INTEGER, created REAL, used REAL, payload BLOB)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+    return conn
+
+
+def analysis_version(analyzer):
+    """Hash of the code the analyzer's results depend on."""
+    if analyzer not in _versions:
+        digest = hashlib.sha256()
+        for name in ANALYSIS_MODULES[analyzer]:
+            digest.update(Path(importlib.import_module(name).__file__).read_bytes())
+        _versions[analyzer] = digest.hexdigest()[:12]
+    return _versions[analyzer]
+
+
+def result_key(analyzer, token, *params):
+    """Cache key for an analysis of the upload `token` with the given parameters."""
+    raw = json.dumps([analyzer, analysis_version(analyzer), token, *params], default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def load_result(key):
+    """The stored result for `key`, or None."""
+    value = _load(key)
+    CACHE_REQUESTS.inc(cache="shared", result="miss" if value is None else "hit")
+    return value
+
+
+def _load(key):
+    try:
+        conn = _connect()
+    except sqlite3.Error:
+        return None
+    try:
+        row = conn.execute("SELECT payload, used FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            conn.execute("UPDATE results SET used = ? WHERE key = ?", (now, key))
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            # Written by code that no longer matches (moved class, pandas upgrade, truncated row): a miss
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return None
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+def store_result(key, analyzer, value):
+    """Store a finished result for every replica; a cache failure never fails the analysis."""
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    limit = SIZE_LIMIT_MB * 1024 ** 2
+    if len(payload) > limit:
+        return
+    now = time.time()
+    try:
+        conn = _connect()
+    except sqlite3.Error:
+        return
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                     (key, analyzer, len(payload), now, now, payload))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total > limit:
+            # Least recently used first, until the cache fits again
+            for old, size in conn.execute("SELECT key, size FROM results WHERE key != ? ORDER BY used",
+                                          (key,)).fetchall():
+                conn.execute("DELETE FROM results WHERE key = ?", (old,))
+                total -= size
+                if total <= limit:
+                    break
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+    finally:
+        conn.close()
+
@@ -0,0 +1,184 @@
+# Incrementally maintained plant -> department -> motor rollups for the Home dashboard
+#
+# State is kept in .fleet_state/rollups.sqlite: one row per motor and one per
+# ingested batch. An ingest upserts only the motors it touched, so saving costs
+# O(rows in the upload) however much history the fleet has.
+
+import datetime as dt
+import json
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+import pandas as pd
+import streamlit as st
+from utils.fleet import motor_keys, plants, departments
+from utils.rul import SCORE_COLUMNS
+
+STATE_DIR = Path(__file__).resolve().parent.parent / ".fleet_state"
+TIMEOUT = 30
+
+# Result columns each analyzer contributes to a motor's record
+TRACKED = {
+    'LEAP': ['Diagnosis', 'Action', 'Location'],
+    'RUL': ['Condition', 'Health_Index', 'Estimated_RUL', *SCORE_COLUMNS],
+    'ENV': ['Predicted_Damage'],
+}
+NUMERIC = ['Health_Index', 'Estimated_RUL', *SCORE_COLUMNS]
+CATEGORICAL = ['Condition', 'Diagnosis', 'Predicted_Damage']
+FLAGGED = {
+    'Condition': {"Critical", "Moderate"},
+    'Predicted_Damage': {"Moisture", "Dust", "Temperature"},
+}
+
+
+class FleetRollups:
+    """Latest result per motor plus per-department and per-plant aggregates.
+
+    Each ingested motor only moves its own previous contribution out of the
+    counters and its new one in, so an upload costs O(rows in the upload) and
+    the dashboard reads totals without ever regrouping history.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.motors = {}
+        self.departments = {}
+        self.plants = {}
+        self.ingested = set()
+
+    @staticmethod
+    def _empty():
+        return {'motors': 0, 'flagged': 0, 'hi_sum': 0.0, 'hi_count': 0,
+                **{field: Counter() for field in CATEGORICAL}}
+
+    @staticmethod
+    def _is_flagged(record):
+        diagnosis = record.get('Diagnosis')
+        return (record.get('Condition') in FLAGGED['Condition']
+                or record.get('Predicted_Damage') in FLAGGED['Predicted_Damage']
+                or (diagnosis is not None and diagnosis != "Healthy insulation"))
+
+    def _apply(self, record, sign):
+        dept_key = (record['plant'], record['department'])
+        for aggregates, key in ((self.departments, dept_key), (self.plants, record['plant'])):
+            agg = aggregates.setdefault(key, self._empty())
+            agg['motors'] += sign
+            agg['flagged'] += sign * self._is_flagged(record)
+            if record.get('Health_Index') is not None:
+                agg['hi_sum'] += sign * record['Health_Index']
+                agg['hi_count'] += sign
+            for field in CATEGORICAL:
+                if record.get(field) is not None:
+                    agg[field][record[field]] += sign
+                    if agg[field][record[field]] <= 0:
+                        del agg[field][record[field]]
+            if agg['motors'] <= 0:
+                del aggregates[key]
+
+    def ingest(self, analyzer, df, token, batch=None):
+        """Fold an analyzer's result frame into the rollups.
+
+        `batch` identifies this particular result (defaults to the upload token);
+        a batch that was already ingested is skipped, so page reruns are free.
+        Returns the updated records of the motors this batch touched ({} if skipped).
+        """
+        batch = str(token if batch is None else batch)
+        if (analyzer, batch) in self.ingested:
+            return {}
+        fields = [f for f in TRACKED[analyzer] if f in df.columns]
+        values = {f: df[f].tolist() for f in fields}
+        keys, plant_col, dept_col = motor_keys(df, token), plants(df), departments(df)
+        today = dt.date.today().isoformat()
+
+        changed = {}
+        with self.lock:
+            for i, key in enumerate(keys):
+                old = self.motors.get(key)
+                if old is not None:
+                    self._apply(old, -1)
+                record = dict(old or {})
+                record['plant'], record['department'], record['updated'] = plant_col[i], dept_col[i], today
+                for f in fields:
+                    value = values[f][i]
+                    record[f] = None if pd.isna(value) else (float(value) if f in NUMERIC else str(value))
+                self.motors[key] = record
+                self._apply(record, +1)
+                changed[key] = record
+            self.ingested.add((analyzer, batch))
+            self._save(analyzer, batch, changed)
+        return changed
+
+    def snapshot(self):
+        """Plain-data copy of the aggregates for rendering."""
+        with self.lock:
+            def copy(agg):
+                return {**agg, **{field: dict(agg[field]) for field in CATEGORICAL}}
+            return {
+                'motors': len(self.motors),
+                'plants': {plant: copy(agg) for plant, agg in self.plants.items()},
+                'departments': {key: copy(agg) for key, agg in self.departments.items()},
+            }
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS motors (key TEXT PRIMARY KEY, record TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS ingested (analyzer TEXT, batch TEXT, PRIMARY KEY (analyzer, batch))")
+        return conn
+
+    def _save(self, analyzer, batch, changed):
+        """Upsert the motors one batch touched; a failed write only costs persistence, not the page."""
+        if self.path is None:
+            return
+        try:
+            conn = self._connect()
+        except sqlite3.Error:
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR REPLACE INTO motors VALUES (?, ?)",
+                             [(key, json.dumps(record)) for key, record in changed.items()])
+            conn.execute("INSERT OR IGNORE INTO ingested VALUES (?, ?)", (analyzer, batch))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+
+    @classmethod
+    def load(cls, path):
+        rollups = cls(path)
+        if path.exists():
+            conn = rollups._connect()
+            try:
+                for key, record in conn.execute("SELECT key, record FROM motors"):
+                    rollups.motors[key] = json.loads(record)
+                    rollups._apply(rollups.motors[key], +1)
+                rollups.ingested = {tuple(row) for row in conn.execute("SELECT analyzer, batch FROM ingested")}
+            finally:
+                conn.close()
+        return rollups
+
+
+@st.cache_resource
+def fleet_rollups():
+    """Process-wide rollups shared by every session."""
+    return FleetRollups.load(STATE_DIR / "rollups.sqlite")
+
+
+def worst_departments(snapshot, n=5):
+    rows = []
+    for (plant, dept), agg in snapshot['departments'].items():
+        rows.append({
+            'Plant': plant, 'Department': dept, 'Motors': agg['motors'], 'Flagged': agg['flagged'],
+            'Flagged (%)': round(100 * agg['flagged'] / agg['motors'], 1),
+            'Mean Health Index': round(agg['hi_sum'] / agg['hi_count'], 2) if agg['hi_count'] else None,
+        })
+    if not rows:
+        return pd.DataFrame(rows)
+    return pd.DataFrame(rows).sort_values(['Flagged (%)', 'Motors'], ascending=False).head(n)
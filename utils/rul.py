@@ -0,0 +1,75 @@
+# Health Index / RUL scoring rules shared by the RUL page and the fleet tools
+
+import numpy as np
+
+RUL_INPUTS = ['IR', 'PI', 'DD', 'TanDelta_20', 'TanDelta_100', 'Cap_TipUp', 'Test_Year', 'Manufacturing_Year']
+
+# Scoring functions
+def score_ir(val): return 10 if val >= 1 else 8 if val >= 0.1 else 6 if val >= 0.05 else 2
+def score_pi(val): return 10 if val >= 2 else 8 if val >= 1.5 else 6 if val >= 1 else 2
+def score_dd(val): return 10 if val <= 1 else 8 if val <= 4 else 6 if val <= 10 else 2
+def score_tdtu(val): return 10 if val < abs(0.8) else 8 if val < abs(1.0) else 6 if val < abs(2.0) else 2
+def score_captip(val): return 10 if val < 5 else 8 if val < 10 else 6 if val < 15 else 2
+
+
+# Vectorized versions of the same rules (NaN falls through to 2, as above)
+def score_ir_array(val): return np.select([val >= 1, val >= 0.1, val >= 0.05], [10, 8, 6], 2)
+def score_pi_array(val): return np.select([val >= 2, val >= 1.5, val >= 1], [10, 8, 6], 2)
+def score_dd_array(val): return np.select([val <= 1, val <= 4, val <= 10], [10, 8, 6], 2)
+def score_tdtu_array(val): return np.select([val < 0.8, val < 1.0, val < 2.0], [10, 8, 6], 2)
+def score_captip_array(val): return np.select([val < 5, val < 10, val < 15], [10, 8, 6], 2)
+
+
+# Input column -> (score column, vectorized scorer, weight in the Health Index)
+SCORES = {
+    'IR': ('Score_IR', score_ir_array, 1),
+    'PI': ('Score_PI', score_pi_array, 1),
+    'DD': ('Score_DD', score_dd_array, 1),
+    'TanDelta_TipUp': ('Score_TD_TU', score_tdtu_array, 2),
+    'Cap_TipUp': ('Score_Cap_TU', score_captip_array, 2),
+}
+SCORE_COLUMNS = [score_col for score_col, _, _ in SCORES.values()]
+DEFAULT_WEIGHTS = np.array([weight for _, _, weight in SCORES.values()])
+CONDITIONS = ["Excellent", "Good", "Moderate", "Critical"]
+DEFAULT_MOTOR_LIFE = 100
+
+
+def health_index(scores, weights=DEFAULT_WEIGHTS):
+    """Weighted mean of the parameter scores; `scores` has the parameters on the last axis."""
+    weights = np.asarray(weights)
+    return (scores * weights).sum(axis=-1) / weights.sum()
+
+
+def estimated_rul(hi, age, motor_life=DEFAULT_MOTOR_LIFE):
+    return (hi / 10) * (motor_life - age)
+
+
+def condition_codes(hi):
+    """Index into CONDITIONS for each Health Index."""
+    return np.select([hi >= 8, hi >= 6, hi >= 4], [0, 1, 2], 3)
+
+
+def condition_labels(hi):
+    return np.array(CONDITIONS, dtype=object)[condition_codes(hi)]
+
+
+def score_fleet(df, motor_life=DEFAULT_MOTOR_LIFE):
+    """Add tip-up, age, scores, Health_Index, Estimated_RUL and Condition to a bulk RUL frame."""
+    df["TanDelta_TipUp"] = df["TanDelta_100"] - df["TanDelta_20"]
+    df["Age"] = df["Test_Year"] - df["Manufacturing_Year"]
+    for col, (score_col, scorer, _) in SCORES.items():
+        df[score_col] = scorer(df[col].to_numpy())
+
+    # Same operation order as the single-motor form so both give identical values
+    df['Health_Index'] = (
+        df['Score_IR'] + df['Score_PI'] + df['Score_DD'] +
+        df['Score_TD_TU'] * 2 + df['Score_Cap_TU'] * 2
+    ) / 7
+    df['Estimated_RUL'] = estimated_rul(df['Health_Index'], df['Age'], motor_life)
+    df['Condition'] = condition_labels(df['Health_Index'].to_numpy())
+    return df
+
+
+def score_columns(inputs, motor_life=DEFAULT_MOTOR_LIFE):
+    """Only the columns score_fleet adds, computed from the RUL_INPUTS (used for sharded runs)."""
+    return score_fleet(inputs.copy(), motor_life).drop(columns=inputs.columns)
@@ -0,0 +1,196 @@
+# Prioritized servicing plan: a Next_Servicing_Date per motor under per-department crew capacity
+#
+# Each motor's latest fleet record (RUL Condition / Estimated_RUL, LEAP Action)
+# becomes a job with a due date and a priority. Every department is planned
+# week by week: jobs are released into a heap on their due week and the crew
+# takes the highest-priority released jobs up to its weekly capacity. New test
+# results and capacity changes only replan the departments they touch.
+
+import datetime as dt
+import heapq
+import json
+import math
+import os
+import threading
+from collections import defaultdict
+import pandas as pd
+import streamlit as st
+from utils.leap import ACTION_URGENCY
+from utils.rollups import STATE_DIR, fleet_rollups
+
+DEFAULT_CREW_CAPACITY = 2  # motors a department's crew can service per week
+WORKDAYS = 5
+
+CONDITION_SEVERITY = {"Critical": 3, "Moderate": 2, "Good": 1, "Excellent": 0}
+# Latest servicing date after a result, by Condition and by LEAP action urgency
+CONDITION_DUE_DAYS = {"Critical": 0, "Moderate": 90, "Good": 365, "Excellent": 730}
+URGENCY_DUE_DAYS = {0: 0, 1: 30, 2: 90}
+NO_ACTION = max(URGENCY_DUE_DAYS) + 1
+
+
+def week_start(day):
+    return day - dt.timedelta(days=day.weekday())
+
+
+def make_job(record):
+    """Due date and priority for one motor record, or None if nothing calls for servicing."""
+    condition, action, rul = record.get('Condition'), record.get('Action'), record.get('Estimated_RUL')
+    urgency = ACTION_URGENCY.get(action, NO_ACTION)
+    limits = [CONDITION_DUE_DAYS.get(condition), URGENCY_DUE_DAYS.get(urgency),
+              None if rul is None else max(rul, 0) * 365]
+    limits = [days for days in limits if days is not None]
+    if not limits:
+        return None
+    tested = dt.date.fromisoformat(record.get('updated') or dt.date.today().isoformat())
+    return {
+        'dept': (record['plant'], record['department']),
+        'due': (tested + dt.timedelta(days=int(min(limits)))).toordinal(),
+        # Most severe Condition first, then most urgent action, then shortest RUL
+        'priority': (-CONDITION_SEVERITY.get(condition, 0), urgency, math.inf if rul is None else rul),
+        'condition': condition, 'action': action, 'rul': rul,
+    }
+
+
+class MaintenancePlan:
+    """Servicing dates for every motor with a due job, kept up to date incrementally."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.capacity = {}
+        self.jobs = {}
+        self.members = defaultdict(set)
+        self.dates = {}
+        self.dirty = set()
+        self.anchor = None
+        self.version = 0
+
+    def update(self, records):
+        """Fold in changed motor records ({motor key: record}, as returned by FleetRollups.ingest)."""
+        if not records:
+            return
+        with self.lock:
+            for key, record in records.items():
+                old = self.jobs.pop(key, None)
+                if old is not None:
+                    self.members[old['dept']].discard(key)
+                    self.dirty.add(old['dept'])
+                    self.dates.pop(key, None)
+                job = make_job(record)
+                if job is not None:
+                    self.jobs[key] = job
+                    self.members[job['dept']].add(key)
+                    self.dirty.add(job['dept'])
+
+    def set_capacity(self, dept, motors_per_week):
+        with self.lock:
+            if self.capacity.get(dept, DEFAULT_CREW_CAPACITY) == motors_per_week:
+                return
+            self.capacity[dept] = motors_per_week
+            self.dirty.add(dept)
+            self._save()
+
+    def _refresh(self):
+        # The plan starts at the current week; once a week every department moves forward
+        anchor = week_start(dt.date.today()).toordinal()
+        if anchor != self.anchor:
+            self.anchor = anchor
+            self.dirty |= set(self.members)
+        if self.dirty:
+            for dept in self.dirty:
+                self._replan(dept)
+            self.dirty.clear()
+            self.version += 1
+
+    def _replan(self, dept):
+        capacity = max(1, self.capacity.get(dept, DEFAULT_CREW_CAPACITY))
+        released = defaultdict(list)
+        for key in self.members[dept]:
+            job = self.jobs[key]
+            # Released in the last week whose working days all fall on or before the due date
+            released[max(0, (job['due'] - self.anchor - WORKDAYS + 1) // 7)].append((job['priority'], key))
+        if not released:
+            self.members.pop(dept, None)
+            return
+
+        due_weeks = sorted(released)
+        heap, i, week = [], 0, due_weeks[0]
+        while i < len(due_weeks) or heap:
+            if not heap:
+                week = max(week, due_weeks[i])
+            while i < len(due_weeks) and due_weeks[i] <= week:
+                for item in released[due_weeks[i]]:
+                    heapq.heappush(heap, item)
+                i += 1
+            for slot in range(min(capacity, len(heap))):
+                _, key = heapq.heappop(heap)
+                self.dates[key] = self.anchor + 7 * week + slot * WORKDAYS // capacity
+            week += 1
+
+    def current_version(self):
+        """Bumped whenever any servicing date may have moved."""
+        with self.lock:
+            self._refresh()
+            return self.version
+
+    def _row(self, key):
+        job = self.jobs[key]
+        return {'Motor': key, 'Plant': job['dept'][0], 'Department': job['dept'][1],
+                'Condition': job['condition'], 'Estimated_RUL': job['rul'], 'Action': job['action'],
+                'Due_Date': dt.date.fromordinal(job['due']),
+                'Next_Servicing_Date': dt.date.fromordinal(self.dates[key])}
+
+    def schedule(self, keys=None):
+        """Plan rows for the given motors (default: the whole fleet), in servicing order."""
+        with self.lock:
+            self._refresh()
+            keys = self.jobs.keys() if keys is None else [k for k in keys if k in self.jobs]
+            rows = [self._row(k) for k in keys]
+        frame = pd.DataFrame(rows, columns=['Motor', 'Plant', 'Department', 'Condition', 'Estimated_RUL', 'Action',
+                                            'Due_Date', 'Next_Servicing_Date'])
+        return frame.sort_values('Next_Servicing_Date', kind='stable').reset_index(drop=True)
+
+    def upcoming(self, n=10):
+        """The next n jobs across the fleet, without ordering the whole plan."""
+        with self.lock:
+            self._refresh()
+            nearest = heapq.nsmallest(n, self.dates.items(), key=lambda item: (item[1], self.jobs[item[0]]['priority']))
+            return pd.DataFrame([self._row(key) for key, _ in nearest])
+
+    def crews(self):
+        """Crew capacity and planned jobs per department."""
+        with self.lock:
+            depts = sorted(set(self.members) | set(self.capacity))
+            return pd.DataFrame({
+                'Plant': [d[0] for d in depts], 'Department': [d[1] for d in depts],
+                'Motors per week': [self.capacity.get(d, DEFAULT_CREW_CAPACITY) for d in depts],
+                'Planned jobs': [len(self.members.get(d, ())) for d in depts],
+            })
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({'capacity': [[*dept, n] for dept, n in self.capacity.items()]}, f)
+        os.replace(tmp, self.path)
+
+    @classmethod
+    def load(cls, path):
+        plan = cls(path)
+        if path.exists():
+            with open(path) as f:
+                plan.capacity = {(plant, dept): n for plant, dept, n in json.load(f)['capacity']}
+        return plan
+
+
+@st.cache_resource
+def maintenance_plan():
+    """Process-wide servicing plan, seeded from the fleet rollups and updated on every ingest."""
+    plan = MaintenancePlan.load(STATE_DIR / "crews.json")
+    rollups = fleet_rollups()
+    with rollups.lock:
+        records = dict(rollups.motors)
+    plan.update(records)
+    return plan
@@ -0,0 +1,114 @@
+# Input schemas for the bulk uploads: parse only the columns an analyzer needs, with explicit dtypes
+#
+# The header is read first, so a file with missing columns is rejected before
+# any data is parsed. Only required columns, the optional passthrough columns
+# (motor identity, plant, department) and any extra names a caller asks for are
+# parsed; remarks, tags and other instrument fields in wide exports are skipped.
+
+import numpy as np
+import pandas as pd
+from utils.env import ENV_INPUTS
+from utils.fleet import MOTOR_ID
+from utils.leap import LEAP_INPUTS
+from utils.rul import RUL_INPUTS
+
+NUMBER, YEAR, TEXT = "number", "year", "text"
+CHUNK_ROWS = 50_000
+DTYPES = {NUMBER: "float64", YEAR: "float64", TEXT: str}
+
+# Identity / grouping columns used by the grid filters and fleet rollups, kept when present
+PASSTHROUGH = [MOTOR_ID, 'Plant', 'Department']
+
+SCHEMAS = {
+    "LEAP": {col: NUMBER for col in LEAP_INPUTS},
+    "RUL": {col: YEAR if col.endswith('_Year') else NUMBER for col in RUL_INPUTS},
+    "ENV": {col: TEXT if col == 'Department' else NUMBER for col in ENV_INPUTS},
+}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def normalize(name):
+    return str(name).strip().replace(" ", "_")
+
+
+def read_header(file):
+    """Column names of an uploaded CSV without parsing any rows."""
+    file.seek(0)
+    header = pd.read_csv(file, nrows=0).columns.tolist()
+    file.seek(0)
+    return header
+
+
+def _malformed(file, columns):
+    """First non-numeric value in the given columns, as (column, row, value)."""
+    file.seek(0)
+    raw = pd.read_csv(file, usecols=columns, dtype=str)
+    for col in columns:
+        bad = pd.to_numeric(raw[col], errors='coerce').isna() & raw[col].notna()
+        if bad.any():
+            row = int(np.argmax(bad.to_numpy()))
+            return col, row, raw[col].iloc[row]
+    return None
+
+
+def read_table(file, analyzer, passthrough=(), on_chunk=None):
+    """Parse the columns `analyzer` needs from an uploaded CSV.
+
+    Returns (frame, ignored header names). Column names are normalized
+    (stripped, spaces to underscores). Raises SchemaError naming the missing
+    or malformed columns before any analysis work is done. With `on_chunk`,
+    the file is parsed CHUNK_ROWS rows at a time and each parsed chunk is
+    passed to it (e.g. to sample rows for a preview) before being combined.
+    """
+    schema = SCHEMAS[analyzer]
+    header = read_header(file)
+    raw_names = {}
+    for raw in header:
+        raw_names.setdefault(normalize(raw), raw)
+
+    missing = [col for col in schema if col not in raw_names]
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+
+    keep = list(schema) + [col for col in PASSTHROUGH + list(passthrough)
+                           if col in raw_names and col not in schema]
+    usecols = [raw_names[col] for col in dict.fromkeys(keep)]
+    dtypes = {raw_names[col]: DTYPES[kind] for col, kind in schema.items()}
+    dtypes.update({raw_names[col]: str for col in PASSTHROUGH if col in raw_names and col not in schema})
+
+    file.seek(0)
+    try:
+        if on_chunk is None:
+            df = pd.read_csv(file, usecols=usecols, dtype=dtypes)
+        else:
+            chunks = []
+            for chunk in pd.read_csv(file, usecols=usecols, dtype=dtypes, chunksize=CHUNK_ROWS):
+                chunk.columns = [normalize(c) for c in chunk.columns]
+                on_chunk(chunk)
+                chunks.append(chunk)
+            if chunks:
+                df = pd.concat(chunks, ignore_index=True)
+            else:
+                file.seek(0)
+                df = pd.read_csv(file, usecols=usecols, dtype=dtypes, nrows=0)
+    except ValueError:
+        bad = _malformed(file, [raw_names[col] for col, kind in schema.items() if kind != TEXT])
+        if bad is None:
+            raise
+        col, row, value = bad
+        raise SchemaError(f"Column '{normalize(col)}' must be numeric, found '{value}' in data row {row + 1}") from None
+    finally:
+        file.seek(0)
+
+    df.columns = [normalize(c) for c in df.columns]
+    # Whole-number years stay integers, as pandas would infer them
+    for col, kind in schema.items():
+        values = df[col].to_numpy()
+        if kind == YEAR and np.isfinite(values).all() and (values == np.round(values)).all():
+            df[col] = values.astype(np.int64)
+
+    ignored = [raw for raw in header if raw not in usecols]
+    return df, ignored
@@ -0,0 +1,150 @@
+# Per-session memory budget for large artifacts (result frames, indexes, fitted models, figures)
+#
+# Pages keep their heavy per-upload results in session state as (key, value)
+# pairs. Going through remember()/recall() also records each artifact's size and
+# last use, and once a session holds more than SESSION_BUDGET_MB the least
+# recently used artifacts are spilled to a per-session folder on disk (or just
+# dropped with spill=False, for things that are cheap to rebuild). A spilled
+# artifact is loaded back transparently the next time it is recalled.
+
+import os
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.metrics import CACHE_REQUESTS, end_session
+
+SPILL_DIR = Path(__file__).resolve().parent.parent / ".session_spill"
+SESSION_BUDGET_MB = float(os.environ.get("HT_SESSION_BUDGET_MB", 512))
+# Spill folders of sessions that ended without logging out are removed after this long
+SPILL_TTL = 24 * 3600
+
+LEDGER = "_memory_ledger"
+
+
+def nbytes(value):
+    """Approximate in-memory size of an artifact."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray) or hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _ledger():
+    return st.session_state.setdefault(LEDGER, {})
+
+
+def _session_dir():
+    if "_session_id" not in st.session_state:
+        st.session_state["_session_id"] = uuid.uuid4().hex
+    return SPILL_DIR / st.session_state["_session_id"]
+
+
+def _prune_stale_spills():
+    if not SPILL_DIR.exists():
+        return
+    cutoff = time.time() - SPILL_TTL
+    for folder in SPILL_DIR.iterdir():
+        if folder.stat().st_mtime < cutoff:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+def _spill(name, entry):
+    key, value = st.session_state.pop(name, (None, None))
+    if entry['spill'] and value is not None:
+        folder = _session_dir()
+        folder.mkdir(parents=True, exist_ok=True)
+        entry['path'] = str(folder / f"{uuid.uuid4().hex}.joblib")
+        joblib.dump((key, value), entry['path'])
+    else:
+        del _ledger()[name]
+
+
+def _enforce_budget(keep):
+    ledger = _ledger()
+    budget = SESSION_BUDGET_MB * 1024 ** 2
+    resident = sorted((e['used'], name) for name, e in ledger.items() if e['path'] is None and name != keep)
+    total = sum(e['bytes'] for e in ledger.values() if e['path'] is None)
+    spilled = False
+    for _, name in resident:
+        if total <= budget:
+            break
+        total -= ledger[name]['bytes']
+        spilled |= ledger[name]['spill']
+        _spill(name, ledger[name])
+    if spilled:
+        _prune_stale_spills()
+
+
+def remember(name, key, value, spill=True):
+    """Keep `value` for this session under `name`, valid while the caller's `key` matches."""
+    old = _ledger().get(name)
+    if old and old['path']:
+        Path(old['path']).unlink(missing_ok=True)
+    st.session_state[name] = (key, value)
+    _ledger()[name] = {'key': key, 'bytes': nbytes(value), 'used': time.monotonic(), 'path': None, 'spill': spill}
+    _enforce_budget(keep=name)
+    return value
+
+
+def recall(name, key):
+    """The value remembered under `name` for `key`, loading it back if it was spilled; else None."""
+    value = _recall(name, key)
+    CACHE_REQUESTS.inc(cache="session", result="miss" if value is None else "hit")
+    return value
+
+
+def _recall(name, key):
+    entry = _ledger().get(name)
+    if entry is None or entry['key'] != key:
+        return None
+    if entry['path'] is None and name not in st.session_state:
+        del _ledger()[name]
+        return None
+    if entry['path']:
+        try:
+            cached = joblib.load(entry['path'])
+        except FileNotFoundError:
+            del _ledger()[name]
+            return None
+        Path(entry['path']).unlink(missing_ok=True)
+        entry['path'] = None
+        st.session_state[name] = cached
+        _enforce_budget(keep=name)
+    entry['used'] = time.monotonic()
+    return st.session_state[name][1]
+
+
+def refresh(name):
+    """Re-measure an artifact that grew in place (e.g. a lazily filled cache)."""
+    entry = _ledger().get(name)
+    if entry and entry['path'] is None and name in st.session_state:
+        entry['bytes'] = nbytes(st.session_state[name][1])
+        _enforce_budget(keep=name)
+
+
+def usage():
+    """(resident MB, spilled MB) held by this session."""
+    ledger = _ledger().values()
+    resident = sum(e['bytes'] for e in ledger if e['path'] is None)
+    return resident / 1024 ** 2, sum(e['bytes'] for e in ledger if e['path']) / 1024 ** 2
+
+
+def release_session():
+    """Drop everything this session holds, in memory and on disk."""
+    if "_session_id" in st.session_state:
+        shutil.rmtree(_session_dir(), ignore_errors=True)
+    st.session_state.clear()
+    end_session()
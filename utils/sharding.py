@@ -0,0 +1,101 @@
+# Multi-core sharded execution for the bulk LEAP / RUL pipelines
+
+import multiprocessing as mp
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+
+# Below this many rows the process hand-off costs more than it saves
+MIN_SHARD_ROWS = 20_000
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def cpu_workers():
+    return max(1, len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+
+
+def worker_pool(n_workers):
+    """One long-lived pool per server process, so workers start (and import pandas) only once."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < n_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned workers inherit a running tracker instead of starting their own (see _attach)
+            resource_tracker.ensure_running()
+            _pool = ProcessPoolExecutor(n_workers, mp_context=mp.get_context("spawn"))
+            _pool_workers = n_workers
+        return _pool
+
+
+def _attach(shm_name):
+    """Map a segment the parent created, without the worker taking ownership of it.
+
+    Before 3.13 attaching registers the segment with the resource tracker. The
+    workers share the parent's tracker, where that is a no-op and the parent's
+    unlink clears it; unregistering here would make that unlink fail instead.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=shm_name, track=False)
+    return shared_memory.SharedMemory(name=shm_name)
+
+
+def _run_shard(func, columns, start, stop):
+    """Worker side: view rows [start, stop) of the shared input columns and apply func."""
+    blocks, arrays = [], {}
+    try:
+        for name, (shm_name, dtype, length) in columns.items():
+            shm = _attach(shm_name)
+            blocks.append(shm)
+            arrays[name] = np.ndarray((length,), dtype=dtype, buffer=shm.buf)[start:stop]
+        shard = pd.DataFrame(arrays, index=pd.RangeIndex(start, stop), copy=True)
+        arrays.clear()
+        return func(shard)
+    finally:
+        for shm in blocks:
+            shm.close()
+
+
+def run_sharded(func, df, columns, n_workers=None):
+    """Apply `func` to df[columns] split into contiguous row ranges, one per worker.
+
+    The input columns are placed once in shared memory, which every worker maps
+    read-only, instead of being pickled to each process. Shard results are
+    concatenated back in row order with df's index, so the output is identical
+    to `func(df[columns])` run in this process (which is also what happens for
+    small inputs, one worker, or non-numeric input columns).
+    """
+    n_workers = n_workers or cpu_workers()
+    inputs = df[columns]
+    numeric = all(np.issubdtype(dtype, np.number) for dtype in inputs.dtypes)
+    if n_workers <= 1 or len(df) < MIN_SHARD_ROWS or not numeric:
+        return func(inputs)
+
+    n_shards = min(n_workers, len(df) // (MIN_SHARD_ROWS // 4) or 1)
+    bounds = np.linspace(0, len(df), n_shards + 1).astype(int)
+    blocks, shared = [], {}
+    try:
+        for name in columns:
+            values = inputs[name].to_numpy()
+            shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+            shared[name] = (shm.name, values.dtype.str, len(values))
+
+        pool = worker_pool(n_workers)
+        futures = [pool.submit(_run_shard, func, shared, start, stop)
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        result = pd.concat([f.result() for f in futures])
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    result.index = df.index
+    return result
@@ -0,0 +1,177 @@
+# Fleet survival model: Weibull lifetimes with Health Index and department as covariates
+#
+# Hazard h(t | x) = (k / λ) (t / λ)^(k-1) · exp(β_HI (HI - mean HI) + β_department),
+# a proportional-hazards Weibull fitted by maximum likelihood on the fleet
+# history (failed motors are events, motors still in service are right-censored).
+# Likelihood and gradient are closed-form sums over all motors, so decades of
+# history fit in a few vectorized L-BFGS iterations. Given a motor's age a, its
+# remaining life quantiles solve H(a + t) - H(a) = -log(1 - q) in closed form.
+# The fitted parameters are saved to .fleet_state/survival.json and every new
+# RUL upload is scored against them without refitting.
+
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from utils.fleet import UNASSIGNED, clean_department
+from utils.rollups import STATE_DIR
+from utils.rul import RUL_INPUTS, score_fleet
+from utils.schema import SchemaError, normalize
+
+HISTORY_COLUMNS = ['Manufacturing_Year', 'End_Year', 'Failed']
+# Motors that failed or left within their first year still count as half a year in service
+MIN_AGE = 0.5
+# Gaussian prior on the department log hazard ratios: departments with few failures stay near the baseline
+PRIOR_SD = 1.0
+RUL_QUANTILES = {'Survival_RUL_P10': 0.1, 'Survival_RUL': 0.5, 'Survival_RUL_P90': 0.9}
+
+
+class WeibullModel:
+    def __init__(self, shape, scale, beta_hi, hi_center, departments, baseline, stats=None):
+        self.shape, self.scale = shape, scale
+        self.beta_hi, self.hi_center = beta_hi, hi_center
+        self.departments, self.baseline = departments, baseline  # {department: log hazard ratio vs baseline}
+        self.stats = stats or {}
+
+    def log_risk(self, hi, departments):
+        dept_beta = pd.Series(departments).map(self.departments).fillna(0.0).to_numpy()
+        return self.beta_hi * (np.asarray(hi, dtype=float) - self.hi_center) + dept_beta
+
+    def remaining_life(self, age, hi, departments, q=0.5):
+        """q-quantile of remaining life (years) for motors of the given age, HI and department."""
+        age = np.maximum(np.asarray(age, dtype=float), 0.0)
+        k = self.shape
+        target = age ** k - np.log1p(-q) * self.scale ** k * np.exp(-self.log_risk(hi, departments))
+        return target ** (1 / k) - age
+
+    def failure_probability(self, age, hi, departments, horizon=1.0):
+        """Chance of failing within `horizon` years, given survival to `age`."""
+        age = np.maximum(np.asarray(age, dtype=float), 0.0)
+        k = self.shape
+        added = ((age + horizon) ** k - age ** k) / self.scale ** k * np.exp(self.log_risk(hi, departments))
+        return -np.expm1(-added)
+
+    def score(self, df):
+        """Survival RUL quantiles and 1-year failure probability for a scored RUL frame."""
+        departments = df['Department'].map(clean_department).replace("", UNASSIGNED) \
+            if 'Department' in df.columns else pd.Series(UNASSIGNED, index=df.index)
+        age, hi = df['Age'].to_numpy(), df['Health_Index'].to_numpy()
+        out = pd.DataFrame(index=df.index)
+        for col, q in RUL_QUANTILES.items():
+            out[col] = self.remaining_life(age, hi, departments.to_numpy(), q).round(1)
+        out['Failure_Risk_1yr_%'] = (100 * self.failure_probability(age, hi, departments.to_numpy())).round(1)
+        return out
+
+    def hazard_ratios(self):
+        rows = [{'Department': self.baseline, 'Hazard ratio': 1.0}]
+        rows += [{'Department': d, 'Hazard ratio': round(float(np.exp(b)), 3)}
+                 for d, b in sorted(self.departments.items()) if d != self.baseline]
+        return pd.DataFrame(rows)
+
+    def to_dict(self):
+        return {'shape': self.shape, 'scale': self.scale, 'beta_hi': self.beta_hi, 'hi_center': self.hi_center,
+                'departments': self.departments, 'baseline': self.baseline, 'stats': self.stats}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+
+def read_history(file):
+    """(years in service, failed, Health_Index, department) arrays from a fleet history CSV."""
+    file.seek(0)
+    df = pd.read_csv(file)
+    file.seek(0)
+    df.columns = [normalize(c) for c in df.columns]
+    missing = [col for col in HISTORY_COLUMNS if col not in df.columns]
+    if 'Health_Index' not in df.columns:
+        missing += [col for col in RUL_INPUTS if col not in df.columns and col not in missing]
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+    numeric = HISTORY_COLUMNS + (['Health_Index'] if 'Health_Index' in df.columns else RUL_INPUTS)
+    for col in dict.fromkeys(numeric):
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    if 'Health_Index' not in df.columns:
+        df = score_fleet(df)
+    df = df.dropna(subset=HISTORY_COLUMNS + ['Health_Index'])
+    if df.empty:
+        raise SchemaError("No complete history rows")
+    years = np.maximum((df['End_Year'] - df['Manufacturing_Year']).to_numpy(dtype=float), MIN_AGE)
+    departments = df['Department'].map(clean_department).replace("", UNASSIGNED).to_numpy() \
+        if 'Department' in df.columns else np.full(len(df), UNASSIGNED, dtype=object)
+    return years, df['Failed'].to_numpy(dtype=float) > 0, df['Health_Index'].to_numpy(dtype=float), departments
+
+
+def fit_weibull(years, failed, hi, departments):
+    """Maximum-likelihood proportional-hazards Weibull with right censoring."""
+    if not failed.any():
+        raise SchemaError("The history has no failures to fit lifetimes from")
+    start = time.perf_counter()
+    names, codes = np.unique(departments, return_inverse=True)
+    codes = codes.ravel()
+    baseline = int(np.argmax(np.bincount(codes)))
+    others = [i for i in range(len(names)) if i != baseline]
+    # Baseline department -> last slot, fixed at 0
+    slot = np.full(len(names), len(others))
+    slot[others] = np.arange(len(others))
+    slots = slot[codes]
+
+    log_t = np.log(years)
+    d = failed.astype(float)
+    hi_center = float(hi.mean())
+    x = hi - hi_center
+    n = len(years)
+
+    def objective(theta):
+        a, b, beta_hi, beta_dept = theta[0], theta[1], theta[2], theta[3:]
+        k = np.exp(a)
+        u = log_t - b
+        z = beta_hi * x + np.append(beta_dept, 0.0)[slots]
+        H = np.exp(np.clip(k * u + z, -700, 700))
+        loglik = np.sum(d * (a - b + (k - 1) * u + z)) - H.sum()
+        grad = np.empty_like(theta)
+        grad[0] = np.sum(d * (1 + k * u)) - np.sum(H * k * u)
+        grad[1] = -k * d.sum() + k * H.sum()
+        grad[2] = np.sum((d - H) * x)
+        grad[3:] = np.bincount(slots, weights=d - H, minlength=len(others) + 1)[:-1]
+        loglik -= np.sum(beta_dept ** 2) / (2 * PRIOR_SD ** 2)
+        grad[3:] -= beta_dept / PRIOR_SD ** 2
+        return -loglik / n, -grad / n
+
+    theta0 = np.zeros(3 + len(others))
+    theta0[1] = np.log(years.mean())
+    result = minimize(objective, theta0, jac=True, method="L-BFGS-B")
+    theta = result.x
+    return WeibullModel(
+        shape=float(np.exp(theta[0])), scale=float(np.exp(theta[1])), beta_hi=float(theta[2]), hi_center=hi_center,
+        departments={str(names[i]): float(theta[3 + j]) for j, i in enumerate(others)},
+        baseline=str(names[baseline]),
+        stats={'motors': int(n), 'failures': int(failed.sum()), 'converged': bool(result.success),
+               'seconds': round(time.perf_counter() - start, 3), 'fitted_at': time.strftime("%Y-%m-%d %H:%M")},
+    )
+
+
+def _path():
+    return STATE_DIR / "survival.json"
+
+
+def save_model(model, source=None):
+    """Replace the fleet model every server process scores with."""
+    model.stats['source'] = source
+    path = _path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(model.to_dict(), f)
+    os.replace(tmp, path)
+
+
+def load_model():
+    """The saved fleet model, or None before the first fit."""
+    try:
+        with open(_path()) as f:
+            return WeibullModel.from_dict(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
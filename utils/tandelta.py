@@ -0,0 +1,113 @@
+# Tan delta / capacitance voltage-step sweeps fitted in batch, giving the tip-up inputs the analyzers use
+#
+# A sweep file has one row per voltage step: a test key (Test_ID, else
+# Motor_ID), Voltage_pct (20, 40, ... 100 % of U0, or 0.2 ... 1.0, per test),
+# TanDelta and Capacitance. Each test's tan δ(U) and C(U) are fitted with a
+# quadratic by least squares. Tests sharing the same set of measured steps share
+# one design matrix, so its pseudo-inverse is computed once and every test in
+# the group is fitted with a single matrix product; thousands of sweeps cost a
+# handful of small solves.
+
+import numpy as np
+import pandas as pd
+from utils.fleet import MOTOR_ID
+from utils.megger import TEST_ID, read_measurements
+from utils.schema import SchemaError
+
+SWEEP_COLUMNS = ['Voltage_pct', 'TanDelta', 'Capacitance']
+DEGREE = 2
+# Fitted values are read at these fractions of U0
+LOW, HIGH = 0.2, 1.0
+# Column names ENV expects for the same quantities
+ENV_NAMES = {'TanDelta_20': 'TD_0.2', 'TanDelta_100': 'TD_1.0', 'TanDelta_TipUp': 'TD_TipUp'}
+
+
+def read_sweeps(file):
+    """Parse a sweep file into (test key column, long frame with Voltage as a fraction of U0)."""
+    df = read_measurements(file)
+    key = TEST_ID if TEST_ID in df.columns else MOTOR_ID if MOTOR_ID in df.columns else None
+    if key is None:
+        raise SchemaError(f"Missing test identity: the sweep file needs a {TEST_ID} or {MOTOR_ID} column")
+    missing = [col for col in SWEEP_COLUMNS if col not in df.columns]
+    if missing:
+        raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+    for col in SWEEP_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce')
+        bad = values.isna() & df[col].notna()
+        if bad.any():
+            row = int(np.argmax(bad.to_numpy()))
+            raise SchemaError(f"Column '{col}' must be numeric, found '{df[col].iloc[row]}' in data row {row + 1}")
+        df[col] = values
+    df[key] = df[key].astype(str)
+    volts = df['Voltage_pct']
+    # Unit decided per test, so one sweep in % of U0 doesn't rescale the per-unit sweeps in the same file
+    percent = volts.groupby(df[key]).transform('max') > 1.5
+    df['Voltage'] = volts.where(~percent, volts / 100)
+    return key, df.dropna(subset=['Voltage'])
+
+
+def batch_fit(Y, voltages, degree=DEGREE):
+    """Least-squares polynomial fits of every row of Y (tests x steps, NaN = step not measured).
+
+    Returns (coefficients, lowest power first, tests x degree + 1; RMS residual
+    per test). Rows are grouped by which steps they have; each group is solved
+    with one pseudo-inverse. Rows with too few steps for `degree` drop to the
+    highest degree they support; rows with fewer than two steps stay NaN.
+    """
+    coef = np.full((len(Y), degree + 1), np.nan)
+    rmse = np.full(len(Y), np.nan)
+    measured = ~np.isnan(Y)
+    patterns, groups = np.unique(measured, axis=0, return_inverse=True)
+    for g, pattern in enumerate(patterns):
+        rows = np.flatnonzero(groups.ravel() == g)
+        deg = min(degree, int(pattern.sum()) - 1)
+        if deg < 1:
+            continue
+        X = np.vander(voltages[pattern], deg + 1, increasing=True)
+        y = Y[np.ix_(rows, np.flatnonzero(pattern))]
+        c = np.linalg.pinv(X) @ y.T
+        coef[rows, :deg + 1] = c.T
+        coef[rows, deg + 1:] = 0.0
+        rmse[rows] = np.sqrt((((X @ c).T - y) ** 2).mean(axis=1))
+    return coef, rmse
+
+
+def _at(coef, u):
+    return coef @ (u ** np.arange(coef.shape[1]))
+
+
+def _slope(coef, u):
+    powers = np.arange(1, coef.shape[1])
+    return coef[:, 1:] @ (powers * u ** (powers - 1))
+
+
+def fit_sweeps(file):
+    """One row per test: fitted tan δ at 20% / 100% U0, tip-up, slope at U0, capacitance tip-up (%), fit quality."""
+    key, df = read_sweeps(file)
+    # Repeated readings at one step are averaged before fitting
+    steps = df.groupby([key, 'Voltage'])[['TanDelta', 'Capacitance']].mean()
+    voltages = np.sort(steps.index.get_level_values('Voltage').unique().to_numpy())
+    tan = steps['TanDelta'].unstack('Voltage').reindex(columns=voltages)
+    cap = steps['Capacitance'].unstack('Voltage').reindex(columns=voltages)
+
+    tan_coef, tan_rmse = batch_fit(tan.to_numpy(), voltages)
+    cap_coef, _ = batch_fit(cap.to_numpy(), voltages)
+    c_low, c_high = _at(cap_coef, LOW), _at(cap_coef, HIGH)
+
+    fits = pd.DataFrame({
+        'TanDelta_20': _at(tan_coef, LOW), 'TanDelta_100': _at(tan_coef, HIGH),
+        'TanDelta_Slope': _slope(tan_coef, HIGH),
+        'Cap_20': c_low, 'Cap_100': c_high,
+        'Cap_TipUp': np.where(c_low != 0, (c_high - c_low) / c_low * 100, np.nan),
+        'Steps': tan.notna().sum(axis=1).to_numpy(), 'Fit_RMSE': tan_rmse,
+    }, index=tan.index)
+    fits.insert(2, 'TanDelta_TipUp', fits['TanDelta_100'] - fits['TanDelta_20'])
+    identity = [c for c in (MOTOR_ID, 'Plant', 'Department') if c in df.columns and c != key]
+    if identity:
+        fits = fits.join(df.groupby(key)[identity].first())
+    return fits.reset_index().round({c: 5 for c in fits.columns if c not in identity and c != 'Steps'})
+
+
+def for_env(fits):
+    """The fitted values under the column names ENV expects."""
+    return fits.rename(columns=ENV_NAMES)
@@ -0,0 +1,80 @@
+# Monte Carlo uncertainty bands for Health Index and RUL
+
+import numpy as np
+import pandas as pd
+from utils.rul import SCORES, CONDITIONS, health_index, estimated_rul, condition_codes, DEFAULT_MOTOR_LIFE
+
+# Default 1-sigma measurement error per input: relative (multiplicative) for the
+# strictly positive readings, absolute for tan delta tip-up which sits around zero.
+MEASUREMENT_ERROR = {
+    'IR': ('relative', 0.10),
+    'PI': ('relative', 0.05),
+    'DD': ('relative', 0.10),
+    'TanDelta_TipUp': ('absolute', 0.10),
+    'Cap_TipUp': ('relative', 0.10),
+}
+
+# Upper bound on motors x samples held in memory at once (~40 MB per float64 array of 5 inputs)
+CHUNK_ELEMENTS = 1_000_000
+
+
+def _perturb(values, spec, rng):
+    """values: (motors, inputs) -> (motors, samples, inputs) perturbed readings."""
+    samples = rng.standard_normal((values.shape[0], spec['n_samples'], values.shape[1]))
+    samples *= spec['sigma']
+    for i, relative in enumerate(spec['relative']):
+        column = samples[..., i]
+        if relative:
+            np.exp(column, out=column)
+            column *= values[:, i, None]
+        else:
+            column += values[:, i, None]
+    return samples
+
+
+def monte_carlo_bands(df, n_samples=1000, errors=None, motor_life=DEFAULT_MOTOR_LIFE,
+                      percentiles=(5, 50, 95), seed=0):
+    """Perturb every motor's inputs `n_samples` times and summarise the outcome.
+
+    Runs chunk by chunk over motors so memory stays bounded by CHUNK_ELEMENTS
+    regardless of fleet size. Returns one row per motor with percentile bands for
+    Health_Index and Estimated_RUL and the probability of each Condition.
+    """
+    errors = {**MEASUREMENT_ERROR, **(errors or {})}
+    inputs = list(SCORES)
+    spec = {
+        'n_samples': n_samples,
+        'relative': np.array([errors[c][0] == 'relative' for c in inputs]),
+        'sigma': np.array([errors[c][1] for c in inputs]),
+    }
+    scorers = [scorer for _, scorer, _ in SCORES.values()]
+    weights = np.array([weight for _, _, weight in SCORES.values()])
+
+    values = df[inputs].to_numpy(dtype=float)
+    age = df['Age'].to_numpy(dtype=float)
+    rng = np.random.default_rng(seed)
+    chunk = max(1, CHUNK_ELEMENTS // n_samples)
+
+    hi_bands, rul_bands, probs = [], [], []
+    for start in range(0, len(values), chunk):
+        samples = _perturb(values[start:start + chunk], spec, rng)
+        scores = np.stack([score(samples[..., i]) for i, score in enumerate(scorers)], axis=-1)
+        hi = health_index(scores, weights)
+        rul = estimated_rul(hi, age[start:start + chunk, None], motor_life)
+
+        hi_bands.append(np.percentile(hi, percentiles, axis=1).T)
+        rul_bands.append(np.percentile(rul, percentiles, axis=1).T)
+        codes = condition_codes(hi)
+        probs.append(np.stack([(codes == i).mean(axis=1) for i in range(len(CONDITIONS))], axis=1))
+
+    result = pd.DataFrame(index=df.index)
+    hi_bands = np.concatenate(hi_bands) if hi_bands else np.empty((0, len(percentiles)))
+    rul_bands = np.concatenate(rul_bands) if rul_bands else np.empty((0, len(percentiles)))
+    probs = np.concatenate(probs) if probs else np.empty((0, len(CONDITIONS)))
+    for i, p in enumerate(percentiles):
+        result[f'Health_Index_P{p}'] = hi_bands[:, i]
+    for i, p in enumerate(percentiles):
+        result[f'Estimated_RUL_P{p}'] = rul_bands[:, i]
+    for i, condition in enumerate(CONDITIONS):
+        result[f'P_{condition}'] = probs[:, i]
+    return result
@@ -0,0 +1,43 @@
+# Fleet-wide what-if sweep over motor life and Health Index weights
+
+import itertools
+import numpy as np
+import pandas as pd
+from utils.rul import DEFAULT_WEIGHTS, estimated_rul
+
+
+def weight_grid(base_weights, td_weights, cap_weights):
+    """Every (IR/PI/DD, TD tip-up, Cap tip-up) weight combination as rows of a (k, 5) array."""
+    combos = itertools.product(base_weights, td_weights, cap_weights)
+    return np.array([[b, b, b, td, cap] for b, td, cap in combos], dtype=float)
+
+
+def sweep(scores, age, motor_lives, weights, rul_horizon=5):
+    """Evaluate the fleet at every weight combination and motor life.
+
+    `scores` is the cached (motors, 5) score matrix, so a grid point costs one
+    matrix product for the Health Index and one linear RUL term per life value;
+    nothing is rescored. Returns one row per grid point.
+    """
+    scores = np.asarray(scores, dtype=float)
+    age = np.asarray(age, dtype=float)
+    weights = np.atleast_2d(weights)
+
+    hi = scores @ weights.T / weights.sum(axis=1)          # (motors, k)
+    base_critical = (scores @ DEFAULT_WEIGHTS / DEFAULT_WEIGHTS.sum()) < 4
+    critical = hi < 4
+    n_critical = critical.sum(axis=0)
+    newly_critical = (critical & ~base_critical[:, None]).sum(axis=0)
+
+    rows = []
+    for life in motor_lives:
+        rul = estimated_rul(hi, age[:, None], life)
+        below = (rul < rul_horizon).sum(axis=0)
+        mean_rul = rul.mean(axis=0) if len(rul) else np.full(len(weights), np.nan)
+        for k, w in enumerate(weights):
+            rows.append({
+                'IR_PI_DD_Weight': w[0], 'TD_TipUp_Weight': w[3], 'Cap_TipUp_Weight': w[4],
+                'Motor_Life': life, 'Critical': int(n_critical[k]), 'Newly_Critical': int(newly_critical[k]),
+                'RUL_Below_Horizon': int(below[k]), 'Mean_RUL': mean_rul[k],
+            })
+    return pd.DataFrame(rows)